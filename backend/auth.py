@@ -1,18 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+import asyncio
+import time
+from typing import NamedTuple, Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
 from config import settings
-from database import get_db
+from database import SessionLocal
+from cache import TTLCache
+import coherencia
 from models import AdminUser
 from schemas import TokenData
 
 # Configuración de encriptación de contraseñas
 import bcrypt
 
+# bcrypt consume cientos de milisegundos de CPU: se ejecuta en un pool acotado
+# para no congelar el event loop durante un login
+_pool_bcrypt = None
+
+
+def _get_pool_bcrypt() -> ThreadPoolExecutor:
+    global _pool_bcrypt
+    if _pool_bcrypt is None:
+        _pool_bcrypt = ThreadPoolExecutor(
+            max_workers=max(1, settings.BCRYPT_THREADS), thread_name_prefix="bcrypt"
+        )
+    return _pool_bcrypt
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica una contraseña usando bcrypt directamente"""
     try:
@@ -26,16 +43,32 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Genera hash de contraseña usando bcrypt directamente"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
-# Mantenemos CryptContext solo por compatibilidad, pero no para bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def needs_rehash(hashed_password: str) -> bool:
+    """Indica si el hash se generó con un costo distinto al configurado"""
+    try:
+        return int(hashed_password.split('$')[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool_bcrypt(), verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool_bcrypt(), get_password_hash, password)
+
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
+oauth2_scheme_opcional = OAuth2PasswordBearer(tokenUrl="api/auth/login", auto_error=False)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -50,34 +83,146 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+# Tokens ya decodificados y usuarios ya validados (evitan decodificar el JWT
+# y consultar admin_users en cada petición del panel). Los cambios hechos por
+# la app se invalidan con invalidar_usuario() en todos los workers; los hechos
+# a mano en la base tardan hasta AUTH_CACHE_TTL segundos en verse
+_tokens_decodificados = TTLCache("auth_tokens", maxsize=1024)
+_usuarios_validados = TTLCache("auth_usuarios", maxsize=256, ttl=settings.AUTH_CACHE_TTL)
+
+
+def _decodificar_token(token: str):
+    """Devuelve (username, exp) memoizando el resultado hasta que el token expire"""
+    memo = _tokens_decodificados.get(token)
+    if memo is not None:
+        if memo[1] is None or memo[1] > time.time():
+            return memo
+        _tokens_decodificados.pop(token)
+        raise JWTError("Token expirado")
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    username = payload.get("sub")
+    exp = payload.get("exp")
+    if username is None:
+        raise JWTError("Token sin sujeto")
+    if payload.get("alcance") is not None:
+        raise JWTError("Token de alcance limitado")
+    resultado = (username, exp)
+    ttl = max(0.0, exp - time.time()) if exp else None
+    _tokens_decodificados.set(token, resultado, ttl=ttl)
+    return resultado
+
+
 def verify_token(token: str, credentials_exception):
     """Verifica un token JWT"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-        return token_data
+        username, _ = _decodificar_token(token)
+        return TokenData(username=username)
     except JWTError:
         raise credentials_exception
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    """Obtiene el usuario actual desde el token"""
-    credentials_exception = HTTPException(
+def _quitar_usuario(username: str):
+    _usuarios_validados.pop(username)
+
+
+def invalidar_usuario(username: str):
+    """Debe llamarse al desactivar, eliminar o cambiar un usuario administrador"""
+    _quitar_usuario(username)
+    coherencia.publicar("usuario", username)
+
+
+coherencia.suscribir("usuario", _quitar_usuario)
+
+
+def _credenciales_invalidas():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _usuario_desde_token(token: str):
+    credentials_exception = _credenciales_invalidas()
     token_data = verify_token(token, credentials_exception)
-    user = db.query(AdminUser).filter(AdminUser.username == token_data.username).first()
-    if user is None:
-        raise credentials_exception
-    if not user.is_active:
-        raise HTTPException(status_code=400, detail="Usuario inactivo")
-    return user
+    return _usuario_validado(token_data.username, credentials_exception)
+
+
+def _usuario_validado(username: str, credentials_exception):
+    coherencia.sincronizar()
+    user = _usuarios_validados.get(username)
+    if user is not None:
+        return user
+
+    with SessionLocal() as db:
+        user = db.query(AdminUser).filter(AdminUser.username == username).first()
+        if user is None:
+            raise credentials_exception
+        if not user.is_active:
+            raise HTTPException(status_code=400, detail="Usuario inactivo")
+        # Copia sin sesión ni hash de contraseña para compartir entre peticiones
+        principal = AdminUser(id=user.id, username=user.username, is_active=user.is_active)
+    _usuarios_validados.set(principal.username, principal)
+    return principal
+
+
+def get_current_user(token: str = Depends(oauth2_scheme)):
+    """Obtiene el usuario actual desde el token"""
+    return _usuario_desde_token(token)
+
+
+def usuario_vigente(username: str) -> bool:
+    """Si el usuario sigue existiendo y activo (misma caché que get_current_user)"""
+    try:
+        _usuario_validado(username, _credenciales_invalidas())
+        return True
+    except HTTPException:
+        return False
+
 
+# Tokens para abrir el stream de eventos: EventSource no permite cabeceras y
+# el token va en la URL, donde queda en los logs de accesos. Por eso vencen a
+# los EVENTS_TOKEN_SECONDS y no sirven para el resto de la API
+ALCANCE_EVENTOS = "eventos"
+
+
+class SesionEventos(NamedTuple):
+    usuario: AdminUser
+    # Vencimiento (epoch) de la sesión del panel: el stream se cierra entonces
+    expira: Optional[float]
+
+
+def crear_token_eventos(token: str) -> str:
+    """Token corto para /api/admin/eventos a partir del JWT de la sesión"""
+    username, exp = _decodificar_token(token)
+    datos = {
+        "sub": username,
+        "alcance": ALCANCE_EVENTOS,
+        "sesion": exp,
+        "exp": datetime.utcnow() + timedelta(seconds=settings.EVENTS_TOKEN_SECONDS),
+    }
+    return jwt.encode(datos, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def get_sesion_eventos(
+    token_header: Optional[str] = Depends(oauth2_scheme_opcional),
+    token: Optional[str] = Query(None, description="Token de POST /api/admin/eventos/token")
+) -> SesionEventos:
+    """
+    Usuario del stream de eventos: el JWT de la sesión por cabecera o, en la
+    query string, solo un token de crear_token_eventos()
+    """
+    credentials_exception = _credenciales_invalidas()
+    try:
+        if token_header:
+            _, exp = _decodificar_token(token_header)
+            return SesionEventos(_usuario_desde_token(token_header), exp)
+        if not token:
+            raise credentials_exception
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    username = payload.get("sub")
+    if payload.get("alcance") != ALCANCE_EVENTOS or username is None:
+        raise credentials_exception
+    return SesionEventos(_usuario_validado(username, credentials_exception), payload.get("sesion"))
@@ -0,0 +1,115 @@
+"""
+Benchmark: throughput concurrente de la ruta síncrona (antes) vs la asíncrona (después)
+
+Levanta la app contra una base SQLite temporal, siembra N invitados y lanza
+peticiones concurrentes a /api/invitado/{uuid}. Para que la diferencia sea
+visible con SQLite se simula la latencia de red de MySQL con un retardo por
+sentencia que se ejecuta en el hilo que habla con la base de datos: en la
+ruta antigua ese hilo es el del event loop, en la nueva es el del driver.
+
+Nota: con la ruta antigua una concurrencia mayor que el pool síncrono
+(pool_size + max_overflow = 15) bloquea el event loop esperando una conexión
+que solo se libera al terminar otra petición en ese mismo loop, y todo se
+detiene hasta el pool_timeout. Por eso la concurrencia por defecto es 12.
+
+Ejecutar (requiere httpx):
+    cd backend && python benchmarks/async_db.py --invitados 500 --peticiones 2000 --concurrencia 12
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from comun import instalar_latencia, preparar_entorno, sembrar  # noqa: E402
+
+
+def montar_ruta_sincrona(app):
+    """Réplica de la implementación anterior: Session bloqueante dentro de async def"""
+    from fastapi import Depends, HTTPException
+    from sqlalchemy.orm import Session
+    from database import get_db
+    from models import Invitado
+    from schemas import InvitadoResponse
+
+    @app.get("/bench/sync/invitado/{uuid_invitado}", response_model=InvitadoResponse)
+    async def _invitado_sync(uuid_invitado: str, db: Session = Depends(get_db)):
+        invitado = db.query(Invitado).filter(Invitado.uuid == uuid_invitado).first()
+        if not invitado:
+            raise HTTPException(status_code=404, detail="Invitado no encontrado")
+        return invitado
+
+
+async def medir(client, rutas, concurrencia: int):
+    latencias = []
+    cola = list(rutas)
+    cola.reverse()
+
+    async def worker():
+        while cola:
+            ruta = cola.pop()
+            t0 = time.perf_counter()
+            r = await client.get(ruta)
+            latencias.append(time.perf_counter() - t0)
+            if r.status_code != 200:
+                raise RuntimeError(f"{ruta} -> {r.status_code}")
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrencia)))
+    total = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        "peticiones": len(latencias),
+        "segundos": round(total, 3),
+        "req_s": round(len(latencias) / total, 1),
+        "p50_ms": round(statistics.median(latencias) * 1000, 2),
+        "p95_ms": round(latencias[int(len(latencias) * 0.95) - 1] * 1000, 2),
+    }
+
+
+async def main_async(args):
+    import httpx
+    import main as app_module
+
+    montar_ruta_sincrona(app_module.app)
+    uuids = [u for u, _ in sembrar(args.invitados)]
+    instalar_latencia(args.latencia_ms)
+
+    rutas = [uuids[i % len(uuids)] for i in range(args.peticiones)]
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Calentamiento de pools y caches de compilación
+        await client.get(f"/bench/sync/invitado/{uuids[0]}")
+        await client.get(f"/api/invitado/{uuids[0]}")
+
+        antes = await medir(client, [f"/bench/sync/invitado/{u}" for u in rutas], args.concurrencia)
+        despues = await medir(client, [f"/api/invitado/{u}" for u in rutas], args.concurrencia)
+
+    print(f"Concurrencia {args.concurrencia}, latencia simulada {args.latencia_ms} ms por sentencia")
+    print(f"{'':10} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for nombre, r in (("antes", antes), ("después", despues)):
+        print(f"{nombre:10} {r['req_s']:>10} {r['p50_ms']:>10} {r['p95_ms']:>10}")
+    print(f"Mejora: x{despues['req_s'] / antes['req_s']:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invitados", type=int, default=500)
+    parser.add_argument("--peticiones", type=int, default=1000)
+    parser.add_argument("--concurrencia", type=int, default=12)
+    parser.add_argument("--latencia-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar_entorno(os.path.join(tmp, "bench.db"))
+        # Se mide el acceso a la base, no la caché de lecturas
+        os.environ["INVITADOS_CACHE_TTL"] = "0"
+        asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Prueba de carga: simulación de un envío masivo de invitaciones
+
+Corre la app en el mismo proceso (httpx.ASGITransport) contra una base
+SQLite temporal sembrada con N invitados y reproduce tres fases:
+
+- envio: ráfaga de aperturas de links (/?uuid=, /api/datos-completos,
+  código escrito a mano, /api/evento) concentrada en los invitados más
+  "populares", como cuando un grupo de WhatsApp abre el mismo mensaje
+- rsvp: tormenta de confirmaciones cerca de la fecha límite, con dobles
+  toques (mismo Idempotency-Key) y recargas de la página tras responder
+- admin: el panel consultando lista y estadísticas mientras todo ocurre
+
+Durante las tres fases un worker extra hace el polling del panel cada
+--intervalo-admin segundos. Se informa throughput y p50/p95/p99 por ruta
+y por fase, más microbenchmarks de serialización de InvitadoResponse y de
+carga del evento. El resultado es JSON para comparar entre commits.
+
+Ejecutar (requiere httpx):
+    cd backend && python benchmarks/carga.py --salida antes.json
+    cd backend && python benchmarks/carga.py --salida despues.json --comparar antes.json
+
+--latencia-ms simula el round trip de red a MySQL (ver async_db.py).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from comun import BACKEND_DIR, instalar_latencia, preparar_entorno, resumen_latencias, sembrar  # noqa: E402
+
+
+# ==================== CARGA HTTP ====================
+
+class Registro:
+    """Latencias por (fase, ruta)"""
+
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+
+    def anotar(self, fase: str, ruta: str, segundos: float, ok: bool):
+        self.latencias[(fase, ruta)].append(segundos)
+        if not ok:
+            self.errores[(fase, ruta)] += 1
+
+
+def elegir_populares(rng: random.Random, invitados, n: int, sesgo: float = 1.1):
+    """n invitados con popularidad tipo Zipf: pocos concentran la mayoría de las visitas"""
+    pesos = [1.0 / (i + 1) ** sesgo for i in range(len(invitados))]
+    return rng.choices(invitados, weights=pesos, k=n)
+
+
+def plan_envio(rng: random.Random, invitados, n: int):
+    peticiones = []
+    for uuid_inv, codigo in elegir_populares(rng, invitados, n):
+        r = rng.random()
+        if r < 0.45:
+            peticiones.append(("GET /?uuid=", "GET", f"/?uuid={uuid_inv}", {}))
+        elif r < 0.80:
+            peticiones.append(("GET /api/datos-completos/{uuid}", "GET", f"/api/datos-completos/{uuid_inv}", {}))
+        elif r < 0.90:
+            peticiones.append(("GET /api/datos-completos-codigo/{codigo}", "GET",
+                               f"/api/datos-completos-codigo/{codigo.lower()}", {}))
+        else:
+            peticiones.append(("GET /api/evento", "GET", "/api/evento", {}))
+    return peticiones
+
+
+def plan_rsvp(rng: random.Random, invitados, n: int, proporcion_dobles: float):
+    peticiones = []
+    for uuid_inv, _ in rng.choices(invitados, k=n):
+        if rng.random() < 0.6:
+            cuerpo = {"confirmacion": "si", "cantidad_adultos": rng.randint(1, 3), "cantidad_ninos": rng.randint(0, 1)}
+        else:
+            cuerpo = {"confirmacion": "no"}
+        envio = ("POST /api/invitado/{uuid}/rsvp", "POST", f"/api/invitado/{uuid_inv}/rsvp",
+                 {"json": cuerpo, "headers": {"Idempotency-Key": f"{uuid_inv}-{rng.random()}"}})
+        peticiones.append(envio)
+        if rng.random() < proporcion_dobles:
+            peticiones.append(envio)
+        # El invitado recarga la página para ver su respuesta
+        peticiones.append(("GET /api/datos-completos/{uuid}", "GET", f"/api/datos-completos/{uuid_inv}", {}))
+    return peticiones
+
+
+def plan_admin(n: int):
+    peticiones = []
+    for i in range(n):
+        if i % 2:
+            peticiones.append(("GET /api/admin/estadisticas", "GET", "/api/admin/estadisticas", {}))
+        else:
+            peticiones.append(("GET /api/admin/invitados?limite=50", "GET", "/api/admin/invitados?limite=50", {}))
+    return peticiones
+
+
+async def ejecutar_fase(client, registro: Registro, fase: str, peticiones, concurrencia: int,
+                        auth_headers: dict, intervalo_admin: float) -> dict:
+    cola = list(reversed(peticiones))
+    terminado = asyncio.Event()
+
+    async def enviar(ruta, metodo, url, kwargs):
+        headers = dict(kwargs.get("headers") or {})
+        if "/api/admin/" in url:
+            headers.update(auth_headers)
+        t0 = time.perf_counter()
+        r = await client.request(metodo, url, json=kwargs.get("json"), headers=headers)
+        registro.anotar(fase, ruta, time.perf_counter() - t0, r.status_code < 400)
+
+    async def worker():
+        while cola:
+            await enviar(*cola.pop())
+
+    async def polling_admin():
+        i = 0
+        while not terminado.is_set():
+            await enviar(*plan_admin(i + 1)[i])
+            i += 1
+            try:
+                await asyncio.wait_for(terminado.wait(), timeout=intervalo_admin)
+            except asyncio.TimeoutError:
+                pass
+
+    inicio = time.perf_counter()
+    poller = asyncio.create_task(polling_admin()) if intervalo_admin > 0 else None
+    await asyncio.gather(*(worker() for _ in range(concurrencia)))
+    terminado.set()
+    if poller:
+        await poller
+    segundos = time.perf_counter() - inicio
+
+    total = sum(len(v) for (f, _), v in registro.latencias.items() if f == fase)
+    errores = sum(v for (f, _), v in registro.errores.items() if f == fase)
+    todas = [l for (f, _), v in registro.latencias.items() if f == fase for l in v]
+    return {
+        "peticiones": total,
+        "errores": errores,
+        "segundos": round(segundos, 3),
+        "req_s": round(total / segundos, 1) if segundos else 0.0,
+        **resumen_latencias(todas),
+    }
+
+
+def resumen_rutas(registro: Registro, fases: dict) -> dict:
+    por_ruta = defaultdict(list)
+    errores = defaultdict(int)
+    segundos = defaultdict(float)
+    for (fase, ruta), latencias in registro.latencias.items():
+        por_ruta[ruta].extend(latencias)
+        errores[ruta] += registro.errores.get((fase, ruta), 0)
+        segundos[ruta] += fases[fase]["segundos"]
+    return {
+        ruta: {
+            "peticiones": len(latencias),
+            "errores": errores[ruta],
+            "req_s": round(len(latencias) / segundos[ruta], 1) if segundos[ruta] else 0.0,
+            **resumen_latencias(latencias),
+        }
+        for ruta, latencias in sorted(por_ruta.items())
+    }
+
+
+async def carga(args, invitados) -> dict:
+    import httpx
+    import main as app_module
+
+    rng = random.Random(args.semilla)
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        r = await client.post("/api/auth/login", json={
+            "username": os.environ["ADMIN_USERNAME"],
+            "password": os.environ["ADMIN_PASSWORD"],
+            "secret_code": os.environ["ADMIN_SECRET_CODE"],
+        })
+        r.raise_for_status()
+        auth_headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        # Calentamiento: compilación de consultas, plantillas y pools
+        for _, metodo, url, kwargs in plan_envio(rng, invitados, 20) + plan_admin(2):
+            headers = auth_headers if "/api/admin/" in url else {}
+            await client.request(metodo, url, json=kwargs.get("json"), headers=headers)
+
+        registro = Registro()
+        fases = {}
+        planes = (
+            ("envio", plan_envio(rng, invitados, args.lecturas)),
+            ("rsvp", plan_rsvp(rng, invitados, args.rsvps, args.dobles)),
+            ("admin", plan_admin(args.admin)),
+        )
+        for fase, peticiones in planes:
+            fases[fase] = await ejecutar_fase(
+                client, registro, fase, peticiones, args.concurrencia, auth_headers, args.intervalo_admin
+            )
+        resultado = {"fases": fases, "rutas": resumen_rutas(registro, fases)}
+        import escritura
+        if escritura.cola is not None:
+            resultado["cola_escritura"] = escritura.cola.stats()
+        return resultado
+
+
+# ==================== MICROBENCHMARKS ====================
+
+def _medir(funcion, repeticiones: int, rondas: int = 5) -> dict:
+    """Mejor ronda de `repeticiones` llamadas (minimiza el ruido del sistema)"""
+    mejor = float("inf")
+    for _ in range(rondas):
+        t0 = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    por_op = mejor / repeticiones
+    return {"us_por_op": round(por_op * 1e6, 3), "ops_s": round(1 / por_op, 1) if por_op else 0.0}
+
+
+def microbenchmarks(repeticiones: int) -> dict:
+    from database import SessionLocal
+    from evento_cache import EventoStore
+    from models import Invitado
+    from schemas import InvitadoResponse
+
+    db = SessionLocal()
+    try:
+        invitados = db.query(Invitado).limit(repeticiones).all()
+    finally:
+        db.close()
+    def rotar(items):
+        i = [0]
+
+        def siguiente():
+            i[0] = (i[0] + 1) % len(items)
+            return items[i[0]]
+        return siguiente
+
+    siguiente = rotar(invitados)
+    ruta_evento = os.path.join(BACKEND_DIR, "evento.json")
+    store = EventoStore(ruta_evento)
+    store.snapshot()
+
+    def evento_frio():
+        store.invalidate()
+        store.snapshot()
+
+    def evento_json():
+        with open(ruta_evento, "rb") as f:
+            json.loads(f.read())
+
+    return {
+        "invitado_model_validate_dump": _medir(
+            lambda: InvitadoResponse.model_validate(siguiente()).model_dump(mode="json"), repeticiones
+        ),
+        "invitado_model_dump_json": _medir(
+            lambda: InvitadoResponse.model_validate(siguiente()).model_dump_json(), repeticiones
+        ),
+        "evento_snapshot_en_cache": _medir(store.snapshot, repeticiones),
+        "evento_snapshot_recarga": _medir(evento_frio, max(1, repeticiones // 10)),
+        "evento_json_load": _medir(evento_json, max(1, repeticiones // 10)),
+    }
+
+
+# ==================== SALIDA ====================
+
+def commit_actual() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def imprimir(resultado: dict, anterior: dict = None):
+    salida = sys.stderr
+    print(f"\n{'fase':10} {'req':>7} {'err':>5} {'req/s':>9} {'p50':>8} {'p95':>8} {'p99':>8}", file=salida)
+    for fase, r in resultado["fases"].items():
+        print(f"{fase:10} {r['peticiones']:>7} {r['errores']:>5} {r['req_s']:>9} "
+              f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}", file=salida)
+
+    print(f"\n{'ruta':42} {'req':>6} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+          + ("  p95 antes" if anterior else ""), file=salida)
+    for ruta, r in resultado["rutas"].items():
+        linea = (f"{ruta:42} {r['peticiones']:>6} {r['errores']:>5} "
+                 f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}")
+        previo = (anterior or {}).get("rutas", {}).get(ruta)
+        if previo:
+            cambio = (r["p95_ms"] / previo["p95_ms"] - 1) * 100 if previo["p95_ms"] else 0.0
+            linea += f"  {previo['p95_ms']:>9} ({cambio:+.0f}%)"
+        print(linea, file=salida)
+
+    print(f"\n{'microbenchmark':32} {'µs/op':>10} {'ops/s':>12}"
+          + ("  ops/s antes" if anterior else ""), file=salida)
+    for nombre, r in resultado["micro"].items():
+        linea = f"{nombre:32} {r['us_por_op']:>10} {r['ops_s']:>12}"
+        previo = (anterior or {}).get("micro", {}).get(nombre)
+        if previo:
+            linea += f"  {previo['ops_s']:>11} ({(r['ops_s'] / previo['ops_s'] - 1) * 100:+.0f}%)"
+        print(linea, file=salida)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invitados", type=int, default=500)
+    parser.add_argument("--lecturas", type=int, default=3000, help="peticiones de la fase envio")
+    parser.add_argument("--rsvps", type=int, default=400, help="confirmaciones de la fase rsvp")
+    parser.add_argument("--dobles", type=float, default=0.15, help="proporción de RSVP enviados dos veces")
+    parser.add_argument("--admin", type=int, default=200, help="peticiones de la fase admin")
+    parser.add_argument("--intervalo-admin", type=float, default=0.5,
+                        help="segundos entre consultas del panel durante todas las fases (0 = sin polling)")
+    parser.add_argument("--concurrencia", type=int, default=12)
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    parser.add_argument("--micro-repeticiones", type=int, default=500)
+    parser.add_argument("--semilla", type=int, default=2026)
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto, stdout)")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para mostrar la diferencia")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar_entorno(os.path.join(tmp, "bench.db"))
+        os.environ["OG_CACHE_DIR"] = os.path.join(tmp, "og")
+        invitados = sembrar(args.invitados)
+        instalar_latencia(args.latencia_ms)
+
+        resultado = {
+            "meta": {
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "commit": commit_actual(),
+                "python": platform.python_version(),
+                "plataforma": platform.platform(),
+                "parametros": vars(args),
+            },
+            **asyncio.run(carga(args, invitados)),
+            "micro": microbenchmarks(args.micro_repeticiones),
+        }
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+    imprimir(resultado, anterior)
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
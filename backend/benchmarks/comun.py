@@ -0,0 +1,110 @@
+"""
+Utilidades compartidas por los benchmarks
+
+Todos los scripts corren la app en el mismo proceso contra una base SQLite
+temporal: preparar_entorno() debe llamarse antes de importar cualquier
+módulo de la app para que la configuración apunte a esa base.
+"""
+import os
+import statistics
+import sys
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def preparar_entorno(db_path: str):
+    """Fuerza una base temporal antes de importar la app (nunca toca la real)"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ADMIN_USERNAME", "admin")
+    os.environ.setdefault("ADMIN_PASSWORD", "admin")
+    os.environ.setdefault("ADMIN_SECRET_CODE", "benchmark")
+    # El costo de bcrypt no es lo que se mide aquí
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+
+def sembrar(n: int, prefijo: str = "BENCH"):
+    """
+    Crea las tablas, el usuario admin (como init_db.py) y n invitados pendientes.
+    Devuelve la lista de (uuid, codigo).
+    """
+    from sqlalchemy import insert
+
+    from auth import get_password_hash
+    from config import settings
+    from database import Base, SessionLocal, engine
+    from models import AdminUser, EstadoInvitado, Invitado
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if not db.query(AdminUser).filter(AdminUser.username == settings.ADMIN_USERNAME).first():
+            db.add(AdminUser(
+                username=settings.ADMIN_USERNAME,
+                password_hash=get_password_hash(settings.ADMIN_PASSWORD),
+                is_active=1,
+            ))
+        filas = [
+            {
+                "uuid": str(uuid.uuid4()), "codigo": f"{prefijo}-{i:05d}", "nombres": f"Invitado {i}",
+                "max_adultos": 2, "max_ninos": 1, "cantidad_adultos": 2, "cantidad_ninos": 1,
+                "estado": EstadoInvitado.PENDIENTE,
+            }
+            for i in range(1, n + 1)
+        ]
+        if filas:
+            db.execute(insert(Invitado), filas)
+        db.commit()
+        return [(f["uuid"], f["codigo"]) for f in filas]
+    finally:
+        db.close()
+
+
+def instalar_latencia(latencia_ms: float):
+    """Retardo por sentencia en el hilo del driver (simula el round trip a MySQL)"""
+    from sqlalchemy import event
+    from database import engine, get_async_engine
+
+    segundos = latencia_ms / 1000.0
+    if segundos <= 0:
+        return
+
+    def retardo(_sql):
+        time.sleep(segundos)
+
+    @event.listens_for(engine, "connect")
+    def _sync_connect(dbapi_connection, _record):
+        dbapi_connection.set_trace_callback(retardo)
+
+    @event.listens_for(get_async_engine().sync_engine, "connect")
+    def _async_connect(dbapi_connection, _record):
+        # aiosqlite ejecuta todo en su propio hilo; el callback debe instalarse ahí
+        dbapi_connection.run_async(
+            lambda conn: conn._execute(conn._conn.set_trace_callback, retardo)
+        )
+
+
+def percentil(ordenadas, p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not ordenadas:
+        return 0.0
+    indice = max(0, min(len(ordenadas) - 1, int(round(p / 100 * len(ordenadas) + 0.5)) - 1))
+    return ordenadas[indice]
+
+
+def resumen_latencias(latencias) -> dict:
+    """p50/p95/p99, media y máximo en milisegundos"""
+    ordenadas = sorted(latencias)
+    if not ordenadas:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "media_ms": 0.0, "max_ms": 0.0}
+    return {
+        "p50_ms": round(percentil(ordenadas, 50) * 1000, 3),
+        "p95_ms": round(percentil(ordenadas, 95) * 1000, 3),
+        "p99_ms": round(percentil(ordenadas, 99) * 1000, 3),
+        "media_ms": round(statistics.fmean(ordenadas) * 1000, 3),
+        "max_ms": round(ordenadas[-1] * 1000, 3),
+    }
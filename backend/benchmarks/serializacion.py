@@ -0,0 +1,142 @@
+"""
+Benchmark: filas/segundo al serializar invitados (Pydantic vs FAST_JSON)
+
+Compara, sobre los mismos objetos ORM:
+
+- pydantic: lo que hace FastAPI con response_model=List[InvitadoResponse]
+  (validación from_attributes, campos calculados, dump a JSON-compatible y
+  json.dumps)
+- rapido_json: conversor generado de serializacion.py + json estándar
+- rapido_orjson: conversor generado + orjson
+- filas_orjson: el camino del listado con FAST_JSON, filas de columnas
+  (sin objetos ORM) convertidas por posición + orjson
+
+y luego el listado completo GET /api/admin/invitados de punta a punta con
+FAST_JSON desactivado y activado (incluye la consulta a la base).
+
+Ejecutar:
+    cd backend && python benchmarks/serializacion.py --invitados 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from comun import preparar_entorno, sembrar  # noqa: E402
+
+
+def mejor_tiempo(funcion, rondas: int) -> float:
+    mejor = float("inf")
+    for _ in range(rondas):
+        t0 = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def serializadores(invitados, filas):
+    from typing import List
+
+    from pydantic import TypeAdapter
+
+    import serializacion
+    from schemas import InvitadoResponse
+
+    adaptador = TypeAdapter(List[InvitadoResponse])
+
+    def pydantic():
+        datos = adaptador.dump_python(adaptador.validate_python(invitados), mode="json")
+        return json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def rapido():
+        return serializacion.dumps([serializacion.invitado_a_dict(o) for o in invitados])
+
+    def rapido_json():
+        orjson, serializacion.orjson = serializacion.orjson, None
+        try:
+            return rapido()
+        finally:
+            serializacion.orjson = orjson
+
+    casos = {"pydantic": pydantic, "rapido_json": rapido_json}
+    if serializacion.orjson is not None:
+        casos["rapido_orjson"] = rapido
+        casos["filas_orjson"] = lambda: serializacion.lista_json(filas)
+
+    referencia = pydantic()
+    for nombre, funcion in casos.items():
+        if funcion() != referencia:
+            raise RuntimeError(f"{nombre} no produce la misma salida que Pydantic")
+    return casos
+
+
+async def listado_http(rondas: int) -> dict:
+    import httpx
+    import main as app_module
+    from config import settings
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        r = await client.post("/api/auth/login", json={
+            "username": os.environ["ADMIN_USERNAME"],
+            "password": os.environ["ADMIN_PASSWORD"],
+            "secret_code": os.environ["ADMIN_SECRET_CODE"],
+        })
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        resultados = {}
+        for modo in (False, True):
+            settings.FAST_JSON = modo
+            await client.get("/api/admin/invitados", headers=headers)  # calentamiento
+            mejor, filas = float("inf"), 0
+            for _ in range(rondas):
+                t0 = time.perf_counter()
+                r = await client.get("/api/admin/invitados", headers=headers)
+                mejor = min(mejor, time.perf_counter() - t0)
+                filas = int(r.headers["X-Total-Count"])
+            resultados["FAST_JSON=" + ("true" if modo else "false")] = (filas, mejor)
+        return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invitados", type=int, default=5000)
+    parser.add_argument("--rondas", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar_entorno(os.path.join(tmp, "bench.db"))
+        sembrar(args.invitados)
+
+        from sqlalchemy import select
+
+        import serializacion
+        from database import SessionLocal
+        from models import Invitado
+
+        with SessionLocal() as db:
+            invitados = db.query(Invitado).order_by(Invitado.id).all()
+            filas = db.execute(select(*serializacion.COLUMNAS_FILA).order_by(Invitado.id)).all()
+        n = len(invitados)
+
+        print(f"Serialización de {n} invitados (mejor de {args.rondas} rondas)")
+        print(f"{'caso':16} {'ms':>9} {'filas/s':>12} {'vs pydantic':>12}")
+        base = None
+        for nombre, funcion in serializadores(invitados, filas).items():
+            segundos = mejor_tiempo(funcion, args.rondas)
+            base = base or segundos
+            print(f"{nombre:16} {segundos * 1000:>9.1f} {n / segundos:>12,.0f} {base / segundos:>11.1f}x")
+
+        print(f"\nGET /api/admin/invitados completo ({n} filas, incluye la consulta)")
+        print(f"{'modo':16} {'ms':>9} {'filas/s':>12}")
+        for nombre, (filas, segundos) in asyncio.run(listado_http(args.rondas)).items():
+            print(f"{nombre:16} {segundos * 1000:>9.1f} {filas / segundos:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
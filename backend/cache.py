@@ -0,0 +1,80 @@
+"""
+Caché en memoria acotada (LRU) con expiración por tiempo
+
+Uso compartido por la autenticación y las lecturas públicas. Es por
+proceso y segura entre hilos; cada instancia lleva sus contadores de
+aciertos y fallos para exponerlos en /api/admin/caches.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_registro: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    def __init__(self, nombre: str, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.nombre = nombre
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._datos: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _registro[nombre] = self
+
+    @property
+    def activa(self) -> bool:
+        return self.maxsize > 0 and (self.ttl is None or self.ttl > 0)
+
+    def get(self, clave: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                valor, vence = entrada
+                if vence is None or vence > time.monotonic():
+                    self._datos.move_to_end(clave)
+                    self.hits += 1
+                    return valor
+                del self._datos[clave]
+            self.misses += 1
+            return default
+
+    def set(self, clave: Hashable, valor: Any, ttl: Optional[float] = None):
+        if not self.activa:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        vence = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._datos[clave] = (valor, vence)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def pop(self, clave: Hashable):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._datos),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def estadisticas_caches() -> dict:
+    """Tamaño y tasa de aciertos de todas las cachés registradas"""
+    return {nombre: c.stats() for nombre, c in _registro.items()}
@@ -0,0 +1,128 @@
+"""
+Caché de lectura de invitados para los endpoints públicos
+
+Guarda el JSON ya serializado de cada invitado bajo su uuid y su código
+(en mayúsculas), y el cuerpo completo de /api/datos-completos (por uuid o
+por código) junto con el ETag del evento con que se armó. Solo se guardan
+invitados existentes.
+Todo handler que modifica un invitado debe llamar a invalidar_invitado();
+con varios workers la invalidación se publica a los demás (ver
+coherencia.py), que la aplican antes de su siguiente lectura. Entre
+servidores distintos INVITADOS_CACHE_TTL acota el desfase.
+"""
+import json
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import coherencia
+import serializacion
+from cache import TTLCache
+from config import settings
+from evento_cache import EventoSnapshot
+from models import Invitado
+
+invitados_json = TTLCache(
+    "invitados_json", maxsize=settings.INVITADOS_CACHE_SIZE, ttl=settings.INVITADOS_CACHE_TTL
+)
+
+
+def _clave_codigo(codigo: str) -> tuple:
+    return ("codigo", codigo.upper())
+
+
+def por_uuid(uuid_invitado: str) -> Optional[bytes]:
+    return invitados_json.get(("uuid", uuid_invitado))
+
+
+def por_codigo(codigo: str) -> Optional[bytes]:
+    return invitados_json.get(_clave_codigo(codigo))
+
+
+def guardar(invitado: Invitado) -> bytes:
+    """Serializa el invitado y lo deja disponible por uuid y por código"""
+    cuerpo = serializacion.invitado_json(invitado)
+    invitados_json.set(("uuid", invitado.uuid), cuerpo)
+    if invitado.codigo:
+        invitados_json.set(_clave_codigo(invitado.codigo), cuerpo)
+    return cuerpo
+
+
+async def leer_por_uuid(db: AsyncSession, uuid_invitado: str) -> Optional[bytes]:
+    """JSON del invitado desde la caché o la base de datos (None si no existe)"""
+    coherencia.sincronizar()
+    cuerpo = por_uuid(uuid_invitado)
+    if cuerpo is None:
+        invitado = await db.scalar(select(Invitado).where(Invitado.uuid == uuid_invitado))
+        if invitado is not None:
+            cuerpo = guardar(invitado)
+    return cuerpo
+
+
+async def leer_por_codigo(db: AsyncSession, codigo: str) -> Optional[bytes]:
+    coherencia.sincronizar()
+    cuerpo = por_codigo(codigo)
+    if cuerpo is None:
+        invitado = await db.scalar(select(Invitado).where(Invitado.codigo == codigo.upper()))
+        if invitado is not None:
+            cuerpo = guardar(invitado)
+    return cuerpo
+
+
+def _datos_completos(clave: tuple, cuerpo_invitado: bytes, evento: EventoSnapshot) -> bytes:
+    """Cuerpo de /api/datos-completos; se rearma si cambió el evento"""
+    previo = invitados_json.get(clave)
+    if previo is not None and previo[0] == evento.etag:
+        return previo[1]
+    padres = json.dumps(evento.data.get("padres", {}), ensure_ascii=False, separators=(",", ":"))
+    cuerpo = (
+        b'{"evento":' + evento.body
+        + b',"invitados":[' + cuerpo_invitado
+        + b'],"padres":' + padres.encode("utf-8") + b"}"
+    )
+    invitados_json.set(clave, (evento.etag, cuerpo))
+    return cuerpo
+
+
+def datos_por_uuid(uuid_invitado: str, cuerpo_invitado: bytes, evento: EventoSnapshot) -> bytes:
+    return _datos_completos(("datos", uuid_invitado), cuerpo_invitado, evento)
+
+
+def datos_por_codigo(codigo: str, cuerpo_invitado: bytes, evento: EventoSnapshot) -> bytes:
+    return _datos_completos(("datos_codigo", codigo.upper()), cuerpo_invitado, evento)
+
+
+def _quitar(uuid_invitado: Optional[str], *codigos: Optional[str]):
+    if uuid_invitado:
+        invitados_json.pop(("uuid", uuid_invitado))
+        invitados_json.pop(("datos", uuid_invitado))
+    for codigo in codigos:
+        if codigo:
+            invitados_json.pop(_clave_codigo(codigo))
+            invitados_json.pop(("datos_codigo", codigo.upper()))
+
+
+def invalidar_invitado(uuid_invitado: Optional[str], *codigos: Optional[str]):
+    """Quita las entradas de un invitado (pasar el código anterior y el nuevo si cambió)"""
+    _quitar(uuid_invitado, *codigos)
+    coherencia.publicar("invitado", uuid_invitado or "", *(c for c in codigos if c))
+
+
+def _quitar_pares(*claves: str):
+    for i in range(0, len(claves) - 1, 2):
+        _quitar(claves[i], claves[i + 1])
+
+
+def invalidar_invitados(invitados: Iterable[Tuple[Optional[str], Optional[str]]]):
+    """invalidar_invitado() para muchos (uuid, código) con un solo aviso a los demás workers"""
+    claves = []
+    for uuid_invitado, codigo in invitados:
+        _quitar(uuid_invitado, codigo)
+        claves += [uuid_invitado or "", codigo or ""]
+    if claves:
+        coherencia.publicar("invitados", *claves)
+
+
+coherencia.suscribir("invitado", _quitar)
+coherencia.suscribir("invitados", _quitar_pares)
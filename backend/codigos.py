@@ -0,0 +1,97 @@
+"""
+Asignación de códigos legibles de invitado (PREFIJO-NNN)
+
+Los números salen de la tabla secuencias_codigo: reservar un bloque de N
+códigos es un único UPDATE atómico sobre la fila del prefijo, así dos altas
+simultáneas nunca reciben el mismo número y borrar el último invitado no
+hace que su código se reutilice.
+"""
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import Invitado, SecuenciaCodigo
+
+_secuencias = SecuenciaCodigo.__table__
+
+
+def formatear_codigo(prefijo: str, numero: int) -> str:
+    return f"{prefijo}-{str(numero).zfill(3)}"
+
+
+def _inicializar_secuencia(db: Session, prefijo: str):
+    """
+    Crea la fila del prefijo partiendo del mayor código existente.
+    Solo ocurre la primera vez que se usa un prefijo; si otro proceso la
+    crea al mismo tiempo, el INSERT se ignora.
+    """
+    maximo = 0
+    for codigo in db.execute(select(Invitado.codigo).where(Invitado.codigo.like(f"{prefijo}-%"))).scalars():
+        try:
+            maximo = max(maximo, int(codigo[len(prefijo) + 1:]))
+        except ValueError:
+            continue
+
+    dialecto = db.get_bind().dialect.name
+    valores = {"prefijo": prefijo, "ultimo": maximo}
+    if dialecto == "mysql":
+        stmt = mysql.insert(_secuencias).values(**valores).prefix_with("IGNORE")
+    elif dialecto == "postgresql":
+        stmt = postgresql.insert(_secuencias).values(**valores).on_conflict_do_nothing()
+    elif dialecto == "sqlite":
+        stmt = sqlite.insert(_secuencias).values(**valores).on_conflict_do_nothing()
+    else:
+        stmt = _secuencias.insert().values(**valores)
+    db.execute(stmt)
+
+
+def reservar_codigos(db: Session, prefijo: str, cantidad: int = 1) -> range:
+    """
+    Reserva `cantidad` números consecutivos para el prefijo y devuelve su rango.
+    La reserva forma parte de la transacción de `db`, que debe confirmarse
+    pronto: hasta el COMMIT la fila del prefijo bloquea a las demás altas.
+    """
+    if cantidad < 1:
+        return range(0)
+
+    dialecto = db.get_bind().dialect.name
+    filtro = _secuencias.c.prefijo == prefijo
+
+    for _ in range(2):
+        if dialecto == "mysql":
+            # MySQL no tiene UPDATE ... RETURNING: LAST_INSERT_ID(expr) deja el
+            # nuevo valor disponible para esta conexión sin otra lectura de la tabla
+            resultado = db.execute(
+                update(_secuencias).where(filtro)
+                .values(ultimo=func.last_insert_id(_secuencias.c.ultimo + cantidad))
+            )
+            ultimo = db.execute(select(func.last_insert_id())).scalar() if resultado.rowcount else None
+        else:
+            ultimo = db.execute(
+                update(_secuencias).where(filtro)
+                .values(ultimo=_secuencias.c.ultimo + cantidad)
+                .returning(_secuencias.c.ultimo)
+            ).scalar()
+
+        if ultimo is not None:
+            return range(ultimo - cantidad + 1, ultimo + 1)
+        _inicializar_secuencia(db, prefijo)
+
+    raise RuntimeError(f"No se pudo reservar códigos para el prefijo {prefijo}")
+
+
+def asignar_codigos(db: Session, prefijo: str, cantidad: int, ocupados=()) -> list:
+    """
+    Devuelve `cantidad` códigos libres. Los números reservados que coinciden
+    con un código ya cargado a mano se descartan y se reservan de nuevo.
+    """
+    ocupados = set(ocupados)
+    codigos = []
+    while len(codigos) < cantidad:
+        propuestos = [
+            formatear_codigo(prefijo, n)
+            for n in reservar_codigos(db, prefijo, cantidad - len(codigos))
+        ]
+        existentes = set(db.execute(select(Invitado.codigo).where(Invitado.codigo.in_(propuestos))).scalars())
+        codigos.extend(c for c in propuestos if c not in existentes and c not in ocupados)
+    return codigos
@@ -0,0 +1,135 @@
+"""
+Coherencia de cachés entre workers del mismo servidor
+
+Con WEB_CONCURRENCY > 1 cada worker de uvicorn tiene sus propias cachés en
+memoria. Cuando uno modifica datos, publica la invalidación en un diario
+compartido (un archivo de solo agregado en disco, INVALIDATION_FILE) y los
+demás la aplican la próxima vez que leen una caché:
+
+- el tamaño del diario es el contador de versión compartido: comprobar si
+  hay novedades cuesta un os.stat(), y solo se lee lo agregado desde la
+  última vez
+- cada línea es un JSON {"pid", "canal", "claves"}; cada módulo con caché
+  se suscribe a su canal y quita esas claves de su copia local; el canal
+  "panel" lleva además los eventos en vivo del panel (notificaciones.py)
+- cuando el diario supera MAX_BYTES, quien publica lo reemplaza por uno
+  vacío (bajo un flock); los lectores terminan de leer el anterior por el
+  descriptor que ya tenían abierto, así que no se pierde ningún aviso
+
+evento.json no pasa por aquí: se escribe de forma atómica y cada worker
+detecta el archivo nuevo por su inode/mtime (ver evento_cache.py). Solo
+sirve entre procesos que comparten disco; entre varios servidores sigue
+valiendo el TTL de cada caché.
+"""
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo ni rotación (desarrollo con un solo worker)
+    fcntl = None
+
+from config import settings
+
+MAX_BYTES = 1024 * 1024
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_DIARIO = settings.INVALIDATION_FILE or os.path.join(PROJECT_ROOT, "cache", "invalidaciones.log")
+
+_suscriptores: Dict[str, List[Callable[..., None]]] = {}
+
+
+def suscribir(canal: str, funcion: Callable[..., None]):
+    """funcion(*claves) se llama por cada invalidación publicada por otro worker en `canal`"""
+    _suscriptores.setdefault(canal, []).append(funcion)
+
+
+class Diario:
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._archivo = None
+        self._inode: Optional[int] = None
+        self._pendiente = b""
+
+    def _abrir(self, desde_el_final: bool):
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        with open(self.ruta, "ab"):
+            pass
+        self._archivo = open(self.ruta, "rb")
+        self._inode = os.fstat(self._archivo.fileno()).st_ino
+        self._pendiente = b""
+        if desde_el_final:
+            self._archivo.seek(0, os.SEEK_END)
+
+    def publicar(self, canal: str, *claves: str):
+        linea = json.dumps({"pid": os.getpid(), "canal": canal, "claves": list(claves)}, ensure_ascii=False)
+        datos = (linea + "\n").encode("utf-8")
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        with open(self.ruta + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if fcntl is not None and os.path.exists(self.ruta) and os.path.getsize(self.ruta) > MAX_BYTES:
+                    temporal = self.ruta + ".nuevo"
+                    open(temporal, "wb").close()
+                    os.replace(temporal, self.ruta)
+                # O_APPEND: cada línea llega entera al final aunque escriban varios procesos
+                fd = os.open(self.ruta, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, datos)
+                finally:
+                    os.close(fd)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def sincronizar(self):
+        """Aplica las invalidaciones nuevas de otros workers (un stat si no hay ninguna)"""
+        try:
+            st = os.stat(self.ruta)
+        except FileNotFoundError:
+            st = None
+        with self._lock:
+            if self._archivo is None:
+                self._abrir(desde_el_final=True)
+                return
+            rotado = st is None or st.st_ino != self._inode
+            if not rotado and st.st_size == self._archivo.tell():
+                return
+            self._procesar(self._archivo.read())
+            if rotado:
+                self._archivo.close()
+                self._abrir(desde_el_final=False)
+                self._procesar(self._archivo.read())
+
+    def _procesar(self, nuevos: bytes):
+        datos = self._pendiente + nuevos
+        fin = datos.rfind(b"\n") + 1
+        # Una línea a medio escribir se completa en la próxima lectura
+        self._pendiente = datos[fin:]
+        propio = os.getpid()
+        for linea in datos[:fin].splitlines():
+            try:
+                aviso = json.loads(linea)
+            except ValueError:
+                continue
+            if aviso.get("pid") == propio:
+                continue
+            for funcion in _suscriptores.get(aviso.get("canal"), ()):
+                funcion(*aviso.get("claves", ()))
+
+
+diario = Diario(RUTA_DIARIO) if settings.WEB_CONCURRENCY > 1 else None
+
+
+def publicar(canal: str, *claves: str):
+    if diario is not None:
+        diario.publicar(canal, *claves)
+
+
+def sincronizar():
+    if diario is not None:
+        diario.sincronizar()
@@ -15,10 +15,35 @@ class Settings(BaseSettings):
             return url.replace("mysql://", "mysql+pymysql://", 1)
         return url
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        """URL con el driver asíncrono equivalente (aiomysql, asyncpg o aiosqlite)"""
+        url = self.SQLALCHEMY_DATABASE_URL
+        for prefijo, async_prefijo in (
+            ("mysql+pymysql://", "mysql+aiomysql://"),
+            ("mysql://", "mysql+aiomysql://"),
+            ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+            ("postgresql://", "postgresql+asyncpg://"),
+            ("sqlite+pysqlite://", "sqlite+aiosqlite://"),
+            ("sqlite://", "sqlite+aiosqlite://"),
+        ):
+            if url.startswith(prefijo):
+                return url.replace(prefijo, async_prefijo, 1)
+        return url
+
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+    # Segundos que se reutiliza un usuario ya validado (0 = consultar siempre)
+    AUTH_CACHE_TTL: int = 60
+    # Vigencia del token que abre /api/admin/eventos (va en la URL: debe ser corta)
+    EVENTS_TOKEN_SECONDS: int = 60
+    
+    # Costo de bcrypt (los hashes existentes se regeneran en el siguiente login)
+    BCRYPT_ROUNDS: int = 12
+    # Hilos dedicados a bcrypt (limita la CPU que pueden consumir los logins)
+    BCRYPT_THREADS: int = 2
     
     # Admin
     ADMIN_USERNAME: str
@@ -27,6 +52,59 @@ class Settings(BaseSettings):
     
     # Base URL para meta tags (opcional, se usa request.base_url si no está configurado)
     BASE_URL: Optional[str] = None
+
+    # Prefijo por defecto de los códigos de invitado (evento.json puede definir "prefijo_codigo")
+    CODIGO_PREFIX: str = "FM2026"
+
+    # Mantener la tabla contadores_invitados para que las estadísticas sean O(1)
+    STATS_COUNTERS: bool = False
+
+    # Importación masiva: filas por cada INSERT (executemany)
+    IMPORT_BATCH_SIZE: int = 1000
+
+    # Segundos que se recuerda la respuesta de un RSVP con cabecera Idempotency-Key
+    RSVP_IDEMPOTENCY_TTL: int = 600
+
+    # Caché de lectura de invitados (uuid/código): entradas y segundos de vida (0 = desactivada)
+    INVITADOS_CACHE_SIZE: int = 2048
+    INVITADOS_CACHE_TTL: int = 60
+
+    # Imágenes Open Graph por invitado: fuente TTF (por defecto la de Pillow) y directorio de caché
+    OG_FONT_PATH: Optional[str] = None
+    OG_CACHE_DIR: Optional[str] = None
+
+    # Códigos QR de los links personales: procesos para dibujarlos y directorio de caché
+    QR_WORKERS: int = 2
+    QR_CACHE_DIR: Optional[str] = None
+
+    # Métricas Prometheus en /metrics; sin METRICS_TOKEN (Bearer) la ruta responde 404
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: Optional[str] = None
+
+    # Perfilado de SQL: registra consultas de más de SQL_SLOW_MS y las peticiones que
+    # repiten una misma sentencia más de SQL_REPEAT_THRESHOLD veces (N+1)
+    SQL_PROFILE: bool = False
+    SQL_SLOW_MS: float = 100.0
+    SQL_REPEAT_THRESHOLD: int = 5
+    # Con SQL_PROFILE, registrar también el plan (EXPLAIN) de las consultas lentas
+    SQL_EXPLAIN: bool = False
+
+    # SQLite en producción: WAL, busy_timeout, synchronous=NORMAL, caché y mmap
+    SQLITE_TUNING: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_KB: int = 20000
+    SQLITE_MMAP_SIZE: int = 268435456
+    # SQLite: escrituras (RSVP y panel) serializadas en una cola y confirmadas por lotes
+    SQLITE_WRITE_QUEUE: bool = True
+    SQLITE_WRITE_BATCH: int = 64
+
+    # Workers de uvicorn (Procfile); con más de uno las invalidaciones de caché se
+    # comparten por un diario en disco (por defecto cache/invalidaciones.log)
+    WEB_CONCURRENCY: int = 1
+    INVALIDATION_FILE: Optional[str] = None
+
+    # Respuestas de invitados serializadas con orjson sin revalidar con Pydantic
+    FAST_JSON: bool = False
     
     class Config:
         env_file = ".env"
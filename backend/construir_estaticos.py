@@ -0,0 +1,271 @@
+"""
+Build de archivos estáticos para producción
+Ejecutar: python construir_estaticos.py [--anchos 480,960,1440] [--workers N]
+
+Genera dist/ con:
+- copias de front/ y elementos/ con hash de contenido en el nombre
+- para cada imagen: anchos reducidos y variantes WebP/AVIF (solo si pesan menos)
+- style.css con las url() apuntando a las imágenes versionadas
+- .br/.gz de CSS, JS y SVG
+- manifest.json, que leen las plantillas y la ruta /static (ver estaticos.py)
+
+Los archivos del build anterior se conservan (y siguen en el manifest) durante
+una generación más, para que las páginas y el CSS que ya tienen los clientes no
+den 404 tras un deploy. El build siguiente los borra.
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, features
+
+from estaticos import DIST_DIR, MANIFEST_PATH, PROJECT_ROOT, URL_PREFIX
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ORIGENES = ("elementos", "front")
+EXTENSIONES_IMAGEN = {".png", ".jpg", ".jpeg"}
+EXTENSIONES_TEXTO = {".css", ".js", ".svg"}
+IGNORAR = {".html", ".md"}
+ANCHOS_POR_DEFECTO = (480, 960, 1440)
+
+CALIDAD_WEBP = 80
+CALIDAD_AVIF = 55
+MAX_PROPORCION_REDUCIDA = 0.8
+
+# AVIF requiere Pillow >= 11.2 compilado con libavif; si no está se omite
+FORMATOS_MODERNOS = tuple(
+    (formato, ext) for formato, ext in (("AVIF", ".avif"), ("WEBP", ".webp"))
+    if features.check(formato.lower())
+)
+
+_URL_CSS = re.compile(r"""url\(\s*(['"]?)(/[^'")]+)\1\s*\)""")
+
+
+def _hash(datos: bytes) -> str:
+    return hashlib.sha256(datos).hexdigest()[:10]
+
+
+def _nombre(ruta: str, h: str, sufijo: str = "", ext: str = None) -> str:
+    base, ext_original = os.path.splitext(ruta)
+    return f"{base}.{h}{sufijo}{ext or ext_original}"
+
+
+def _escribir(relativa: str, datos: bytes):
+    destino = os.path.join(DIST_DIR, relativa)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    with open(destino, "wb") as f:
+        f.write(datos)
+
+
+def _tipo(ruta: str) -> str:
+    tipo = mimetypes.guess_type(ruta)[0] or "application/octet-stream"
+    if tipo.startswith("text/") or tipo in ("application/javascript", "image/svg+xml"):
+        tipo += "; charset=utf-8"
+    return tipo
+
+
+def _codificar(imagen: Image.Image, formato: str, paleta: bool = False) -> bytes:
+    salida = io.BytesIO()
+    if formato == "PNG":
+        if paleta:
+            # Conserva el modo indexado del original; en RGBA pesaría varias veces más
+            imagen = imagen.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        imagen.save(salida, "PNG", optimize=True)
+    elif formato == "JPEG":
+        imagen.convert("RGB").save(salida, "JPEG", quality=85, optimize=True, progressive=True)
+    elif formato == "WEBP":
+        imagen.save(salida, "WEBP", quality=CALIDAD_WEBP, method=6)
+    else:
+        imagen.save(salida, "AVIF", quality=CALIDAD_AVIF)
+    return salida.getvalue()
+
+
+def procesar_imagen(ruta: str, anchos) -> dict:
+    """
+    Se ejecuta en un proceso aparte. Devuelve los archivos a escribir y las
+    entradas del manifest de una imagen.
+    """
+    with open(os.path.join(PROJECT_ROOT, ruta), "rb") as f:
+        original = f.read()
+    h = _hash(original)
+    imagen = Image.open(io.BytesIO(original))
+    formato = "JPEG" if imagen.format == "JPEG" else "PNG"
+    tipo = Image.MIME[formato]
+    paleta = imagen.mode == "P"
+    imagen = imagen.convert("RGBA" if formato == "PNG" else "RGB")
+    ancho_original, alto_original = imagen.size
+
+    archivos = {}
+    entradas = {}
+    srcset = []
+    # Un ancho casi igual al original no ahorra nada
+    reducidos = {a for a in anchos if a <= ancho_original * MAX_PROPORCION_REDUCIDA}
+    for ancho in sorted(reducidos | {ancho_original}):
+        if ancho == ancho_original:
+            variante, base, sufijo = imagen, original, ""
+        else:
+            alto = max(1, round(alto_original * ancho / ancho_original))
+            variante = imagen.resize((ancho, alto), Image.LANCZOS)
+            base, sufijo = _codificar(variante, formato, paleta), f".w{ancho}"
+        nombre = _nombre(ruta, h, sufijo)
+        archivos[nombre] = base
+        alternativas = {}
+        for formato_alt, ext in FORMATOS_MODERNOS:
+            datos = _codificar(variante, formato_alt)
+            if len(datos) < len(base):
+                nombre_alt = _nombre(ruta, h, sufijo, ext)
+                archivos[nombre_alt] = datos
+                alternativas[Image.MIME[formato_alt]] = nombre_alt
+        entradas[nombre] = {"type": tipo}
+        if alternativas:
+            entradas[nombre]["alternates"] = alternativas
+        srcset.append([ancho, nombre])
+
+    return {
+        "ruta": ruta,
+        "url": _nombre(ruta, h),
+        "archivos": archivos,
+        "entradas": entradas,
+        "srcset": srcset if len(srcset) > 1 else None,
+    }
+
+
+def _comprimir(nombre: str, datos: bytes, archivos: dict) -> dict:
+    codificaciones = {}
+    variantes = [("gzip", ".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variantes.insert(0, ("br", ".br", lambda d: brotli.compress(d, quality=11)))
+    for codificacion, ext, comprimir in variantes:
+        comprimido = comprimir(datos)
+        if len(comprimido) < len(datos):
+            archivos[nombre + ext] = comprimido
+            codificaciones[codificacion] = nombre + ext
+    return codificaciones
+
+
+def _listar():
+    for origen in ORIGENES:
+        for raiz, _, nombres in os.walk(os.path.join(PROJECT_ROOT, origen)):
+            for nombre in sorted(nombres):
+                ruta = os.path.relpath(os.path.join(raiz, nombre), PROJECT_ROOT).replace(os.sep, "/")
+                if os.path.splitext(nombre)[1].lower() not in IGNORAR:
+                    yield ruta
+
+
+def _limpiar(vigentes: set):
+    """Borra de dist/ lo que no pertenece al build actual"""
+    for raiz, _, nombres in os.walk(DIST_DIR, topdown=False):
+        for nombre in nombres:
+            ruta = os.path.join(raiz, nombre)
+            if os.path.relpath(ruta, DIST_DIR).replace(os.sep, "/") not in vigentes:
+                os.remove(ruta)
+        if raiz != DIST_DIR and not os.listdir(raiz):
+            os.rmdir(raiz)
+
+
+def _generacion_anterior() -> dict:
+    """Entradas propias del manifest actual (sin las que ya heredó del anterior)"""
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            anterior = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    heredadas = set(anterior.get("anteriores", ()))
+    return {nombre: entrada for nombre, entrada in anterior.get("archivos", {}).items()
+            if nombre not in heredadas}
+
+
+def _referenciados(nombre: str, entrada: dict) -> set:
+    """Archivos de dist/ que necesita una entrada del manifest"""
+    return ({nombre} | set(entrada.get("alternates", {}).values())
+            | set(entrada.get("encodings", {}).values()))
+
+
+def construir(anchos=ANCHOS_POR_DEFECTO, workers=None) -> dict:
+    inicio = time.perf_counter()
+    rutas = list(_listar())
+    imagenes = [r for r in rutas if os.path.splitext(r)[1].lower() in EXTENSIONES_IMAGEN]
+    otros = [r for r in rutas if r not in imagenes]
+
+    manifest = {"version": 1, "assets": {}, "srcset": {}, "archivos": {}}
+    archivos = {}
+
+    # Las imágenes primero: el CSS necesita sus URLs versionadas
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for resultado in pool.map(procesar_imagen, imagenes, [anchos] * len(imagenes)):
+            manifest["assets"][resultado["ruta"]] = resultado["url"]
+            manifest["archivos"].update(resultado["entradas"])
+            archivos.update(resultado["archivos"])
+            if resultado["srcset"]:
+                manifest["srcset"][resultado["ruta"]] = resultado["srcset"]
+            print(f"✓ {resultado['ruta']}: {len(resultado['archivos'])} archivos")
+
+    # CSS al final para poder reescribir sus url()
+    otros.sort(key=lambda r: r.endswith(".css"))
+    for ruta in otros:
+        with open(os.path.join(PROJECT_ROOT, ruta), "rb") as f:
+            datos = f.read()
+        ext = os.path.splitext(ruta)[1].lower()
+        if ext == ".css":
+            def reemplazar(m):
+                construido = manifest["assets"].get(m.group(2).lstrip("/"))
+                return f"url('{URL_PREFIX}{construido}')" if construido else m.group(0)
+            datos = _URL_CSS.sub(reemplazar, datos.decode("utf-8")).encode("utf-8")
+        nombre = _nombre(ruta, _hash(datos))
+        archivos[nombre] = datos
+        entrada = {"type": _tipo(ruta)}
+        if ext in EXTENSIONES_TEXTO:
+            codificaciones = _comprimir(nombre, datos, archivos)
+            if codificaciones:
+                entrada["encodings"] = codificaciones
+        manifest["assets"][ruta] = nombre
+        manifest["archivos"][nombre] = entrada
+
+    # El build anterior sigue en el manifest una generación más: las páginas y
+    # el CSS que ya tienen los clientes apuntan a sus nombres con hash
+    vigentes = set(archivos) | {os.path.basename(MANIFEST_PATH)}
+    anteriores = {}
+    for nombre, entrada in _generacion_anterior().items():
+        necesarios = _referenciados(nombre, entrada)
+        if nombre in manifest["archivos"] or not all(
+                n in archivos or os.path.exists(os.path.join(DIST_DIR, n)) for n in necesarios):
+            continue
+        anteriores[nombre] = entrada
+        vigentes |= necesarios
+    manifest["archivos"].update(anteriores)
+    manifest["anteriores"] = sorted(anteriores)
+
+    # Los nombres nuevos no pisan a los viejos: un servidor en marcha sigue
+    # sirviendo el build anterior hasta que se reemplaza el manifest
+    for nombre, datos in archivos.items():
+        _escribir(nombre, datos)
+    temporal = MANIFEST_PATH + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temporal, MANIFEST_PATH)
+    _limpiar(vigentes)
+
+    total_origen = sum(os.path.getsize(os.path.join(PROJECT_ROOT, r)) for r in rutas)
+    print(f"✓ {len(archivos)} archivos en {os.path.relpath(DIST_DIR, PROJECT_ROOT)}/ "
+          f"({total_origen / 1024:.0f} KB de origen) en {time.perf_counter() - inicio:.1f}s")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera dist/ con los estáticos versionados")
+    parser.add_argument("--anchos", default=",".join(map(str, ANCHOS_POR_DEFECTO)),
+                        help="anchos de srcset separados por coma")
+    parser.add_argument("--workers", type=int, default=None, help="procesos para codificar imágenes")
+    args = parser.parse_args()
+    construir(tuple(int(a) for a in args.anchos.split(",") if a), args.workers)
@@ -1,7 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
+import metricas
+import perfilado_sql
 
 # Crear engine de SQLAlchemy
 engine = create_engine(
@@ -11,9 +14,121 @@ engine = create_engine(
     echo=False
 )
 
+ES_SQLITE = engine.dialect.name == "sqlite"
+# Con SQLite en archivo las escrituras van por un engine propio de una sola conexión
+SQLITE_EN_ARCHIVO = ES_SQLITE and engine.url.database not in (None, "", ":memory:")
+
+
+def configurar_sqlite(engine, begin: str = None):
+    """
+    Pragmas de producción en cada conexión nueva: WAL (los lectores no bloquean
+    al escritor ni viceversa), espera ante bloqueos en vez de fallar con
+    "database is locked", fsync solo en checkpoints (seguro con WAL) y caché
+    y mmap más grandes. Con `begin` ver transacciones_explicitas().
+    """
+    if begin:
+        transacciones_explicitas(engine, begin)
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        if SQLITE_EN_ARCHIVO:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+def transacciones_explicitas(engine, begin: str = "BEGIN"):
+    """
+    El driver deja de abrir transacciones por su cuenta y se emite `begin`
+    (p.ej. BEGIN IMMEDIATE) al empezar cada una. Sin esto pysqlite/aiosqlite
+    confirman por separado lo hecho dentro de cada SAVEPOINT.
+    """
+    @event.listens_for(engine, "connect")
+    def _sin_autocommit(dbapi_connection, _record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql(begin)
+
+
+if ES_SQLITE and settings.SQLITE_TUNING:
+    configurar_sqlite(engine)
+if settings.METRICS_ENABLED:
+    metricas.instrumentar_engine(engine, "sync")
+if settings.SQL_PROFILE:
+    perfilado_sql.instrumentar_engine(engine)
+
 # Crear SessionLocal
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine asíncrono (se crea al primer uso para no exigir el driver
+# a scripts como init_db.py que solo usan el engine síncrono)
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            echo=False
+        )
+        if ES_SQLITE and settings.SQLITE_TUNING:
+            configurar_sqlite(_async_engine.sync_engine)
+        if settings.METRICS_ENABLED:
+            metricas.instrumentar_engine(_async_engine.sync_engine, "async")
+        if settings.SQL_PROFILE:
+            perfilado_sql.instrumentar_engine(_async_engine.sync_engine)
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+_escritura_engine = None
+_EscrituraSessionLocal = None
+
+
+def sesion_escritura() -> AsyncSession:
+    """
+    Sesión para la cola de escrituras (ver escritura.py). Con SQLite en archivo
+    usa un engine de una sola conexión que abre con BEGIN IMMEDIATE: el bloqueo
+    de escritura se toma al empezar y nunca hay que "subir" una lectura a
+    escritura, que es lo que falla con "database is locked"
+    """
+    global _escritura_engine, _EscrituraSessionLocal
+    if not SQLITE_EN_ARCHIVO:
+        return async_session()
+    if _escritura_engine is None:
+        _escritura_engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL,
+            pool_size=1,
+            max_overflow=0,
+            echo=False
+        )
+        if settings.SQLITE_TUNING:
+            configurar_sqlite(_escritura_engine.sync_engine, begin="BEGIN IMMEDIATE")
+        else:
+            # Sin los pragmas, pero los SAVEPOINT de la cola siguen necesitando esto
+            transacciones_explicitas(_escritura_engine.sync_engine, "BEGIN IMMEDIATE")
+        if settings.METRICS_ENABLED:
+            metricas.instrumentar_engine(_escritura_engine.sync_engine, "escritura")
+        if settings.SQL_PROFILE:
+            perfilado_sql.instrumentar_engine(_escritura_engine.sync_engine)
+        _EscrituraSessionLocal = async_sessionmaker(
+            _escritura_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _EscrituraSessionLocal()
+
 # Base para los modelos
 Base = declarative_base()
 
@@ -26,3 +141,14 @@ def get_db():
     finally:
         db.close()
 
+
+def async_session() -> AsyncSession:
+    """Sesión asíncrona independiente (p.ej. para respuestas en streaming)"""
+    get_async_engine()
+    return _AsyncSessionLocal()
+
+
+# Dependency para obtener una sesión asíncrona (no bloquea el event loop)
+async def get_async_db():
+    async with async_session() as db:
+        yield db
@@ -0,0 +1,179 @@
+"""
+Cola de escrituras de un solo escritor (SQLite)
+
+SQLite admite un único escritor a la vez; con varias conexiones escribiendo
+en paralelo (RSVP en ráfaga, el panel guardando cambios) aparecen esperas y
+errores "database is locked". Con SQLITE_WRITE_QUEUE los handlers no
+escriben por su cuenta: entregan un trabajo `async def trabajo(db)` a
+ejecutar() y esperan su resultado. Una sola tarea toma los trabajos en
+cola, corre cada uno en un SAVEPOINT (si uno falla, solo se deshace el
+suyo) y confirma el lote completo con un único COMMIT, así una ráfaga de
+RSVP paga un fsync cada varios trabajos y los lectores (WAL) no esperan.
+
+ejecutar() vuelve después del COMMIT: el handler puede invalidar cachés y
+notificar con la certeza de que el cambio está guardado. Con otra base de
+datos, o con la cola desactivada, cada trabajo corre en su propia
+transacción y ejecutar() se comporta igual.
+"""
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SQLITE_EN_ARCHIVO, sesion_escritura
+
+T = TypeVar("T")
+Trabajo = Callable[[AsyncSession], Awaitable[T]]
+
+
+class ColaEscritura:
+    def __init__(self, max_lote: int):
+        self.max_lote = max(1, max_lote)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cola: Optional[asyncio.Queue] = None
+        self._tarea: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.lotes = 0
+        self.trabajos = 0
+
+    def _preparar(self):
+        # La cola vive en el event loop que la usa (uno por proceso con uvicorn)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._cola = asyncio.Queue()
+            self._lock = asyncio.Lock()
+            self._arrancar()
+        elif self._tarea.done():
+            self._arrancar()
+
+    def _arrancar(self):
+        # Contexto vacío: el bucle no hereda las variables de la petición que lo arrancó
+        self._tarea = self._loop.create_task(self._bucle(), context=contextvars.Context())
+        self._tarea.add_done_callback(self._al_terminar)
+
+    def _al_terminar(self, tarea: asyncio.Task):
+        # Si el bucle muere por un error inesperado los trabajos en cola esperarían
+        # para siempre: se arranca otro. Cancelado es el apagado del servidor (y si
+        # no, _preparar() lo arranca con el próximo trabajo)
+        if tarea.cancelled() or tarea is not self._tarea or self._loop.is_closed():
+            return
+        tarea.exception()
+        self._arrancar()
+
+    async def ejecutar(self, trabajo: Trabajo) -> T:
+        self._preparar()
+        futuro = self._loop.create_future()
+        # El trabajo corre con el contexto de quien lo encoló: métricas y perfilado
+        # de SQL atribuyen sus consultas a esa petición
+        self._cola.put_nowait((trabajo, futuro, contextvars.copy_context()))
+        return await futuro
+
+    @asynccontextmanager
+    async def exclusivo(self):
+        """Detiene la cola mientras otra transacción larga escribe (p.ej. una importación)"""
+        self._preparar()
+        async with self._lock:
+            yield
+
+    async def _bucle(self):
+        while True:
+            lote = [await self._cola.get()]
+            while len(lote) < self.max_lote and not self._cola.empty():
+                lote.append(self._cola.get_nowait())
+            async with self._lock:
+                await self._procesar(lote)
+
+    async def _procesar(self, lote):
+        resultados = []
+        try:
+            try:
+                async with sesion_escritura() as db:
+                    for trabajo, futuro, contexto in lote:
+                        try:
+                            resultado = await self._loop.create_task(
+                                self._en_savepoint(db, trabajo), context=contexto
+                            )
+                            resultados.append((futuro, resultado, None))
+                        except BaseException as exc:
+                            # Un trabajo cancelado (o que lanza BaseException) solo
+                            # afecta a su SAVEPOINT; si se cancela el bucle, se propaga
+                            if _cancelando():
+                                raise
+                            resultados.append((futuro, None, exc))
+                        # Cada trabajo ve la base como si tuviera su propia sesión: sin
+                        # objetos que otro trabajo del lote dejó en el identity map
+                        db.expunge_all()
+                    await db.commit()
+            except Exception as exc:
+                # Falló el COMMIT (o la conexión): ningún trabajo del lote quedó guardado
+                resultados = [(futuro, None, exc) for _, futuro, _ in lote]
+        except BaseException as exc:
+            resultados = [(futuro, None, exc) for _, futuro, _ in lote]
+            raise
+        finally:
+            # Todos los futuros del lote se resuelven, pase lo que pase con el bucle
+            self.lotes += 1
+            self.trabajos += len(lote)
+            for futuro, resultado, error in resultados:
+                if futuro.done():  # el cliente se desconectó
+                    continue
+                if isinstance(error, asyncio.CancelledError):
+                    futuro.cancel()
+                elif error is not None:
+                    futuro.set_exception(error)
+                else:
+                    futuro.set_result(resultado)
+
+    @staticmethod
+    async def _en_savepoint(db: AsyncSession, trabajo: Trabajo) -> T:
+        async with db.begin_nested():
+            return await trabajo(db)
+
+    def stats(self) -> dict:
+        return {
+            "lotes": self.lotes,
+            "trabajos": self.trabajos,
+            "trabajos_por_lote": round(self.trabajos / self.lotes, 2) if self.lotes else 0.0,
+            "en_cola": self._cola.qsize() if self._cola is not None else 0,
+        }
+
+
+def _cancelando() -> bool:
+    tarea = asyncio.current_task()
+    return tarea is not None and tarea.cancelling() > 0
+
+
+# Solo con SQLite en archivo: la sesión de escritura (database.sesion_escritura)
+# abre sus propias transacciones y los SAVEPOINT de cada trabajo funcionan
+cola = ColaEscritura(settings.SQLITE_WRITE_BATCH) if SQLITE_EN_ARCHIVO and settings.SQLITE_WRITE_QUEUE else None
+
+
+async def ejecutar(trabajo: Trabajo) -> T:
+    """Ejecuta y confirma un trabajo de escritura; las excepciones del trabajo se propagan"""
+    if cola is not None:
+        return await cola.ejecutar(trabajo)
+    async with sesion_escritura() as db:
+        resultado = await trabajo(db)
+        await db.commit()
+        return resultado
+
+
+async def ejecutar_sync(funcion: Callable[[Session], T]) -> T:
+    """ejecutar() para código escrito con la Session síncrona"""
+    async def trabajo(db: AsyncSession):
+        return await db.run_sync(funcion)
+    return await ejecutar(trabajo)
+
+
+@asynccontextmanager
+async def exclusivo():
+    if cola is None:
+        yield
+        return
+    async with cola.exclusivo():
+        yield
@@ -0,0 +1,148 @@
+"""
+Estadísticas de invitados
+
+Sin contadores se calcula todo con una sola consulta agrupada por estado.
+Con STATS_COUNTERS activo se mantiene la tabla contadores_invitados: cada
+alta, edición, RSVP o baja aplica su diferencia dentro de la misma
+transacción, y el panel lee tres filas sin importar cuántos invitados haya.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import ContadorEstado, EstadoInvitado, Invitado
+
+# (estado, cantidad_adultos, cantidad_ninos) de un invitado
+Huella = Tuple[EstadoInvitado, int, int]
+
+_contadores = ContadorEstado.__table__
+
+
+def huella(invitado: Invitado) -> Huella:
+    return (
+        EstadoInvitado(invitado.estado or EstadoInvitado.PENDIENTE),
+        invitado.cantidad_adultos or 0,
+        invitado.cantidad_ninos or 0,
+    )
+
+
+def diferencia(antes: Optional[Huella], despues: Optional[Huella]) -> Dict[EstadoInvitado, Tuple[int, int, int]]:
+    """Cambio en (invitados, adultos, niños) por estado al pasar de `antes` a `despues`"""
+    deltas: Dict[EstadoInvitado, list] = {}
+    for h, signo in ((antes, -1), (despues, 1)):
+        if h is None:
+            continue
+        d = deltas.setdefault(h[0], [0, 0, 0])
+        d[0] += signo
+        d[1] += signo * h[1]
+        d[2] += signo * h[2]
+    return {estado: tuple(d) for estado, d in deltas.items() if any(d)}
+
+
+def sumar_diferencias(*deltas) -> Dict[EstadoInvitado, Tuple[int, int, int]]:
+    total: Dict[EstadoInvitado, list] = {}
+    for d in deltas:
+        for estado, valores in d.items():
+            acumulado = total.setdefault(estado, [0, 0, 0])
+            for i, v in enumerate(valores):
+                acumulado[i] += v
+    return {estado: tuple(v) for estado, v in total.items() if any(v)}
+
+
+def diferencia_agregada(antes: Iterable, despues: Iterable) -> Dict[EstadoInvitado, Tuple[int, int, int]]:
+    """Como diferencia(), para varios invitados a la vez: filas (estado, invitados, adultos, niños)"""
+    deltas: Dict[EstadoInvitado, list] = {}
+    for filas, signo in ((antes, -1), (despues, 1)):
+        for estado, invitados, adultos, ninos in filas:
+            d = deltas.setdefault(EstadoInvitado(estado or EstadoInvitado.PENDIENTE), [0, 0, 0])
+            d[0] += signo * int(invitados)
+            d[1] += signo * int(adultos)
+            d[2] += signo * int(ninos)
+    return {estado: tuple(d) for estado, d in deltas.items() if any(d)}
+
+
+def consulta_agregada():
+    """Una sola consulta: conteo y sumas por estado"""
+    return select(
+        Invitado.estado,
+        func.count(Invitado.id),
+        func.coalesce(func.sum(Invitado.cantidad_adultos), 0),
+        func.coalesce(func.sum(Invitado.cantidad_ninos), 0),
+    ).group_by(Invitado.estado)
+
+
+def formatear(filas: Iterable) -> dict:
+    """Convierte filas (estado, invitados, adultos, niños) al formato del endpoint"""
+    por_estado = {e: (0, 0, 0) for e in EstadoInvitado}
+    for estado, invitados, adultos, ninos in filas:
+        if estado is None:
+            estado = EstadoInvitado.PENDIENTE
+        previo = por_estado[EstadoInvitado(estado)]
+        por_estado[EstadoInvitado(estado)] = (
+            previo[0] + int(invitados), previo[1] + int(adultos), previo[2] + int(ninos)
+        )
+    confirmados = por_estado[EstadoInvitado.CONFIRMADO]
+    return {
+        "total": sum(v[0] for v in por_estado.values()),
+        "confirmados": confirmados[0],
+        "pendientes": por_estado[EstadoInvitado.PENDIENTE][0],
+        "rechazados": por_estado[EstadoInvitado.RECHAZADO][0],
+        "total_adultos_confirmados": confirmados[1],
+        "total_ninos_confirmados": confirmados[2],
+    }
+
+
+def recalcular_contadores(db: Session):
+    """Reconstruye la tabla de contadores a partir de la tabla de invitados"""
+    # Borrar primero bloquea los contadores: las escrituras concurrentes
+    # esperan en aplicar_diferencia() y la agregación ya no las pierde
+    db.execute(delete(_contadores))
+    filas = {e: (0, 0, 0) for e in EstadoInvitado}
+    for estado, invitados, adultos, ninos in db.execute(consulta_agregada()):
+        if estado is not None:
+            filas[EstadoInvitado(estado)] = (int(invitados), int(adultos), int(ninos))
+    db.execute(insert(_contadores), [
+        {"estado": estado, "invitados": v[0], "adultos": v[1], "ninos": v[2]}
+        for estado, v in filas.items()
+    ])
+
+
+def aplicar_diferencia(db: Session, deltas: Dict[EstadoInvitado, Tuple[int, int, int]]):
+    """
+    Suma las diferencias a los contadores dentro de la transacción de `db`.
+    Si falta alguna fila (tabla recién creada) se recalcula todo.
+    """
+    for estado, (invitados, adultos, ninos) in deltas.items():
+        resultado = db.execute(
+            update(_contadores).where(_contadores.c.estado == estado).values(
+                invitados=_contadores.c.invitados + invitados,
+                adultos=_contadores.c.adultos + adultos,
+                ninos=_contadores.c.ninos + ninos,
+            )
+        )
+        if resultado.rowcount == 0:
+            db.flush()
+            recalcular_contadores(db)
+            return
+
+
+def leer_contadores(db: Session) -> dict:
+    filas = list(db.execute(select(
+        _contadores.c.estado, _contadores.c.invitados, _contadores.c.adultos, _contadores.c.ninos
+    )))
+    if len(filas) < len(EstadoInvitado):
+        recalcular_contadores(db)
+        db.commit()
+        filas = list(db.execute(select(
+            _contadores.c.estado, _contadores.c.invitados, _contadores.c.adultos, _contadores.c.ninos
+        )))
+    return formatear(filas)
+
+
+def estadisticas_actuales(db: Session) -> dict:
+    """Estadísticas desde los contadores si están activos, si no con la consulta agrupada"""
+    if settings.STATS_COUNTERS:
+        return leer_contadores(db)
+    return formatear(db.execute(consulta_agregada()))
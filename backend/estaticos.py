@@ -0,0 +1,139 @@
+"""
+Archivos estáticos versionados (generados por construir_estaticos.py)
+
+El build deja en dist/ copias con hash en el nombre, variantes WebP/AVIF y
+redimensionadas de las imágenes, versiones .br/.gz de los textos y un
+manifest.json. Las plantillas piden las URLs con asset() y srcset(); la
+ruta /static las sirve como inmutables eligiendo formato según Accept y
+compresión según Accept-Encoding. Sin manifest (desarrollo) asset()
+devuelve la ruta original servida por los montajes /front y /elementos.
+"""
+import json
+import os
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse
+from markupsafe import Markup, escape
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIST_DIR = os.path.join(PROJECT_ROOT, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+URL_PREFIX = "/static/"
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+
+# Preferencia del servidor cuando el cliente acepta varios
+FORMATOS_PREFERIDOS = ("image/avif", "image/webp")
+CODIFICACIONES_PREFERIDAS = ("br", "gzip")
+
+
+class Manifest:
+    """manifest.json en memoria; se recarga si el build lo reemplaza"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._firma: Optional[tuple] = None
+        self.assets: Dict[str, str] = {}
+        self.srcsets: Dict[str, list] = {}
+        self.archivos: Dict[str, dict] = {}
+
+    def actualizar(self):
+        try:
+            st = os.stat(self.path)
+            firma = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            firma = None
+        if firma == self._firma:
+            return
+        datos = {}
+        if firma is not None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        self.assets = datos.get("assets", {})
+        self.srcsets = datos.get("srcset", {})
+        self.archivos = datos.get("archivos", {})
+        self._firma = firma
+
+
+manifest = Manifest(MANIFEST_PATH)
+
+
+def asset(ruta: str) -> str:
+    """URL pública de un archivo del proyecto, p. ej. asset('front/style.css')"""
+    manifest.actualizar()
+    ruta = ruta.lstrip("/")
+    construido = manifest.assets.get(ruta)
+    return URL_PREFIX + construido if construido else "/" + ruta
+
+
+def srcset(ruta: str, sizes: Optional[str] = None) -> Markup:
+    """Atributos srcset/sizes para un <img> si el build generó anchos alternativos"""
+    manifest.actualizar()
+    anchos = manifest.srcsets.get(ruta.lstrip("/"))
+    if not anchos:
+        return Markup("")
+    valor = ", ".join(f"{URL_PREFIX}{archivo} {ancho}w" for ancho, archivo in anchos)
+    atributos = f' srcset="{escape(valor)}"'
+    if sizes:
+        atributos += f' sizes="{escape(sizes)}"'
+    return Markup(atributos)
+
+
+def registrar_en_plantillas(templates):
+    templates.env.globals["asset"] = asset
+    templates.env.globals["srcset"] = srcset
+
+
+def _aceptados(cabecera: str) -> set:
+    """Valores de Accept/Accept-Encoding con q > 0 (en minúsculas)"""
+    aceptados = set()
+    for parte in cabecera.split(","):
+        valor, _, params = parte.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            clave, _, v = param.strip().partition("=")
+            if clave.lower() == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        if valor and q > 0:
+            aceptados.add(valor.strip().lower())
+    return aceptados
+
+
+def respuesta_estatico(request: Request, ruta: str) -> FileResponse:
+    """Sirve un archivo del manifest con la mejor variante que acepte el cliente"""
+    manifest.actualizar()
+    info = manifest.archivos.get(ruta)
+    if info is None:
+        # Solo se sirve lo que figura en el manifest: nada de rutas arbitrarias
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+    archivo, media_type = ruta, info["type"]
+    headers = {"Cache-Control": CACHE_INMUTABLE}
+    vary = []
+
+    alternativas = info.get("alternates")
+    if alternativas:
+        vary.append("Accept")
+        accept = _aceptados(request.headers.get("accept", ""))
+        for formato in FORMATOS_PREFERIDOS:
+            if formato in alternativas and formato in accept:
+                archivo, media_type = alternativas[formato], formato
+                break
+
+    codificaciones = info.get("encodings")
+    if codificaciones:
+        vary.append("Accept-Encoding")
+        accept_encoding = _aceptados(request.headers.get("accept-encoding", ""))
+        for codificacion in CODIFICACIONES_PREFERIDAS:
+            if codificacion in codificaciones and codificacion in accept_encoding:
+                archivo = codificaciones[codificacion]
+                headers["Content-Encoding"] = codificacion
+                break
+
+    if vary:
+        headers["Vary"] = ", ".join(vary)
+    return FileResponse(os.path.join(DIST_DIR, archivo), media_type=media_type, headers=headers)
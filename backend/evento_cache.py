@@ -0,0 +1,155 @@
+"""
+Caché en memoria de evento.json
+
+Mantiene el documento ya parseado y el cuerpo JSON pre-serializado (UTF-8)
+para no leer ni parsear el archivo en cada petición. La caché se invalida
+cuando cambia el mtime o el hash del contenido del archivo, o cuando se
+guarda desde la API. El archivo se reemplaza de forma atómica (archivo
+temporal + rename), así que ningún proceso lee nunca uno a medio escribir,
+y el inode forma parte de la versión: otro worker que lo reescriba se
+detecta en el siguiente stat.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+class EventoSnapshot:
+    """Versión inmutable del evento: documento, cuerpo serializado y ETag"""
+
+    __slots__ = ("data", "body", "etag", "mtime_ns", "size", "ino")
+
+    def __init__(self, data: dict, body: bytes, etag: str, mtime_ns: int, size: int, ino: int = 0):
+        self.data = data
+        self.body = body
+        self.etag = etag
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.ino = ino
+
+    def vigente(self, st: os.stat_result) -> bool:
+        return self.mtime_ns == st.st_mtime_ns and self.size == st.st_size and self.ino == st.st_ino
+
+
+def _serializar(data: dict) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _etag(contenido: bytes) -> str:
+    return '"' + hashlib.sha256(contenido).hexdigest()[:32] + '"'
+
+
+class EventoStore:
+    """Almacén versionado del JSON del evento"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshot: Optional[EventoSnapshot] = None
+        self._hash_archivo: Optional[str] = None
+
+    def _construir(self, raw: bytes, st: os.stat_result) -> EventoSnapshot:
+        data = json.loads(raw.decode("utf-8")) if raw.strip() else {}
+        body = _serializar(data)
+        return EventoSnapshot(data, body, _etag(body), st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def snapshot(self) -> EventoSnapshot:
+        """Devuelve la versión vigente, recargando solo si el archivo cambió"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            with self._lock:
+                if self._snapshot is None or self._snapshot.mtime_ns != -1:
+                    self._snapshot = EventoSnapshot({}, b"{}", _etag(b"{}"), -1, 0)
+                    self._hash_archivo = None
+                return self._snapshot
+
+        actual = self._snapshot
+        if actual is not None and actual.vigente(st):
+            return actual
+
+        with self._lock:
+            actual = self._snapshot
+            if actual is not None and actual.mtime_ns == st.st_mtime_ns and actual.size == st.st_size:
+                return actual
+
+            with open(self.path, "rb") as f:
+                # El stat del descriptor corresponde exactamente al contenido leído
+                st = os.fstat(f.fileno())
+                raw = f.read()
+            hash_archivo = hashlib.sha256(raw).hexdigest()
+
+            # Si solo cambió el mtime (p.ej. un "touch") se reutiliza lo parseado
+            if actual is not None and hash_archivo == self._hash_archivo:
+                actual = EventoSnapshot(actual.data, actual.body, actual.etag, st.st_mtime_ns, st.st_size, st.st_ino)
+            else:
+                actual = self._construir(raw, st)
+
+            self._snapshot = actual
+            self._hash_archivo = hash_archivo
+            return actual
+
+    def load(self) -> dict:
+        """Documento parseado (compartido, no debe modificarse)"""
+        return self.snapshot().data
+
+    def save(self, data: dict) -> EventoSnapshot:
+        """Escribe el archivo y deja la caché apuntando a la nueva versión"""
+        raw = json.dumps(data, indent=4, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            directorio = os.path.dirname(os.path.abspath(self.path))
+            fd, temporal = tempfile.mkstemp(prefix=".evento-", suffix=".tmp", dir=directorio)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(raw)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    st = os.fstat(f.fileno())
+                try:
+                    os.chmod(temporal, os.stat(self.path).st_mode & 0o777)
+                except FileNotFoundError:
+                    os.chmod(temporal, 0o644)
+                os.replace(temporal, self.path)
+            except BaseException:
+                if os.path.exists(temporal):
+                    os.unlink(temporal)
+                raise
+            # rename conserva inode y mtime: el stat del temporal es el del archivo publicado
+            self._snapshot = self._construir(raw, st)
+            self._hash_archivo = hashlib.sha256(raw).hexdigest()
+            return self._snapshot
+
+    def invalidate(self):
+        """Fuerza la recarga en el próximo acceso"""
+        with self._lock:
+            self._snapshot = None
+            self._hash_archivo = None
+
+
+def etag_coincide(request: Request, etag: str) -> bool:
+    """Evalúa If-None-Match (comparación débil, como indica RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidato in header.split(","):
+        candidato = candidato.strip()
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
+
+
+def evento_response(request: Request, snapshot: EventoSnapshot, cache_control: str = "no-cache") -> Response:
+    """Respuesta JSON con ETag; 304 si el cliente ya tiene esta versión"""
+    headers = {"ETag": snapshot.etag, "Cache-Control": cache_control}
+    if etag_coincide(request, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
@@ -0,0 +1,203 @@
+"""
+Exportación de la lista de invitados en CSV o XLSX
+
+Las filas se leen con un cursor del lado del servidor (yield_per) y se
+escriben al cliente a medida que llegan, de modo que ni el resultado
+completo ni el archivo terminado se mantienen en memoria. El XLSX se arma
+como un zip en modo streaming con la hoja en XML y cadenas en línea.
+"""
+import csv
+import io
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select
+
+from database import async_session
+from listado import condiciones
+from models import Invitado
+from schemas import FiltroInvitados
+
+FILAS_POR_LOTE = 500
+
+ENCABEZADOS = [
+    "Código", "Nombres", "Estado",
+    "Máx. adultos", "Máx. niños", "Máx. personas",
+    "Adultos confirmados", "Niños confirmados", "Personas confirmadas",
+    "Confirmación", "Fecha de confirmación",
+]
+
+
+def _consulta(filtros: FiltroInvitados):
+    return select(
+        Invitado.codigo, Invitado.nombres, Invitado.estado,
+        Invitado.max_adultos, Invitado.max_ninos,
+        Invitado.cantidad_adultos, Invitado.cantidad_ninos,
+        Invitado.confirmacion, Invitado.fecha_confirmacion,
+    ).where(*condiciones(filtros)).order_by(Invitado.codigo)
+
+
+def _fila(r) -> List:
+    max_adultos, max_ninos = r.max_adultos or 0, r.max_ninos or 0
+    adultos, ninos = r.cantidad_adultos or 0, r.cantidad_ninos or 0
+    estado = r.estado.value if hasattr(r.estado, "value") else (r.estado or "")
+    fecha = r.fecha_confirmacion.strftime("%Y-%m-%d %H:%M") if r.fecha_confirmacion else ""
+    return [
+        r.codigo, r.nombres, estado,
+        max_adultos, max_ninos, max_adultos + max_ninos,
+        adultos, ninos, adultos + ninos,
+        r.confirmacion or "", fecha,
+    ]
+
+
+async def _filas(filtros: FiltroInvitados) -> AsyncIterator[List]:
+    """Recorre el resultado con un cursor de servidor, en lotes de FILAS_POR_LOTE"""
+    async with async_session() as db:
+        resultado = await db.stream(
+            _consulta(filtros).execution_options(yield_per=FILAS_POR_LOTE)
+        )
+        async for r in resultado:
+            yield _fila(r)
+
+
+async def exportar_csv(filtros: FiltroInvitados) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM para que Excel detecte UTF-8 (acentos y ñ)
+    buffer.write("\ufeff")
+    writer.writerow(ENCABEZADOS)
+    pendientes = 0
+    async for fila in _filas(filtros):
+        writer.writerow(fila)
+        pendientes += 1
+        if pendientes >= FILAS_POR_LOTE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pendientes = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+# ==================== XLSX ====================
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Invitados" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '</styleSheet>'
+)
+_SHEET_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+    'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+    '<sheetData>'
+)
+_SHEET_FIN = '</sheetData></worksheet>'
+
+
+class _Salida(io.RawIOBase):
+    """Destino no posicionable del zip: acumula bytes hasta que se drenan"""
+
+    def __init__(self):
+        self._datos = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._datos.extend(b)
+        return len(b)
+
+    def drenar(self) -> bytes:
+        datos = bytes(self._datos)
+        self._datos.clear()
+        return datos
+
+
+def _celda(valor, estilo: str = "") -> str:
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return f'<c{estilo}><v>{valor}</v></c>'
+    return f'<c t="inlineStr"{estilo}><is><t xml:space="preserve">{escape(str(valor))}</t></is></c>'
+
+
+def _fila_xml(valores: Iterable, estilo: str = "") -> str:
+    return "<row>" + "".join(_celda(v, estilo) for v in valores) + "</row>"
+
+
+async def exportar_xlsx(filtros: FiltroInvitados) -> AsyncIterator[bytes]:
+    salida = _Salida()
+    with zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nombre, contenido in (
+            ("[Content_Types].xml", _CONTENT_TYPES),
+            ("_rels/.rels", _RELS),
+            ("xl/workbook.xml", _WORKBOOK),
+            ("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS),
+            ("xl/styles.xml", _STYLES),
+        ):
+            zf.writestr(nombre, contenido)
+        yield salida.drenar()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as hoja:
+            hoja.write((_SHEET_INICIO + _fila_xml(ENCABEZADOS, ' s="1"')).encode("utf-8"))
+            pendientes = []
+            async for fila in _filas(filtros):
+                pendientes.append(_fila_xml(fila))
+                if len(pendientes) >= FILAS_POR_LOTE:
+                    hoja.write("".join(pendientes).encode("utf-8"))
+                    pendientes.clear()
+                    yield salida.drenar()
+            hoja.write(("".join(pendientes) + _SHEET_FIN).encode("utf-8"))
+    yield salida.drenar()
+
+
+def nombre_archivo(formato: str) -> str:
+    return f"invitados-{datetime.now().strftime('%Y%m%d-%H%M')}.{formato}"
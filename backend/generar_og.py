@@ -0,0 +1,65 @@
+"""
+Pre-renderiza las imágenes Open Graph de todos los invitados
+Ejecutar: python generar_og.py [--workers N] [--forzar]
+
+Conviene correrlo antes de enviar los links: así los crawlers de WhatsApp,
+Facebook, etc. encuentran las tarjetas ya en disco en lugar de provocar
+cientos de renders simultáneos. Solo se dibujan las que faltan o cambiaron.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from database import SessionLocal
+from evento_cache import EventoStore
+from imagenes_og import CLAVE_GENERAL, datos_tarjeta, generar_tarjeta, huella_tarjeta, ruta_tarjeta
+from models import Invitado
+
+EVENTO_JSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "evento.json")
+
+
+def pendientes(forzar: bool = False):
+    """(clave, datos) de las tarjetas que hay que dibujar"""
+    evento = EventoStore(EVENTO_JSON_PATH).load()
+    db = SessionLocal()
+    try:
+        filas = db.query(Invitado.id, Invitado.nombres).order_by(Invitado.id).all()
+    finally:
+        db.close()
+
+    tarjetas = [(CLAVE_GENERAL, datos_tarjeta(None, evento))]
+    tarjetas += [(id_, datos_tarjeta(nombres, evento)) for id_, nombres in filas]
+    if forzar:
+        return tarjetas
+    return [
+        (clave, datos) for clave, datos in tarjetas
+        if not os.path.exists(ruta_tarjeta(clave, huella_tarjeta(datos)))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera las imágenes Open Graph por invitado")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, uno por CPU)")
+    parser.add_argument("--forzar", action="store_true", help="volver a dibujar aunque ya existan")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    tarjetas = pendientes(args.forzar)
+    print(f"🔄 {len(tarjetas)} tarjetas por generar")
+    generadas = errores = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futuros = {pool.submit(generar_tarjeta, clave, datos, args.forzar): clave for clave, datos in tarjetas}
+        for futuro in as_completed(futuros):
+            try:
+                futuro.result()
+                generadas += 1
+            except Exception as e:
+                errores += 1
+                print(f"❌ Invitado {futuros[futuro]}: {e}")
+    print(f"✓ {generadas} tarjetas generadas en {time.perf_counter() - inicio:.1f}s"
+          + (f" ({errores} con error)" if errores else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Genera los links personales y los códigos QR de los invitados
+Ejecutar: python generar_qr.py [--formato png|svg] [--pdf hoja.pdf] [--csv links.csv]
+                               [--estado pendiente] [--codigo FM2026-0] [--workers N] [--forzar]
+
+El link se arma con BASE_URL (o --base-url). Los QR quedan en la caché de
+disco (QR_CACHE_DIR, por defecto cache/qr) y solo se dibujan los que faltan
+o cuyo link cambió, repartidos en varios procesos.
+"""
+import argparse
+import csv
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import settings
+from database import SessionLocal
+from listado import filtros_invitados
+from models import EstadoInvitado
+from qr_invitados import FORMATOS, disponible, enlaces, consulta_enlaces, generar_todos, hoja_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera los links personales y los códigos QR de los invitados")
+    parser.add_argument("--formato", choices=FORMATOS, default="png")
+    parser.add_argument("--pdf", help="escribir también la hoja imprimible en esta ruta")
+    parser.add_argument("--csv", help="escribir codigo,nombres,url,qr en esta ruta")
+    parser.add_argument("--estado", action="append", choices=[e.value for e in EstadoInvitado], help="filtrar por estado (se puede repetir)")
+    parser.add_argument("--codigo", help="prefijo del código")
+    parser.add_argument("--base-url", default=settings.BASE_URL, help="por defecto BASE_URL")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, uno por CPU)")
+    parser.add_argument("--forzar", action="store_true", help="volver a dibujar aunque ya existan")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        sys.exit("❌ Define BASE_URL o usa --base-url (p.ej. https://midominio.com)")
+    if not disponible():
+        sys.exit("❌ Instala qrcode (pip install qrcode) para generar los códigos QR")
+
+    filtros = filtros_invitados(estado=args.estado, codigo=args.codigo, desde=None, hasta=None, fecha="created_at")
+    with SessionLocal() as db:
+        items = enlaces(db.execute(consulta_enlaces(filtros)).all(), args.base_url)
+
+    inicio = time.perf_counter()
+    print(f"🔄 {len(items)} invitados")
+    # La hoja PDF se arma con los PNG
+    formatos = [args.formato] + (["png"] if args.pdf and args.formato != "png" else [])
+    rutas, dibujados = {}, 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for formato in formatos:
+            rutas[formato], n = generar_todos(items, formato, pool, args.forzar)
+            dibujados += n
+    reutilizados = len(items) * len(formatos) - dibujados
+    print(f"✓ {dibujados} QR dibujados y {reutilizados} reutilizados en {time.perf_counter() - inicio:.1f}s")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8-sig") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["codigo", "nombres", "url", "qr"])
+            for e in items:
+                escritor.writerow([e.codigo, e.nombres, e.url, rutas[args.formato][e.id]])
+        print(f"✓ Links en {args.csv}")
+    if args.pdf:
+        with open(args.pdf, "wb") as f:
+            f.write(hoja_pdf(items, rutas["png"]))
+        print(f"✓ Hoja imprimible en {args.pdf}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Imágenes Open Graph personalizadas por invitado
+
+Cada link de invitación (/?uuid=...) anuncia una tarjeta de 1200x630 con
+el nombre del invitado. Las tarjetas se renderizan con Pillow y se guardan
+en disco como <id>-<huella>.jpg, donde la huella resume todo lo que se
+dibuja (nombre, datos del evento, diseño y fuente): si algo cambia la
+huella es otra y la imagen vieja se reemplaza. generar_og.py las
+pre-renderiza todas antes de un envío masivo.
+"""
+import asyncio
+import functools
+import glob
+import hashlib
+import io
+import json
+import os
+import tempfile
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from config import settings
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+ELEMENTOS_DIR = os.path.join(PROJECT_ROOT, "elementos")
+
+ANCHO, ALTO = 1200, 630
+# Cambiar al modificar el dibujo para invalidar todas las tarjetas en disco
+VERSION_DISENO = "1"
+
+CALIDAD_JPEG = 85
+
+COLOR_FONDO = "#FBFCFC"
+COLOR_TEXTO = "#808B94"
+COLOR_NOMBRE = "#5E6A73"
+COLOR_ACENTO = "#EFC5A5"
+
+# Fuentes con soporte para español que suelen venir en servidores Linux
+FUENTES_SISTEMA = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
+)
+
+# Clave de la tarjeta sin invitado (uuid desconocido)
+CLAVE_GENERAL = "general"
+
+_pool_og = None
+
+
+def _get_pool_og() -> ThreadPoolExecutor:
+    global _pool_og
+    if _pool_og is None:
+        _pool_og = ThreadPoolExecutor(max_workers=2, thread_name_prefix="og")
+    return _pool_og
+
+
+def directorio_cache() -> str:
+    return settings.OG_CACHE_DIR or os.path.join(PROJECT_ROOT, "cache", "og")
+
+
+def datos_tarjeta(nombres: Optional[str], evento: dict) -> dict:
+    """Todo lo que se dibuja en la tarjeta"""
+    return {
+        "nombres": (nombres or "").strip(),
+        "novios": evento.get("nombres_novios", ""),
+        "fecha": evento.get("fecha", ""),
+    }
+
+
+def huella_tarjeta(datos: dict) -> str:
+    contenido = json.dumps(
+        [VERSION_DISENO, _ruta_fuente() or "", datos], ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()[:16]
+
+
+def ruta_tarjeta(clave, huella: str) -> str:
+    return os.path.join(directorio_cache(), f"{clave}-{huella}.jpg")
+
+
+@functools.lru_cache(maxsize=None)
+def _ruta_fuente() -> Optional[str]:
+    """OG_FONT_PATH o la primera fuente del sistema con acentos y ñ"""
+    if settings.OG_FONT_PATH:
+        return settings.OG_FONT_PATH
+    return next((r for r in FUENTES_SISTEMA if os.path.exists(r)), None)
+
+
+def fuente(tamano: int) -> ImageFont.FreeTypeFont:
+    ruta = _ruta_fuente()
+    if ruta:
+        return ImageFont.truetype(ruta, tamano)
+    return ImageFont.load_default(size=tamano)
+
+
+def texto_dibujable(texto: str) -> str:
+    """La fuente incluida en Pillow solo trae ASCII: 'Pérez' se dibuja 'Perez'"""
+    if _ruta_fuente():
+        return texto
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+
+def fuente_ajustada(draw: ImageDraw.ImageDraw, texto: str, ancho_max: int, tamano: int, minimo: int):
+    """Fuente más grande (desde `tamano`) con la que el texto entra en `ancho_max`"""
+    while tamano > minimo:
+        candidata = fuente(tamano)
+        if draw.textlength(texto_dibujable(texto), font=candidata) <= ancho_max:
+            return candidata
+        tamano -= 4
+    return fuente(minimo)
+
+
+def _centrado(draw: ImageDraw.ImageDraw, y: int, texto: str, fuente, color: str):
+    draw.text((ANCHO // 2, y), texto_dibujable(texto), font=fuente, fill=color, anchor="mm")
+
+
+@functools.lru_cache(maxsize=None)
+def _decoracion(nombre: str, caja: Tuple[int, int]) -> Image.Image:
+    """Imagen de elementos/ reducida a la caja; se carga una vez por proceso"""
+    imagen = Image.open(os.path.join(ELEMENTOS_DIR, nombre)).convert("RGBA")
+    imagen.thumbnail(caja, Image.LANCZOS)
+    return imagen
+
+
+def renderizar_tarjeta(datos: dict) -> bytes:
+    """JPEG de 1200x630 con el nombre del invitado sobre el diseño de la invitación"""
+    imagen = Image.new("RGB", (ANCHO, ALTO), COLOR_FONDO)
+
+    flores = _decoracion("flores.png", (ANCHO, 200))
+    imagen.paste(flores, ((ANCHO - flores.width) // 2, 0), flores)
+    flores_abajo = _decoracion("flores-abajo.png", (560, 140))
+    imagen.paste(flores_abajo, ((ANCHO - flores_abajo.width) // 2, ALTO - flores_abajo.height), flores_abajo)
+
+    draw = ImageDraw.Draw(imagen)
+    margen = 120
+    if datos["nombres"]:
+        _centrado(draw, 235, "Invitación especial para", fuente(34), COLOR_TEXTO)
+        _centrado(draw, 310, datos["nombres"], fuente_ajustada(draw, datos["nombres"], ANCHO - 2 * margen, 72, 32), COLOR_NOMBRE)
+    else:
+        _centrado(draw, 270, "Estás invitado", fuente(64), COLOR_NOMBRE)
+    draw.line((ANCHO // 2 - 90, 370, ANCHO // 2 + 90, 370), fill=COLOR_ACENTO, width=3)
+    if datos["novios"]:
+        _centrado(draw, 415, datos["novios"], fuente_ajustada(draw, datos["novios"], ANCHO - 2 * margen, 40, 24), COLOR_TEXTO)
+    if datos["fecha"]:
+        _centrado(draw, 462, datos["fecha"].upper(), fuente(30), COLOR_TEXTO)
+
+    # JPEG: una décima parte del tamaño de un PNG (WhatsApp descarta vistas previas de
+    # más de ~300 KB) y mucho más rápido de codificar
+    salida = io.BytesIO()
+    imagen.save(salida, "JPEG", quality=CALIDAD_JPEG, optimize=True, progressive=True)
+    return salida.getvalue()
+
+
+def guardar_en_cache(ruta: str, renderizar: Callable[[], bytes], forzar: bool = False) -> Tuple[str, bool]:
+    """
+    Devuelve `ruta` (<clave>-<huella>.<ext>), escribiendo renderizar() si el
+    archivo no existe; el segundo valor indica si hubo que hacerlo. Es seguro
+    llamarla desde varios hilos o procesos: el archivo se escribe aparte y se
+    renombra.
+    """
+    if not forzar and os.path.exists(ruta):
+        return ruta, False
+
+    directorio = os.path.dirname(ruta)
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(renderizar())
+        os.replace(temporal, ruta)
+    except BaseException:
+        # Un render fallido no deja temporales en la caché (el endpoint es público)
+        try:
+            os.remove(temporal)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # Versiones anteriores de la misma clave (cambió lo que entra en la huella)
+    nombre, extension = os.path.splitext(os.path.basename(ruta))
+    clave = nombre.rsplit("-", 1)[0]
+    for vieja in glob.glob(os.path.join(directorio, f"{glob.escape(clave)}-*{extension}")):
+        if vieja != ruta:
+            try:
+                os.remove(vieja)
+            except FileNotFoundError:
+                pass
+    return ruta, True
+
+
+def generar_tarjeta(clave, datos: dict, forzar: bool = False) -> Tuple[str, bool]:
+    """Ruta de la tarjeta en disco y si hubo que renderizarla (ver guardar_en_cache)"""
+    ruta = ruta_tarjeta(clave, huella_tarjeta(datos))
+    return guardar_en_cache(ruta, functools.partial(renderizar_tarjeta, datos), forzar)
+
+
+async def generar_tarjeta_async(clave, datos: dict) -> str:
+    loop = asyncio.get_running_loop()
+    ruta, _ = await loop.run_in_executor(_get_pool_og(), generar_tarjeta, clave, datos)
+    return ruta
@@ -0,0 +1,149 @@
+"""
+Importación masiva de invitados (CSV o NDJSON)
+
+El cuerpo de la petición se procesa como stream: se decodifica por trozos,
+se valida fila por fila contra InvitadoCreate y las filas válidas quedan
+en memoria hasta terminar la subida. Recién entonces se insertan en lotes
+con un solo executemany por lote, todo dentro de una misma transacción.
+"""
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from schemas import InvitadoCreate
+
+COLUMNAS = ("nombres", "max_adultos", "max_ninos", "codigo")
+MAX_ERRORES_REPORTADOS = 500
+
+
+async def _lineas(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Convierte un stream de bytes en líneas de texto (conserva el salto de línea)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pendiente = ""
+    async for chunk in stream:
+        pendiente += decoder.decode(chunk)
+        lineas = pendiente.splitlines(keepends=True)
+        if lineas and not lineas[-1].endswith(("\n", "\r")):
+            pendiente = lineas.pop()
+        else:
+            pendiente = ""
+        for linea in lineas:
+            yield linea
+    pendiente += decoder.decode(b"", final=True)
+    if pendiente:
+        yield pendiente
+
+
+async def _registros_csv(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Agrupa líneas en registros CSV completos (campos entre comillas con saltos de línea)"""
+    registro = ""
+    async for linea in _lineas(stream):
+        registro += linea
+        if registro.count('"') % 2 == 0:
+            yield registro
+            registro = ""
+    if registro:
+        yield registro
+
+
+async def filas_csv(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """Genera (número de fila, datos, error) a partir de un CSV con encabezado"""
+    encabezado = None
+    delimitador = ","
+    numero = 0
+    async for registro in _registros_csv(stream):
+        if not registro.strip():
+            continue
+        if encabezado is None:
+            # Excel en español suele exportar con punto y coma
+            if registro.count(";") > registro.count(","):
+                delimitador = ";"
+            encabezado = [c.strip().lower() for c in next(csv.reader([registro], delimiter=delimitador))]
+            faltantes = [c for c in ("nombres", "max_adultos") if c not in encabezado]
+            if faltantes:
+                yield 1, None, f"Faltan columnas obligatorias: {', '.join(faltantes)}"
+                return
+            continue
+        numero += 1
+        try:
+            valores = next(csv.reader([registro], delimiter=delimitador))
+        except csv.Error as e:
+            yield numero, None, f"CSV inválido: {e}"
+            continue
+        datos = {}
+        for columna, valor in zip(encabezado, valores):
+            if columna in COLUMNAS and valor.strip() != "":
+                datos[columna] = valor.strip()
+        yield numero, datos, None
+
+
+async def filas_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """Genera (número de fila, datos, error) a partir de NDJSON (un objeto por línea)"""
+    numero = 0
+    async for linea in _lineas(stream):
+        if not linea.strip():
+            continue
+        numero += 1
+        try:
+            datos = json.loads(linea)
+        except ValueError as e:
+            yield numero, None, f"JSON inválido: {e}"
+            continue
+        if not isinstance(datos, dict):
+            yield numero, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield numero, {k: v for k, v in datos.items() if k in COLUMNAS and v is not None}, None
+
+
+def validar_fila(datos: Dict) -> Tuple[Optional[InvitadoCreate], Optional[List[str]]]:
+    """Valida una fila contra InvitadoCreate y las reglas del alta individual"""
+    try:
+        invitado = InvitadoCreate.model_validate(datos)
+    except ValidationError as e:
+        return None, [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+    errores = []
+    if not invitado.nombres.strip():
+        errores.append("nombres: no puede estar vacío")
+    if invitado.max_adultos < 0 or invitado.max_ninos < 0:
+        errores.append("max_adultos/max_ninos: no pueden ser negativos")
+    if invitado.max_adultos + invitado.max_ninos == 0:
+        errores.append("Debe haber al menos 1 adulto o niño")
+    if errores:
+        return None, errores
+    if invitado.codigo:
+        invitado.codigo = invitado.codigo.strip().upper()
+    return invitado, None
+
+
+class ReporteImportacion:
+    """Acumula el resultado de la importación fila por fila"""
+
+    def __init__(self):
+        self.total_filas = 0
+        self.importados = 0
+        self.errores: List[Dict] = []
+        self.errores_omitidos = 0
+
+    def error(self, fila: int, mensajes):
+        if isinstance(mensajes, str):
+            mensajes = [mensajes]
+        if len(self.errores) < MAX_ERRORES_REPORTADOS:
+            self.errores.append({"fila": fila, "errores": mensajes})
+        else:
+            self.errores_omitidos += 1
+
+    @property
+    def con_errores(self) -> bool:
+        return bool(self.errores) or self.errores_omitidos > 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "total_filas": self.total_filas,
+            "importados": self.importados,
+            "con_error": len(self.errores) + self.errores_omitidos,
+            "errores": self.errores,
+            "errores_omitidos": self.errores_omitidos,
+        }
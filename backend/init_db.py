@@ -1,21 +1,23 @@
 """
 Script para inicializar la base de datos con el usuario administrador
 Ejecutar: python init_db.py
+
+Es seguro correrlo en cada deploy (fase release del Procfile): no borra
+nada. Crea las tablas, columnas e índices que falten (ver migraciones.py),
+el usuario admin si no existe y, solo en una base vacía, invitados de ejemplo.
+Con STATS_COUNTERS también reconstruye los contadores, una vez por deploy
+en lugar de en cada worker.
 """
 from database import SessionLocal, engine
-from models import Base, AdminUser, Invitado, EstadoInvitado
+from models import AdminUser, Invitado, EstadoInvitado
 from auth import get_password_hash
 from config import settings
-from sqlalchemy import inspect
+from estadisticas import recalcular_contadores
+import migraciones
 import uuid
 
-# Eliminar todas las tablas existentes y recrearlas con la estructura actualizada
-# Esto asegura que todas las columnas nuevas estén presentes
-print("🔄 Recreando tablas con la estructura actualizada...")
-Base.metadata.drop_all(bind=engine)
-print("✓ Tablas eliminadas")
-Base.metadata.create_all(bind=engine)
-print("✓ Tablas recreadas con todas las columnas (incluyendo adultos y niños)")
+print("🔄 Actualizando el esquema (sin borrar datos)...")
+migraciones.migrar(engine)
 
 db = SessionLocal()
 
@@ -74,6 +76,11 @@ try:
     else:
         print(f"✓ Ya existen {invitados_existentes} invitados en la base de datos")
     
+    if settings.STATS_COUNTERS:
+        db.flush()
+        recalcular_contadores(db)
+        print("✓ Contadores de estadísticas recalculados")
+    
     db.commit()
     print("\n✅ Base de datos inicializada correctamente!")
     
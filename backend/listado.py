@@ -0,0 +1,163 @@
+"""
+Filtros, orden y paginación por cursor (keyset) del listado de invitados
+
+El cursor codifica los valores de la última fila entregada (columna de
+orden + id), de modo que cada página es un rango sobre un índice compuesto
+y su costo no depende de cuántas páginas se hayan recorrido.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import String, and_, or_, func, literal, select
+
+from models import Invitado, EstadoInvitado
+from schemas import FiltroInvitados
+
+# Columnas por las que se puede ordenar (siempre se desempata por id)
+COLUMNAS_ORDEN = {
+    "id": Invitado.id,
+    "updated_at": Invitado.updated_at,
+    "created_at": Invitado.created_at,
+    "codigo": Invitado.codigo,
+    "nombres": Invitado.nombres,
+}
+COLUMNAS_FECHA = {
+    "created_at": Invitado.created_at,
+    "updated_at": Invitado.updated_at,
+    "fecha_confirmacion": Invitado.fecha_confirmacion,
+}
+# Columnas de orden que admiten NULL. Se ordena por la columna tal cual (así
+# se usa el índice) y el cursor guarda null; las filas sin valor se piden
+# aparte, en el lugar donde las ubica cada motor: al principio del orden
+# ascendente con SQLite y MySQL, al final con PostgreSQL
+COLUMNAS_NULABLES = {c for c in COLUMNAS_ORDEN if Invitado.__table__.c[c].nullable}
+LIMITE_MAXIMO = 500
+
+
+def filtros_invitados(
+    estado: Optional[List[str]] = Query(None, description="Uno o varios: pendiente, confirmado, rechazado"),
+    codigo: Optional[str] = Query(None, description="Prefijo del código (p.ej. FM2026-0)"),
+    desde: Optional[datetime] = Query(None),
+    hasta: Optional[datetime] = Query(None),
+    fecha: str = Query("created_at", pattern="^(created_at|updated_at|fecha_confirmacion)$"),
+) -> FiltroInvitados:
+    """Dependency con los filtros comunes del listado, la exportación y las operaciones en lote"""
+    try:
+        estados = [EstadoInvitado(e) for e in estado] if estado else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Estado inválido")
+    return FiltroInvitados(
+        estado=estados,
+        codigo=codigo.strip().upper() if codigo else None,
+        desde=desde,
+        hasta=hasta,
+        fecha=fecha,
+    )
+
+
+def condiciones(filtros: FiltroInvitados) -> list:
+    """Condiciones WHERE equivalentes a los filtros"""
+    where = []
+    if filtros.estado:
+        where.append(Invitado.estado.in_(filtros.estado))
+    if filtros.codigo:
+        prefijo = filtros.codigo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        where.append(Invitado.codigo.like(f"{prefijo}%", escape="\\"))
+    columna_fecha = COLUMNAS_FECHA[filtros.fecha]
+    if filtros.desde:
+        where.append(columna_fecha >= filtros.desde)
+    if filtros.hasta:
+        where.append(columna_fecha <= filtros.hasta)
+    return where
+
+
+def codificar_cursor(orden: str, invitado: Invitado) -> str:
+    valor = getattr(invitado, orden)
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    crudo = json.dumps([orden, valor, invitado.id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str, orden: str):
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        campo, valor, ultimo_id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if campo == orden:
+            if not isinstance(ultimo_id, int) or isinstance(ultimo_id, bool):
+                raise TypeError("id inválido")
+            if valor is None and orden in COLUMNAS_NULABLES:
+                pass
+            elif orden in COLUMNAS_FECHA:
+                valor = datetime.fromisoformat(valor)
+            elif orden == "id":
+                valor = ultimo_id
+            elif not isinstance(valor, str):
+                raise TypeError("valor inválido")
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if campo != orden:
+        raise HTTPException(status_code=400, detail="El cursor no corresponde al orden solicitado")
+    return valor, ultimo_id
+
+
+def consultas_pagina(
+    filtros: FiltroInvitados,
+    orden: str,
+    limite: Optional[int],
+    cursor: Optional[str] = None,
+    dialecto: Optional[str] = None,
+) -> list:
+    """
+    SELECT de una página. `orden` es una clave de COLUMNAS_ORDEN, con prefijo
+    "-" para orden descendente. Se pide una fila extra para saber si hay más;
+    sin `limite` se devuelven todas las filas.
+
+    Con un cursor sobre una columna que admite NULL pueden ser dos consultas
+    (las filas con valor y las que no lo tienen, cada una un rango del índice):
+    se ejecutan en orden hasta juntar la página.
+    """
+    descendente = orden.startswith("-")
+    campo = orden.lstrip("-")
+    columna = COLUMNAS_ORDEN[campo]
+
+    stmt = select(Invitado).where(*condiciones(filtros))
+    if campo == "id":
+        stmt = stmt.order_by(Invitado.id.desc() if descendente else Invitado.id.asc())
+    elif descendente:
+        stmt = stmt.order_by(columna.desc(), Invitado.id.desc())
+    else:
+        stmt = stmt.order_by(columna.asc(), Invitado.id.asc())
+
+    consultas = [stmt]
+    if cursor:
+        valor, ultimo_id = decodificar_cursor(cursor, campo)
+        despues_id = Invitado.id < ultimo_id if descendente else Invitado.id > ultimo_id
+        nulos_al_final = descendente != (dialecto == "postgresql")
+        if campo == "id":
+            consultas = [stmt.where(despues_id)]
+        elif valor is None:
+            # El cursor está entre las filas sin valor, que van por id
+            consultas = [stmt.where(columna.is_(None), despues_id)]
+            if not nulos_al_final:
+                consultas.append(stmt.where(columna.is_not(None)))
+        else:
+            if campo in COLUMNAS_FECHA and dialecto == "sqlite":
+                # SQLite guarda func.now() como texto sin microsegundos y SQLAlchemy
+                # enviaría el parámetro con ".000000": se envía el texto en el mismo
+                # formato y la columna queda sin envolver, así se usa el índice (columna, id)
+                valor = literal(valor.isoformat(sep=" "), String)
+            if descendente:
+                consultas = [stmt.where(or_(columna < valor, and_(columna == valor, despues_id)))]
+            else:
+                consultas = [stmt.where(or_(columna > valor, and_(columna == valor, despues_id)))]
+            if campo in COLUMNAS_NULABLES and nulos_al_final:
+                consultas.append(stmt.where(columna.is_(None)))
+    return [c.limit(limite + 1) for c in consultas] if limite is not None else consultas
+
+
+def consulta_total(filtros: FiltroInvitados):
+    return select(func.count(Invitado.id)).where(*condiciones(filtros))
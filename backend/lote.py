@@ -0,0 +1,134 @@
+"""
+Operaciones en lote sobre invitados (actualizar, restablecer, eliminar)
+
+La selección es una lista de ids, los mismos filtros del listado
+(listado.filtros_invitados) o ambos a la vez; sin ninguno hay que pedir
+todos=true de forma explícita. Los cambios se aplican con un único UPDATE o
+DELETE sobre los ids seleccionados, con las mismas reglas de estado que
+actualizar_invitado expresadas en SQL:
+
+- pendiente: sin confirmación ni fecha, cantidades = máximos
+- confirmado: confirmación y fecha si no tenían, cantidades = máximos
+- rechazado: confirmación si no tenía, cantidades en 0
+- sin cambio de estado, los pendientes siguen confirmando sus máximos
+
+Los contadores de estadísticas se ajustan con la consulta agrupada de las
+filas afectadas antes y después del cambio, dentro de la misma transacción.
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from estadisticas import aplicar_diferencia, consulta_agregada, diferencia_agregada
+from listado import condiciones
+from models import EstadoInvitado, Invitado
+from rsvp import CONFIRMACION_NO, CONFIRMACION_SI
+from schemas import FiltroInvitados, InvitadosLote, InvitadosLoteUpdate
+
+# (uuid, código) de cada invitado afectado, para invalidar las cachés
+Afectados = List[Tuple[str, Optional[str]]]
+
+
+def condiciones_lote(seleccion: InvitadosLote, filtros: FiltroInvitados) -> list:
+    """WHERE de la selección; exige ids, algún filtro o todos=true"""
+    where = condiciones(filtros)
+    if seleccion.ids is not None:
+        where.append(Invitado.id.in_(seleccion.ids))
+    if not where and not seleccion.todos:
+        raise HTTPException(
+            status_code=400,
+            detail="Indica ids, algún filtro o todos=true para aplicar a todos los invitados",
+        )
+    return where
+
+
+def _sin_texto(columna):
+    """NULL si la columna está vacía (equivale a `if not valor` en Python)"""
+    return func.nullif(columna, "")
+
+
+def valores_actualizacion(cambios: InvitadosLoteUpdate) -> dict:
+    """SET del UPDATE; las expresiones leen los valores previos de cada fila"""
+    valores = {}
+    max_adultos = Invitado.max_adultos
+    max_ninos = Invitado.max_ninos
+    if cambios.max_adultos is not None:
+        valores["max_adultos"] = max_adultos = cambios.max_adultos
+    if cambios.max_ninos is not None:
+        valores["max_ninos"] = max_ninos = cambios.max_ninos
+
+    estado = cambios.estado
+    if estado is None:
+        if valores:
+            pendiente = Invitado.estado == EstadoInvitado.PENDIENTE
+            valores["cantidad_adultos"] = case((pendiente, max_adultos), else_=Invitado.cantidad_adultos)
+            valores["cantidad_ninos"] = case((pendiente, max_ninos), else_=Invitado.cantidad_ninos)
+        return valores
+
+    valores["estado"] = estado
+    if estado == EstadoInvitado.PENDIENTE:
+        valores.update(
+            confirmacion=None,
+            fecha_confirmacion=None,
+            cantidad_adultos=max_adultos,
+            cantidad_ninos=max_ninos,
+        )
+    elif estado == EstadoInvitado.CONFIRMADO:
+        valores.update(
+            confirmacion=func.coalesce(_sin_texto(Invitado.confirmacion), CONFIRMACION_SI),
+            fecha_confirmacion=func.coalesce(Invitado.fecha_confirmacion, datetime.utcnow()),
+            cantidad_adultos=max_adultos,
+            cantidad_ninos=max_ninos,
+        )
+    else:
+        valores.update(
+            confirmacion=func.coalesce(_sin_texto(Invitado.confirmacion), CONFIRMACION_NO),
+            cantidad_adultos=0,
+            cantidad_ninos=0,
+        )
+    return valores
+
+
+def _seleccionar(db: Session, where: list) -> Tuple[List[int], Afectados]:
+    # FOR UPDATE donde existe: nadie cambia las filas entre la lectura y el UPDATE
+    filas = db.execute(
+        select(Invitado.id, Invitado.uuid, Invitado.codigo).where(*where).with_for_update()
+    ).all()
+    return [f.id for f in filas], [(f.uuid, f.codigo) for f in filas]
+
+
+def actualizar_lote(db: Session, cambios: InvitadosLoteUpdate, where: list) -> Afectados:
+    """Aplica los cambios a los invitados seleccionados sin confirmar la transacción"""
+    valores = valores_actualizacion(cambios)
+    if not valores:
+        raise HTTPException(status_code=400, detail="No hay cambios que aplicar")
+    ids, afectados = _seleccionar(db, where)
+    if not ids:
+        return afectados
+    por_id = Invitado.id.in_(ids)
+    antes = db.execute(consulta_agregada().where(por_id)).all() if settings.STATS_COUNTERS else None
+    db.execute(
+        update(Invitado).where(por_id).values(**valores)
+        .execution_options(synchronize_session=False)
+    )
+    if settings.STATS_COUNTERS:
+        despues = db.execute(consulta_agregada().where(por_id)).all()
+        aplicar_diferencia(db, diferencia_agregada(antes, despues))
+    return afectados
+
+
+def eliminar_lote(db: Session, where: list) -> Afectados:
+    """Elimina los invitados seleccionados sin confirmar la transacción"""
+    ids, afectados = _seleccionar(db, where)
+    if not ids:
+        return afectados
+    por_id = Invitado.id.in_(ids)
+    if settings.STATS_COUNTERS:
+        antes = db.execute(consulta_agregada().where(por_id)).all()
+        aplicar_diferencia(db, diferencia_agregada(antes, []))
+    db.execute(delete(Invitado).where(por_id).execution_options(synchronize_session=False))
+    return afectados
@@ -1,47 +1,105 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Query, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import uuid
 import os
-import json
+import hmac
+from urllib.parse import quote
 
-from database import engine, get_db, Base
+from database import get_async_db, SessionLocal
 from models import Invitado, AdminUser, EstadoInvitado
 from schemas import (
     InvitadoCreate, InvitadoUpdate, InvitadoResponse, InvitadoRSVP,
-    AdminLogin, Token
+    AdminLogin, Token, FiltroInvitados, InvitadosLote, InvitadosLoteUpdate, ResultadoLote
 )
 from auth import (
-    verify_password, get_password_hash, create_access_token,
-    get_current_user
+    verify_password_async, get_password_hash_async, needs_rehash, create_access_token,
+    get_current_user, invalidar_usuario, oauth2_scheme,
+    SesionEventos, crear_token_eventos, get_sesion_eventos, usuario_vigente
 )
 from config import settings
-
-# Crear tablas
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="API Invitaciones Digitales", version="1.0.0")
+from cache import estadisticas_caches
+from evento_cache import EventoStore, etag_coincide, evento_response
+from codigos import asignar_codigos
+from listado import (
+    filtros_invitados, consultas_pagina, consulta_total, codificar_cursor, LIMITE_MAXIMO
+)
+from estadisticas import (
+    huella, diferencia, aplicar_diferencia, estadisticas_actuales,
+    leer_contadores, recalcular_contadores
+)
+import notificaciones
+from exportacion import exportar_csv, exportar_xlsx, nombre_archivo
+from lote import condiciones_lote, actualizar_lote, eliminar_lote
+from importacion import filas_csv, filas_ndjson, validar_fila, ReporteImportacion
+from paginas import CachePaginas, json_en_html, respuesta_pagina
+from rsvp import aplicar_rsvp, respuestas_idempotentes
+import cache_invitados
+import escritura
+import serializacion
+import qr_invitados
+import metricas
+import perfilado_sql
+from estaticos import MANIFEST_PATH, registrar_en_plantillas, respuesta_estatico
+from imagenes_og import CLAVE_GENERAL, datos_tarjeta, generar_tarjeta_async, huella_tarjeta, ruta_tarjeta
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.STATS_COUNTERS and settings.WEB_CONCURRENCY <= 1:
+        # Los contadores pudieron quedar desfasados mientras estuvieron
+        # desactivados. Con varios workers lo hace init_db.py una sola vez
+        with SessionLocal() as db:
+            recalcular_contadores(db)
+            db.commit()
+    qr_invitados.iniciar_pool()
+    yield
+    qr_invitados.cerrar_pool()
+
+
+app = FastAPI(title="API Invitaciones Digitales", version="1.0.0", lifespan=lifespan)
 
 # Obtener rutas base
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
 EVENTO_JSON_PATH = os.path.join(BASE_DIR, "evento.json")
 
-# Funciones para manejar el JSON del evento
+# Funciones para manejar el JSON del evento (cacheado en memoria)
+evento_store = EventoStore(EVENTO_JSON_PATH)
+
 def load_evento_data():
-    if not os.path.exists(EVENTO_JSON_PATH):
-        return {}
-    with open(EVENTO_JSON_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return evento_store.load()
 
 def save_evento_data(data):
-    with open(EVENTO_JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    evento_store.save(data)
+
+def prefijo_codigo() -> str:
+    """Prefijo de los códigos de invitado del evento actual"""
+    return (load_evento_data().get("prefijo_codigo") or settings.CODIGO_PREFIX).strip().upper()
+
+def base_url_peticion(request: Request) -> str:
+    """BASE_URL de configuración o, si no está, la URL base de la petición"""
+    if settings.BASE_URL:
+        return settings.BASE_URL.rstrip('/')
+    # Construir URL base desde los headers de la petición
+    scheme = request.url.scheme
+    # Verificar si hay un proxy que indique HTTPS
+    if request.headers.get("x-forwarded-proto") == "https":
+        scheme = "https"
+    elif request.headers.get("x-forwarded-ssl") == "on":
+        scheme = "https"
+    
+    host = request.headers.get("host") or request.url.netloc
+    return f"{scheme}://{host}"
 
 # Montar archivos estáticos
 app.mount("/front", StaticFiles(directory=os.path.join(PROJECT_ROOT, "front")), name="front")
@@ -49,6 +107,13 @@ app.mount("/elementos", StaticFiles(directory=os.path.join(PROJECT_ROOT, "elemen
 
 # Configurar templates
 templates = Jinja2Templates(directory=os.path.join(PROJECT_ROOT, "front"))
+registrar_en_plantillas(templates)
+
+# index.html renderizado por URL base y consulta (ver paginas.py); también
+# se invalida cuando un build nuevo cambia las URLs de los estáticos
+paginas_index = CachePaginas(
+    "paginas_index", os.path.join(PROJECT_ROOT, "front", "index.html"), MANIFEST_PATH
+)
 
 # CORS
 app.add_middleware(
@@ -57,34 +122,66 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "Link", "Idempotent-Replayed"],
 )
 
+# Métricas por ruta (ver metricas.py); desactivadas no agregan ningún costo
+if settings.METRICS_ENABLED:
+    app.add_middleware(metricas.MetricasMiddleware)
+
+# Consultas lentas y sentencias repetidas por petición (ver perfilado_sql.py)
+if settings.SQL_PROFILE:
+    app.add_middleware(perfilado_sql.PerfiladoMiddleware)
+
+
+def notificar_invitado(accion: str, estadisticas: dict, invitado: Optional[Invitado] = None, invitado_id: Optional[int] = None):
+    """Publica el cambio de un invitado a los paneles administrativos conectados"""
+    datos = {"accion": accion, "estadisticas": estadisticas}
+    if invitado is not None:
+        datos["invitado"] = InvitadoResponse.model_validate(invitado).model_dump(mode="json")
+        invitado_id = invitado.id
+    datos["id"] = invitado_id
+    notificaciones.publicar("invitado", datos)
+
 
 # ==================== RUTAS DE PÁGINAS ====================
 
 @app.get("/", response_class=HTMLResponse)
-async def serve_index(request: Request):
+async def serve_index(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Sirve la página principal de la invitación"""
     # Obtener la URL base para los meta tags
-    # Priorizar BASE_URL de configuración, luego usar request.base_url
-    if settings.BASE_URL:
-        base_url = settings.BASE_URL.rstrip('/')
-    else:
-        # Construir URL base desde los headers de la petición
-        scheme = request.url.scheme
-        # Verificar si hay un proxy que indique HTTPS
-        if request.headers.get("x-forwarded-proto") == "https":
-            scheme = "https"
-        elif request.headers.get("x-forwarded-ssl") == "on":
-            scheme = "https"
-        
-        host = request.headers.get("host") or request.url.netloc
-        base_url = f"{scheme}://{host}"
+    base_url = base_url_peticion(request)
     
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "base_url": base_url
-    })
+    # Con ?uuid= los datos de la invitación van incrustados en la página y el
+    # front no necesita llamar a la API antes de mostrarla
+    datos = None
+    uuid_invitado = request.query_params.get("uuid") or None
+    if uuid_invitado:
+        cuerpo_invitado = await cache_invitados.leer_por_uuid(db, uuid_invitado)
+        if cuerpo_invitado is not None:
+            datos = cache_invitados.datos_por_uuid(uuid_invitado, cuerpo_invitado, evento_store.snapshot())
+
+    # La plantilla solo depende de base_url, el uuid y los datos incrustados: el
+    # resto de la query (fbclid, utm_*...) no cambia la página ni crea otra entrada,
+    # y un uuid inexistente recibe la página general
+    if datos is None:
+        uuid_invitado = None
+    page_url = f"{base_url}/" + (f"?uuid={quote(uuid_invitado, safe='')}" if uuid_invitado else "")
+    clave = (base_url, uuid_invitado, datos)
+    pagina = await paginas_index.obtener(
+        clave,
+        lambda: templates.get_template("index.html").render(
+            request=request, base_url=base_url, page_url=page_url,
+            uuid_invitado=uuid_invitado, datos_invitacion=json_en_html(datos)
+        ),
+    )
+    return respuesta_pagina(request, pagina)
+
+
+@app.get("/static/{ruta:path}")
+async def serve_estatico(ruta: str, request: Request):
+    """Estáticos versionados del build (inmutables, con negociación de formato y compresión)"""
+    return respuesta_estatico(request, ruta)
 
 
 @app.get("/admin", response_class=HTMLResponse)
@@ -96,7 +193,7 @@ async def serve_admin(request: Request):
 # ==================== AUTENTICACIÓN ====================
 
 @app.post("/api/auth/login", response_model=Token)
-async def login(login_data: AdminLogin, db: Session = Depends(get_db)):
+async def login(login_data: AdminLogin, db: AsyncSession = Depends(get_async_db)):
     """Login para el panel administrativo"""
     if login_data.secret_code != settings.ADMIN_SECRET_CODE:
         raise HTTPException(
@@ -104,8 +201,8 @@ async def login(login_data: AdminLogin, db: Session = Depends(get_db)):
             detail="Código secreto incorrecto"
         )
     
-    user = db.query(AdminUser).filter(AdminUser.username == login_data.username).first()
-    if not user or not verify_password(login_data.password, user.password_hash):
+    user = await db.scalar(select(AdminUser).where(AdminUser.username == login_data.username))
+    if not user or not await verify_password_async(login_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario o contraseña incorrectos"
@@ -117,6 +214,12 @@ async def login(login_data: AdminLogin, db: Session = Depends(get_db)):
             detail="Usuario inactivo"
         )
     
+    # Regenerar el hash si cambió BCRYPT_ROUNDS (la contraseña en claro solo se tiene aquí)
+    if needs_rehash(user.password_hash):
+        user.password_hash = await get_password_hash_async(login_data.password)
+        await db.commit()
+        invalidar_usuario(user.username)
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -128,268 +231,628 @@ async def login(login_data: AdminLogin, db: Session = Depends(get_db)):
 # ==================== ENDPOINTS PÚBLICOS ====================
 
 @app.get("/api/invitado/{uuid_invitado}", response_model=InvitadoResponse)
-async def obtener_invitado_por_uuid(uuid_invitado: str, db: Session = Depends(get_db)):
+async def obtener_invitado_por_uuid(uuid_invitado: str, db: AsyncSession = Depends(get_async_db)):
     """Obtiene un invitado por su UUID (público)"""
-    invitado = db.query(Invitado).filter(Invitado.uuid == uuid_invitado).first()
-    if not invitado:
+    cuerpo = await cache_invitados.leer_por_uuid(db, uuid_invitado)
+    if cuerpo is None:
         raise HTTPException(status_code=404, detail="Invitado no encontrado")
-    return invitado
+    return Response(content=cuerpo, media_type="application/json")
 
 
 @app.get("/api/invitado-codigo/{codigo}", response_model=InvitadoResponse)
-async def obtener_invitado_por_codigo(codigo: str, db: Session = Depends(get_db)):
+async def obtener_invitado_por_codigo(codigo: str, db: AsyncSession = Depends(get_async_db)):
     """Obtiene un invitado por su código legible (público)"""
-    invitado = db.query(Invitado).filter(Invitado.codigo == codigo.upper()).first()
-    if not invitado:
+    cuerpo = await cache_invitados.leer_por_codigo(db, codigo)
+    if cuerpo is None:
         raise HTTPException(status_code=404, detail="Invitado no encontrado")
-    return invitado
+    return Response(content=cuerpo, media_type="application/json")
+
+
+@app.get("/api/invitado/{uuid_invitado}/og.jpg")
+async def imagen_og_invitado(uuid_invitado: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Tarjeta Open Graph con el nombre del invitado (pública, la piden los crawlers)"""
+    fila = (await db.execute(
+        select(Invitado.id, Invitado.nombres).where(Invitado.uuid == uuid_invitado)
+    )).first()
+    # Un uuid desconocido recibe la tarjeta genérica en lugar de un 404 sin vista previa
+    clave, nombres = (fila.id, fila.nombres) if fila else (CLAVE_GENERAL, None)
+    datos = datos_tarjeta(nombres, load_evento_data())
+    huella = huella_tarjeta(datos)
+    headers = {"ETag": f'"{huella}"', "Cache-Control": "public, max-age=3600"}
+    if etag_coincide(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    ruta = ruta_tarjeta(clave, huella)
+    if not os.path.exists(ruta):
+        ruta = await generar_tarjeta_async(clave, datos)
+    return FileResponse(ruta, media_type="image/jpeg", headers=headers)
 
 
 @app.get("/api/evento")
-async def obtener_evento():
+async def obtener_evento(request: Request):
     """Obtiene la información del evento desde el JSON (público)"""
-    return load_evento_data()
+    return evento_response(request, evento_store.snapshot())
 
 
 @app.get("/api/datos-completos/{uuid_invitado}")
-async def obtener_datos_completos(uuid_invitado: str, db: Session = Depends(get_db)):
+async def obtener_datos_completos(uuid_invitado: str, db: AsyncSession = Depends(get_async_db)):
     """Obtiene todos los datos del evento y el invitado específico (público)"""
-    invitado = db.query(Invitado).filter(Invitado.uuid == uuid_invitado).first()
-    if not invitado:
+    cuerpo_invitado = await cache_invitados.leer_por_uuid(db, uuid_invitado)
+    if cuerpo_invitado is None:
         raise HTTPException(status_code=404, detail="Invitado no encontrado")
     
-    evento_data = load_evento_data()
-    
-    # Retornar estructura compatible
-    return {
-        "evento": evento_data,
-        "invitados": [invitado],
-        "padres": evento_data.get("padres", {})
-    }
+    # Estructura compatible: {"evento": ..., "invitados": [invitado], "padres": ...}
+    cuerpo = cache_invitados.datos_por_uuid(uuid_invitado, cuerpo_invitado, evento_store.snapshot())
+    return Response(content=cuerpo, media_type="application/json")
+
+
+@app.get("/api/datos-completos-codigo/{codigo}")
+async def obtener_datos_completos_por_codigo(codigo: str, db: AsyncSession = Depends(get_async_db)):
+    """Igual que /api/datos-completos pero a partir del código legible: una sola petición (público)"""
+    cuerpo_invitado = await cache_invitados.leer_por_codigo(db, codigo)
+    if cuerpo_invitado is None:
+        raise HTTPException(status_code=404, detail="Invitado no encontrado")
+    cuerpo = cache_invitados.datos_por_codigo(codigo, cuerpo_invitado, evento_store.snapshot())
+    return Response(content=cuerpo, media_type="application/json")
 
 
 @app.post("/api/invitado/{uuid_invitado}/rsvp", response_model=InvitadoResponse)
 async def confirmar_rsvp(
     uuid_invitado: str,
     rsvp: InvitadoRSVP,
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Confirma o rechaza la asistencia (público)"""
-    invitado = db.query(Invitado).filter(Invitado.uuid == uuid_invitado).first()
+    clave = (uuid_invitado, idempotency_key) if idempotency_key else None
+    if clave:
+        previa = respuestas_idempotentes.get(clave)
+        if previa is not None:
+            enviada, cuerpo = previa
+            if enviada != rsvp.model_dump():
+                raise HTTPException(status_code=422, detail="Idempotency-Key ya usada con otra respuesta")
+            return Response(content=cuerpo, media_type="application/json", headers={"Idempotent-Replayed": "true"})
+
+    async def registrar(db_escritura: AsyncSession):
+        antes = None
+        if settings.STATS_COUNTERS:
+            # Los contadores necesitan el estado previo: se lee y bloquea solo esa parte
+            fila = (await db_escritura.execute(
+                select(Invitado.estado, Invitado.cantidad_adultos, Invitado.cantidad_ninos)
+                .where(Invitado.uuid == uuid_invitado).with_for_update()
+            )).first()
+            if fila is None:
+                return None, False
+            antes = huella(fila)
+
+        invitado, cambio = await aplicar_rsvp(db_escritura, uuid_invitado, rsvp)
+        if cambio and settings.STATS_COUNTERS:
+            deltas = diferencia(antes, huella(invitado))
+            await db_escritura.run_sync(lambda s: aplicar_diferencia(s, deltas))
+        return invitado, cambio
+
+    invitado, cambio = await escritura.ejecutar(registrar)
     if not invitado:
         raise HTTPException(status_code=404, detail="Invitado no encontrado")
-    
-    if rsvp.confirmacion == "si":
-        invitado.estado = EstadoInvitado.CONFIRMADO
-        invitado.confirmacion = "Si, asistiremos."
-        
-        # Manejar adultos y niños
-        if rsvp.cantidad_adultos is not None:
-            invitado.cantidad_adultos = min(rsvp.cantidad_adultos, invitado.max_adultos)
-        else:
-            invitado.cantidad_adultos = invitado.max_adultos
-        
-        if rsvp.cantidad_ninos is not None:
-            invitado.cantidad_ninos = min(rsvp.cantidad_ninos, invitado.max_ninos)
-        else:
-            invitado.cantidad_ninos = invitado.max_ninos
-        
-        # cantidad_personas se calcula automáticamente como propiedad
-    else:
-        invitado.estado = EstadoInvitado.RECHAZADO
-        invitado.confirmacion = "No podremos asistir"
-        invitado.cantidad_adultos = 0
-        invitado.cantidad_ninos = 0
-    
-    invitado.fecha_confirmacion = datetime.utcnow()
-    
-    db.commit()
-    db.refresh(invitado)
-    
-    return invitado
+
+    if cambio:
+        cache_invitados.invalidar_invitado(invitado.uuid, invitado.codigo)
+        if notificaciones.hay_suscriptores():
+            notificar_invitado("rsvp", await db.run_sync(estadisticas_actuales), invitado=invitado)
+
+    cuerpo = serializacion.invitado_json(invitado)
+    if clave:
+        respuestas_idempotentes.set(clave, (rsvp.model_dump(), cuerpo))
+    return Response(content=cuerpo, media_type="application/json")
 
 
 # ==================== ENDPOINTS ADMINISTRATIVOS ====================
 
 @app.get("/api/admin/invitados", response_model=List[InvitadoResponse])
 async def listar_invitados(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    filtros: FiltroInvitados = Depends(filtros_invitados),
+    orden: str = Query("id", pattern="^-?(id|updated_at|created_at|codigo|nombres)$"),
+    limite: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
-    """Lista todos los invitados (requiere autenticación)"""
-    invitados = db.query(Invitado).all()
+    """
+    Lista los invitados (requiere autenticación). Admite filtros (estado, prefijo
+    de código, rango de fechas), orden en servidor y paginación por cursor:
+    con `limite` se devuelve una página y el cursor de la siguiente en
+    X-Next-Cursor / Link. Sin `limite` se devuelven todos. X-Total-Count
+    trae el total de filas que cumplen los filtros.
+    """
+    if cursor and limite is None:
+        limite = 100
+    headers = {"X-Total-Count": str(await db.scalar(consulta_total(filtros)))}
+
+    invitados = []
+    for consulta in consultas_pagina(filtros, orden, limite, cursor, dialecto=db.bind.dialect.name):
+        if settings.FAST_JSON:
+            # Solo columnas: ni objetos ORM ni validación (ver serializacion.py)
+            invitados += (await db.execute(consulta.with_only_columns(*serializacion.COLUMNAS_FILA))).all()
+        else:
+            invitados += await db.scalars(consulta)
+        if limite is not None and len(invitados) > limite:
+            break
+    if limite is not None and len(invitados) > limite:
+        invitados = invitados[:limite]
+        siguiente = codificar_cursor(orden.lstrip("-"), invitados[-1])
+        headers["X-Next-Cursor"] = siguiente
+        headers["Link"] = f'<{request.url.include_query_params(cursor=siguiente)}>; rel="next"'
+
+    if settings.FAST_JSON:
+        return Response(content=serializacion.lista_json(invitados), media_type="application/json", headers=headers)
+    response.headers.update(headers)
     return invitados
 
 
 @app.post("/api/admin/invitados", response_model=InvitadoResponse)
 async def crear_invitado(
     invitado: InvitadoCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """Crea un nuevo invitado (requiere autenticación)"""
-    if not invitado.codigo:
-        ultimo_codigo = db.query(Invitado).order_by(Invitado.id.desc()).first()
-        if ultimo_codigo:
-            try:
-                num = int(ultimo_codigo.codigo.split('-')[1])
-                nuevo_num = num + 1
-            except:
-                nuevo_num = 1
+    prefijo = prefijo_codigo()
+
+    def crear(s: Session) -> Invitado:
+        if not invitado.codigo:
+            codigo = asignar_codigos(s, prefijo, 1)[0]
         else:
-            nuevo_num = 1
-        codigo = f"FM2026-{str(nuevo_num).zfill(3)}"
-    else:
-        existe = db.query(Invitado).filter(Invitado.codigo == invitado.codigo).first()
-        if existe:
-            raise HTTPException(status_code=400, detail="El código ya existe")
-        codigo = invitado.codigo
+            existe = s.query(Invitado).filter(Invitado.codigo == invitado.codigo).first()
+            if existe:
+                raise HTTPException(status_code=400, detail="El código ya existe")
+            codigo = invitado.codigo
+        
+        # Obtener adultos y niños
+        max_adultos = invitado.max_adultos
+        max_ninos = invitado.max_ninos or 0
+        
+        nuevo_invitado = Invitado(
+            uuid=str(uuid.uuid4()),
+            codigo=codigo,
+            nombres=invitado.nombres,
+            max_adultos=max_adultos,
+            max_ninos=max_ninos,
+            cantidad_adultos=max_adultos,
+            cantidad_ninos=max_ninos,
+            estado=EstadoInvitado.PENDIENTE
+        )
+        
+        s.add(nuevo_invitado)
+        if settings.STATS_COUNTERS:
+            aplicar_diferencia(s, diferencia(None, huella(nuevo_invitado)))
+        s.flush()
+        s.refresh(nuevo_invitado)
+        return nuevo_invitado
+
+    try:
+        nuevo_invitado = await escritura.ejecutar_sync(crear)
+    except IntegrityError:
+        # Otro administrador guardó el mismo código entre la verificación y el commit
+        raise HTTPException(status_code=400, detail="El código ya existe")
     
-    # Obtener adultos y niños
-    max_adultos = invitado.max_adultos
-    max_ninos = invitado.max_ninos or 0
+    if notificaciones.hay_suscriptores():
+        notificar_invitado("creado", await db.run_sync(estadisticas_actuales), invitado=nuevo_invitado)
     
-    nuevo_invitado = Invitado(
-        uuid=str(uuid.uuid4()),
-        codigo=codigo,
-        nombres=invitado.nombres,
-        max_adultos=max_adultos,
-        max_ninos=max_ninos,
-        cantidad_adultos=max_adultos,
-        cantidad_ninos=max_ninos,
-        estado=EstadoInvitado.PENDIENTE
+    return serializacion.respuesta_invitado(nuevo_invitado)
+
+
+def _formato_importacion(content_type: str) -> str:
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json"):
+        return "ndjson"
+    return "csv"
+
+
+@app.post("/api/admin/invitados/import")
+async def importar_invitados(
+    request: Request,
+    formato: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    lote: Optional[int] = Query(None, ge=1, le=10000),
+    todo_o_nada: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Importa invitados en masa desde CSV (encabezado: nombres,max_adultos,max_ninos,codigo)
+    o NDJSON. Las filas válidas se insertan por lotes en una sola transacción y se
+    devuelve el reporte de errores por fila. Con todo_o_nada=true cualquier error
+    revierte la importación completa (requiere autenticación)
+    """
+    formato = formato or _formato_importacion(request.headers.get("content-type", ""))
+    filas = filas_csv(request.stream()) if formato == "csv" else filas_ndjson(request.stream())
+    tam_lote = lote or settings.IMPORT_BATCH_SIZE
+
+    reporte = ReporteImportacion()
+    codigos_archivo = set()
+    prefijo = prefijo_codigo()
+
+    async def volcar_lote(pendientes, generados):
+        explicitos = [inv.codigo for _, inv in pendientes if inv.codigo]
+        existentes = set()
+        if explicitos:
+            existentes = set(await db.scalars(select(Invitado.codigo).where(Invitado.codigo.in_(explicitos))))
+
+        registros = []
+        for fila, inv in pendientes:
+            if inv.codigo and inv.codigo in existentes:
+                reporte.error(fila, "El código ya existe")
+                continue
+            max_ninos = inv.max_ninos or 0
+            registros.append({
+                "uuid": str(uuid.uuid4()),
+                "codigo": inv.codigo or next(generados),
+                "nombres": inv.nombres,
+                "max_adultos": inv.max_adultos,
+                "max_ninos": max_ninos,
+                "cantidad_adultos": inv.max_adultos,
+                "cantidad_ninos": max_ninos,
+                "estado": EstadoInvitado.PENDIENTE,
+            })
+        if registros:
+            await db.execute(insert(Invitado), registros)
+            reporte.importados += len(registros)
+            if settings.STATS_COUNTERS:
+                deltas = {EstadoInvitado.PENDIENTE: (
+                    len(registros),
+                    sum(r["cantidad_adultos"] for r in registros),
+                    sum(r["cantidad_ninos"] for r in registros),
+                )}
+                await db.run_sync(lambda s: aplicar_diferencia(s, deltas))
+
+    # Primero se recibe y valida todo el archivo, sin transacción abierta: la
+    # subida depende de la red del cliente y no debe frenar otras escrituras
+    validas = []
+    async for fila, datos, error in filas:
+        reporte.total_filas = max(reporte.total_filas, fila)
+        if error:
+            reporte.error(fila, error)
+            continue
+        invitado, errores = validar_fila(datos)
+        if errores:
+            reporte.error(fila, errores)
+            continue
+        if invitado.codigo:
+            if invitado.codigo in codigos_archivo:
+                reporte.error(fila, "Código duplicado en el archivo")
+                continue
+            codigos_archivo.add(invitado.codigo)
+        validas.append((fila, invitado))
+
+    if todo_o_nada and reporte.con_errores:
+        return JSONResponse(status_code=422, content=reporte.to_dict())
+
+    # Con SQLite la cola de escrituras espera solo mientras se insertan los lotes
+    async with escritura.exclusivo():
+        try:
+            # Los códigos de las filas que no traen uno se reservan en una
+            # transacción propia y corta: si la importación se revierte quedan
+            # huecos, pero la fila de la secuencia no se bloquea hasta el final
+            sin_codigo = sum(1 for _, inv in validas if not inv.codigo)
+            generados = iter(())
+            if sin_codigo:
+                generados = iter(await db.run_sync(
+                    lambda s: asignar_codigos(s, prefijo, sin_codigo, ocupados=codigos_archivo)
+                ))
+                await db.commit()
+
+            for inicio in range(0, len(validas), tam_lote):
+                await volcar_lote(validas[inicio:inicio + tam_lote], generados)
+
+            if todo_o_nada and reporte.con_errores:
+                await db.rollback()
+                reporte.importados = 0
+                return JSONResponse(status_code=422, content=reporte.to_dict())
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Conflicto de códigos durante la importación, intenta de nuevo")
+
+    if reporte.importados and notificaciones.hay_suscriptores():
+        notificaciones.publicar("importacion", {
+            "importados": reporte.importados,
+            "estadisticas": await db.run_sync(estadisticas_actuales),
+        })
+
+    return reporte.to_dict()
+
+
+@app.get("/api/admin/invitados/export")
+async def exportar_invitados(
+    formato: str = Query("csv", alias="format", pattern="^(csv|xlsx)$"),
+    filtros: FiltroInvitados = Depends(filtros_invitados),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Exporta la lista de invitados (con max_personas y cantidad_personas) en CSV
+    o XLSX, en streaming y con los mismos filtros que el listado (requiere autenticación)
+    """
+    if formato == "xlsx":
+        contenido = exportar_xlsx(filtros)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        contenido = exportar_csv(filtros)
+        media_type = "text/csv; charset=utf-8"
+    return StreamingResponse(
+        contenido,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre_archivo(formato)}"'},
+    )
+
+
+@app.get("/api/admin/invitados/enlaces")
+async def listar_enlaces(
+    request: Request,
+    filtros: FiltroInvitados = Depends(filtros_invitados),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Link personal de cada invitado (con BASE_URL o, si no está configurado, la
+    URL de la petición), con los mismos filtros que el listado (requiere autenticación)
+    """
+    filas = (await db.execute(qr_invitados.consulta_enlaces(filtros))).all()
+    return [e._asdict() for e in qr_invitados.enlaces(filas, base_url_peticion(request))]
+
+
+@app.get("/api/admin/invitados/qr")
+async def descargar_qr(
+    request: Request,
+    formato: str = Query("png", pattern="^(png|svg|pdf)$"),
+    filtros: FiltroInvitados = Depends(filtros_invitados),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Códigos QR de los links personales: ZIP con un PNG o SVG por invitado y
+    links.csv, o la hoja PDF imprimible con formato=pdf. Solo se dibujan los
+    QR que no están en la caché de disco (requiere autenticación)
+    """
+    if not qr_invitados.disponible():
+        raise HTTPException(status_code=503, detail="Instala qrcode para generar los códigos QR")
+    filas = (await db.execute(qr_invitados.consulta_enlaces(filtros))).all()
+    items = qr_invitados.enlaces(filas, base_url_peticion(request))
+    rutas = await qr_invitados.generar_todos_async(items, "png" if formato == "pdf" else formato)
+    if formato == "pdf":
+        contenido = await qr_invitados.en_pool(qr_invitados.hoja_pdf, items, rutas)
+        media_type, nombre = "application/pdf", "invitaciones-qr.pdf"
+    else:
+        contenido = await qr_invitados.en_pool(qr_invitados.archivo_zip, items, rutas, formato)
+        media_type, nombre = "application/zip", f"invitaciones-qr-{formato}.zip"
+    return Response(
+        content=contenido,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
     )
-    
-    db.add(nuevo_invitado)
-    db.commit()
-    db.refresh(nuevo_invitado)
-    
-    return nuevo_invitado
 
 
 @app.put("/api/admin/invitados/{invitado_id}", response_model=InvitadoResponse)
 async def actualizar_invitado(
     invitado_id: int,
     invitado: InvitadoUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """Actualiza un invitado (requiere autenticación)"""
-    db_invitado = db.query(Invitado).filter(Invitado.id == invitado_id).first()
-    if not db_invitado:
-        raise HTTPException(status_code=404, detail="Invitado no encontrado")
+    def actualizar(s: Session) -> Invitado:
+        db_invitado = s.query(Invitado).filter(Invitado.id == invitado_id).with_for_update().first()
+        if not db_invitado:
+            raise HTTPException(status_code=404, detail="Invitado no encontrado")
+        antes = huella(db_invitado)
     
-    if invitado.nombres is not None:
-        db_invitado.nombres = invitado.nombres
+        if invitado.nombres is not None:
+            db_invitado.nombres = invitado.nombres
     
-    # Actualizar adultos y niños (max_personas se calcula automáticamente)
-    if invitado.max_adultos is not None:
-        db_invitado.max_adultos = invitado.max_adultos
-        if db_invitado.estado == EstadoInvitado.PENDIENTE:
-            db_invitado.cantidad_adultos = invitado.max_adultos
+        # Actualizar adultos y niños (max_personas se calcula automáticamente)
+        if invitado.max_adultos is not None:
+            db_invitado.max_adultos = invitado.max_adultos
+            if db_invitado.estado == EstadoInvitado.PENDIENTE:
+                db_invitado.cantidad_adultos = invitado.max_adultos
     
-    if invitado.max_ninos is not None:
-        db_invitado.max_ninos = invitado.max_ninos
-        if db_invitado.estado == EstadoInvitado.PENDIENTE:
-            db_invitado.cantidad_ninos = invitado.max_ninos
+        if invitado.max_ninos is not None:
+            db_invitado.max_ninos = invitado.max_ninos
+            if db_invitado.estado == EstadoInvitado.PENDIENTE:
+                db_invitado.cantidad_ninos = invitado.max_ninos
     
-    # Si se actualizan adultos y niños, actualizar cantidades si está pendiente
-    if (invitado.max_adultos is not None or invitado.max_ninos is not None) and db_invitado.estado == EstadoInvitado.PENDIENTE:
-        db_invitado.cantidad_adultos = db_invitado.max_adultos
-        db_invitado.cantidad_ninos = db_invitado.max_ninos
-    if invitado.max_adultos is not None:
-        db_invitado.max_adultos = invitado.max_adultos
-        if db_invitado.estado == EstadoInvitado.PENDIENTE:
-            db_invitado.cantidad_adultos = invitado.max_adultos
-    if invitado.max_ninos is not None:
-        db_invitado.max_ninos = invitado.max_ninos
-        if db_invitado.estado == EstadoInvitado.PENDIENTE:
-            db_invitado.cantidad_ninos = invitado.max_ninos
+        # Si se actualizan adultos y niños, actualizar cantidades si está pendiente
+        if (invitado.max_adultos is not None or invitado.max_ninos is not None) and db_invitado.estado == EstadoInvitado.PENDIENTE:
+            db_invitado.cantidad_adultos = db_invitado.max_adultos
+            db_invitado.cantidad_ninos = db_invitado.max_ninos
+        if invitado.max_adultos is not None:
+            db_invitado.max_adultos = invitado.max_adultos
+            if db_invitado.estado == EstadoInvitado.PENDIENTE:
+                db_invitado.cantidad_adultos = invitado.max_adultos
+        if invitado.max_ninos is not None:
+            db_invitado.max_ninos = invitado.max_ninos
+            if db_invitado.estado == EstadoInvitado.PENDIENTE:
+                db_invitado.cantidad_ninos = invitado.max_ninos
     
-    # Permitir cambiar el estado
-    if invitado.estado is not None:
-        try:
-            nuevo_estado = EstadoInvitado(invitado.estado)
-            db_invitado.estado = nuevo_estado
+        # Permitir cambiar el estado
+        if invitado.estado is not None:
+            try:
+                nuevo_estado = EstadoInvitado(invitado.estado)
+                db_invitado.estado = nuevo_estado
             
-            # Si se cambia a pendiente, resetear confirmación y cantidad
-            if nuevo_estado == EstadoInvitado.PENDIENTE:
-                db_invitado.confirmacion = None
-                db_invitado.fecha_confirmacion = None
-                db_invitado.cantidad_adultos = db_invitado.max_adultos
-                db_invitado.cantidad_ninos = db_invitado.max_ninos
-            # Si se cambia a confirmado, establecer valores por defecto
-            elif nuevo_estado == EstadoInvitado.CONFIRMADO:
-                if not db_invitado.confirmacion:
-                    db_invitado.confirmacion = "Si, asistiremos."
-                db_invitado.cantidad_adultos = db_invitado.max_adultos
-                db_invitado.cantidad_ninos = db_invitado.max_ninos
-                if not db_invitado.fecha_confirmacion:
-                    db_invitado.fecha_confirmacion = datetime.utcnow()
-            # Si se cambia a rechazado
-            elif nuevo_estado == EstadoInvitado.RECHAZADO:
-                if not db_invitado.confirmacion:
-                    db_invitado.confirmacion = "No podremos asistir"
-                db_invitado.cantidad_adultos = 0
-                db_invitado.cantidad_ninos = 0
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Estado inválido")
+                # Si se cambia a pendiente, resetear confirmación y cantidad
+                if nuevo_estado == EstadoInvitado.PENDIENTE:
+                    db_invitado.confirmacion = None
+                    db_invitado.fecha_confirmacion = None
+                    db_invitado.cantidad_adultos = db_invitado.max_adultos
+                    db_invitado.cantidad_ninos = db_invitado.max_ninos
+                # Si se cambia a confirmado, establecer valores por defecto
+                elif nuevo_estado == EstadoInvitado.CONFIRMADO:
+                    if not db_invitado.confirmacion:
+                        db_invitado.confirmacion = "Si, asistiremos."
+                    db_invitado.cantidad_adultos = db_invitado.max_adultos
+                    db_invitado.cantidad_ninos = db_invitado.max_ninos
+                    if not db_invitado.fecha_confirmacion:
+                        db_invitado.fecha_confirmacion = datetime.utcnow()
+                # Si se cambia a rechazado
+                elif nuevo_estado == EstadoInvitado.RECHAZADO:
+                    if not db_invitado.confirmacion:
+                        db_invitado.confirmacion = "No podremos asistir"
+                    db_invitado.cantidad_adultos = 0
+                    db_invitado.cantidad_ninos = 0
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Estado inválido")
+    
+        if settings.STATS_COUNTERS:
+            aplicar_diferencia(s, diferencia(antes, huella(db_invitado)))
+        s.flush()
+        s.refresh(db_invitado)
+        return db_invitado
+
+    db_invitado = await escritura.ejecutar_sync(actualizar)
+    cache_invitados.invalidar_invitado(db_invitado.uuid, db_invitado.codigo)
     
-    db.commit()
-    db.refresh(db_invitado)
+    if notificaciones.hay_suscriptores():
+        notificar_invitado("actualizado", await db.run_sync(estadisticas_actuales), invitado=db_invitado)
     
-    return db_invitado
+    return serializacion.respuesta_invitado(db_invitado)
 
 
 @app.delete("/api/admin/invitados/{invitado_id}")
 async def eliminar_invitado(
     invitado_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """Elimina un invitado (requiere autenticación)"""
-    db_invitado = db.query(Invitado).filter(Invitado.id == invitado_id).first()
-    if not db_invitado:
-        raise HTTPException(status_code=404, detail="Invitado no encontrado")
+    def eliminar(s: Session):
+        db_invitado = s.query(Invitado).filter(Invitado.id == invitado_id).with_for_update().first()
+        if not db_invitado:
+            raise HTTPException(status_code=404, detail="Invitado no encontrado")
+    
+        if settings.STATS_COUNTERS:
+            aplicar_diferencia(s, diferencia(huella(db_invitado), None))
+        s.delete(db_invitado)
+        s.flush()
+        return db_invitado.uuid, db_invitado.codigo
+
+    uuid_invitado, codigo = await escritura.ejecutar_sync(eliminar)
+    cache_invitados.invalidar_invitado(uuid_invitado, codigo)
     
-    db.delete(db_invitado)
-    db.commit()
+    if notificaciones.hay_suscriptores():
+        notificar_invitado("eliminado", await db.run_sync(estadisticas_actuales), invitado_id=invitado_id)
     
     return {"message": "Invitado eliminado correctamente"}
 
 
+async def _aplicar_lote(accion: str, operacion, db: AsyncSession) -> ResultadoLote:
+    afectados = await escritura.ejecutar_sync(operacion)
+    cache_invitados.invalidar_invitados(afectados)
+    if afectados and notificaciones.hay_suscriptores():
+        notificaciones.publicar("lote", {
+            "accion": accion,
+            "afectados": len(afectados),
+            "estadisticas": await db.run_sync(estadisticas_actuales),
+        })
+    return ResultadoLote(afectados=len(afectados))
+
+
+@app.post("/api/admin/invitados/lote/actualizar", response_model=ResultadoLote)
+async def actualizar_invitados_lote(
+    cambios: InvitadosLoteUpdate,
+    filtros: FiltroInvitados = Depends(filtros_invitados),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """
+    Cambia max_adultos, max_ninos y/o estado de los invitados seleccionados por
+    ids y/o los filtros del listado, con un solo UPDATE y las mismas reglas que la
+    edición individual. Con estado=pendiente restablece las respuestas (requiere autenticación)
+    """
+    where = condiciones_lote(cambios, filtros)
+    return await _aplicar_lote("actualizado", lambda s: actualizar_lote(s, cambios, where), db)
+
+
+@app.post("/api/admin/invitados/lote/eliminar", response_model=ResultadoLote)
+async def eliminar_invitados_lote(
+    seleccion: InvitadosLote,
+    filtros: FiltroInvitados = Depends(filtros_invitados),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """Elimina con un solo DELETE los invitados seleccionados por ids y/o filtros (requiere autenticación)"""
+    where = condiciones_lote(seleccion, filtros)
+    return await _aplicar_lote("eliminado", lambda s: eliminar_lote(s, where), db)
+
+
 @app.get("/api/admin/estadisticas")
 async def obtener_estadisticas(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: AdminUser = Depends(get_current_user)
 ):
     """Obtiene estadísticas de invitados (requiere autenticación)"""
-    total = db.query(Invitado).count()
-    confirmados = db.query(Invitado).filter(Invitado.estado == EstadoInvitado.CONFIRMADO).count()
-    pendientes = db.query(Invitado).filter(Invitado.estado == EstadoInvitado.PENDIENTE).count()
-    rechazados = db.query(Invitado).filter(Invitado.estado == EstadoInvitado.RECHAZADO).count()
-    
-    # Calcular total de adultos y niños confirmados
-    invitados_confirmados = db.query(Invitado).filter(Invitado.estado == EstadoInvitado.CONFIRMADO).all()
-    total_adultos_confirmados = sum(inv.cantidad_adultos or 0 for inv in invitados_confirmados)
-    total_ninos_confirmados = sum(inv.cantidad_ninos or 0 for inv in invitados_confirmados)
-    
-    return {
-        "total": total,
-        "confirmados": confirmados,
-        "pendientes": pendientes,
-        "rechazados": rechazados,
-        "total_adultos_confirmados": total_adultos_confirmados,
-        "total_ninos_confirmados": total_ninos_confirmados
-    }
+    return await db.run_sync(estadisticas_actuales)
+
+
+@app.post("/api/admin/estadisticas/recalcular")
+async def recalcular_estadisticas(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """Reconstruye los contadores desde la tabla de invitados (requiere autenticación)"""
+    async with escritura.exclusivo():
+        await db.run_sync(recalcular_contadores)
+        await db.commit()
+    return await db.run_sync(leer_contadores)
+
+
+@app.get("/api/admin/caches")
+async def obtener_estadisticas_caches(
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """Tamaño, aciertos y fallos de las cachés en memoria de este proceso (requiere autenticación)"""
+    return estadisticas_caches()
+
+
+@app.post("/api/admin/eventos/token")
+async def token_eventos_admin(
+    token: str = Depends(oauth2_scheme),
+    current_user: AdminUser = Depends(get_current_user)
+):
+    """Token de corta duración para abrir /api/admin/eventos con EventSource (requiere autenticación)"""
+    return {"token": crear_token_eventos(token), "expira_en": settings.EVENTS_TOKEN_SECONDS}
+
+
+@app.get("/api/admin/eventos")
+async def stream_eventos_admin(
+    request: Request,
+    sesion: SesionEventos = Depends(get_sesion_eventos)
+):
+    """
+    Stream SSE con los cambios de invitados (RSVP, altas, ediciones, bajas e
+    importaciones) y las estadísticas resultantes (requiere autenticación;
+    EventSource no envía cabeceras, así que admite en ?token= el token de
+    POST /api/admin/eventos/token). Se cierra cuando vence la sesión o el
+    usuario deja de ser válido
+    """
+    username = sesion.usuario.username
+
+    async def vigente() -> bool:
+        return await run_in_threadpool(usuario_vigente, username)
+
+    return StreamingResponse(
+        notificaciones.stream_eventos(request, sesion.expira, vigente),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/api/admin/evento")
 async def obtener_evento_admin(
+    request: Request,
     current_user: AdminUser = Depends(get_current_user)
 ):
     """Obtiene la información del evento desde el JSON (requiere autenticación)"""
-    return load_evento_data()
+    return evento_response(request, evento_store.snapshot(), cache_control="private, no-cache")
 
 
 @app.put("/api/admin/evento")
@@ -402,6 +865,22 @@ async def actualizar_evento(
     return evento_data
 
 
+@app.get("/metrics", include_in_schema=False)
+async def exponer_metricas(authorization: Optional[str] = Header(None)):
+    """Métricas de este proceso en formato de texto de Prometheus"""
+    # Sin token no se exponen: las rutas, latencias y tamaños no son públicos
+    if not settings.METRICS_ENABLED or not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    esperado = f"Bearer {settings.METRICS_TOKEN}".encode("utf-8")
+    if not hmac.compare_digest((authorization or "").encode("utf-8"), esperado):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de métricas inválido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return Response(content=metricas.exponer(), media_type=metricas.CONTENT_TYPE)
+
+
 @app.get("/api/status")
 async def api_status():
     """Endpoint de estado de la API"""
@@ -0,0 +1,296 @@
+"""
+Métricas en formato de exposición de texto de Prometheus
+
+Con METRICS_ENABLED la app registra, por ruta (la plantilla, no la URL):
+peticiones y códigos de estado, histograma de latencia y de tamaño de la
+respuesta, peticiones en curso, y cuántas consultas SQL y cuánto tiempo
+de base de datos consumió cada petición. Las consultas se cuentan con
+eventos de los engines de SQLAlchemy (síncrono y asíncrono) y las esperas
+por una conexión del pool se miden en cada checkout.
+
+Desactivadas no se instala el middleware ni los eventos: el costo es cero.
+Los valores son por proceso; con varios workers cada uno expone los suyos.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_TAMANO = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BUCKETS_ESPERA_POOL = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+RUTA_SIN_COINCIDENCIA = "<sin ruta>"
+
+_registro: Dict[str, "Metrica"] = {}
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+class Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+        _registro[nombre] = self
+
+    def _selector(self, valores: Tuple, extra: str = "") -> str:
+        pares = [f'{k}="{_escapar(v)}"' for k, v in zip(self.etiquetas, valores)]
+        if extra:
+            pares.append(extra)
+        return "{" + ",".join(pares) + "}" if pares else ""
+
+    def _muestras(self):
+        raise NotImplementedError
+
+    def exponer(self) -> str:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        lineas.extend(self._muestras())
+        return "\n".join(lineas)
+
+
+class Contador(Metrica):
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[Tuple, float] = {}
+
+    def inc(self, *valores, cantidad: float = 1.0):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0.0) + cantidad
+
+    def _muestras(self):
+        with self._lock:
+            items = sorted(self._valores.items())
+        return [f"{self.nombre}{self._selector(k)} {_numero(v)}" for k, v in items]
+
+
+class Medidor(Metrica):
+    """Valor que sube y baja; con `leer` se calcula al exponer"""
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), leer=None):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[Tuple, float] = {}
+        self._leer = leer
+
+    def inc(self, *valores, cantidad: float = 1.0):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0.0) + cantidad
+
+    def dec(self, *valores, cantidad: float = 1.0):
+        self.inc(*valores, cantidad=-cantidad)
+
+    def _muestras(self):
+        if self._leer is not None:
+            items = sorted(self._leer().items())
+        else:
+            with self._lock:
+                items = sorted(self._valores.items())
+        return [f"{self.nombre}{self._selector(k)} {_numero(v)}" for k, v in items]
+
+
+class Histograma(Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        # etiquetas -> [conteo por bucket (no acumulado; el último es +Inf), suma, total]
+        self._series: Dict[Tuple, list] = {}
+
+    def observar(self, *valores, valor: float):
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    break
+            else:
+                i = len(self.buckets)
+            serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def _muestras(self):
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        lineas = []
+        for valores, (conteos, suma, total) in items:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = 'le="' + _numero(limite) + '"'
+                lineas.append(f"{self.nombre}_bucket{self._selector(valores, le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{self._selector(valores)} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{self._selector(valores)} {total}")
+        return lineas
+
+
+def exponer() -> str:
+    """Todas las métricas registradas en formato de texto 0.0.4"""
+    return "\n".join(m.exponer() for m in _registro.values()) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ==================== MÉTRICAS ====================
+
+peticiones = Contador(
+    "http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status")
+)
+latencia = Histograma(
+    "http_request_duration_seconds", "Tiempo hasta enviar el último byte de la respuesta",
+    ("method", "route"), BUCKETS_LATENCIA,
+)
+tamano = Histograma(
+    "http_response_size_bytes", "Bytes del cuerpo de la respuesta", ("method", "route"), BUCKETS_TAMANO
+)
+en_curso = Medidor("http_requests_in_progress", "Peticiones HTTP en curso", ("method",))
+consultas_por_peticion = Histograma(
+    "http_request_db_queries", "Consultas SQL ejecutadas por petición",
+    ("method", "route"), BUCKETS_CONSULTAS,
+)
+tiempo_bd_por_ruta = Contador(
+    "http_request_db_seconds_total", "Tiempo de base de datos acumulado por ruta", ("method", "route")
+)
+consultas = Histograma(
+    "db_query_duration_seconds", "Duración de cada consulta SQL", ("engine",), BUCKETS_LATENCIA
+)
+espera_pool = Histograma(
+    "db_pool_checkout_wait_seconds", "Espera por una conexión del pool", ("engine",), BUCKETS_ESPERA_POOL
+)
+
+_pools: Dict[str, object] = {}
+
+
+def _estado_pools(atributo: str):
+    def leer():
+        valores = {}
+        for nombre, pool in _pools.items():
+            funcion = getattr(pool, atributo, None)
+            if funcion is not None:
+                valores[(nombre,)] = funcion()
+        return valores
+    return leer
+
+
+Medidor("db_pool_checked_out", "Conexiones del pool en uso", ("engine",), leer=_estado_pools("checkedout"))
+Medidor("db_pool_size", "Tamaño configurado del pool", ("engine",), leer=_estado_pools("size"))
+
+# ==================== BASE DE DATOS ====================
+
+# [consultas, segundos] de la petición en curso (None fuera de una petición)
+_bd_peticion: ContextVar[Optional[list]] = ContextVar("metricas_bd_peticion", default=None)
+
+
+def instrumentar_engine(engine, nombre: str):
+    """Cuenta consultas y tiempo de BD y mide las esperas del pool de `engine` (síncrono)"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        pila = conn.info.get("metricas_inicio")
+        if not pila:
+            return
+        segundos = time.perf_counter() - pila.pop()
+        consultas.observar(nombre, valor=segundos)
+        acumulado = _bd_peticion.get()
+        if acumulado is not None:
+            acumulado[0] += 1
+            acumulado[1] += segundos
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        pila = contexto.connection.info.get("metricas_inicio") if contexto.connection is not None else None
+        if pila:
+            pila.pop()
+
+    # Los eventos del pool se disparan después de obtener la conexión; la espera
+    # se mide envolviendo la obtención en sí
+    pool = engine.pool
+    obtener = pool._do_get
+
+    def _do_get_medido():
+        inicio = time.perf_counter()
+        try:
+            return obtener()
+        finally:
+            espera_pool.observar(nombre, valor=time.perf_counter() - inicio)
+
+    pool._do_get = _do_get_medido
+    _pools[nombre] = pool
+
+
+# ==================== MIDDLEWARE ====================
+
+class MetricasMiddleware:
+    """Middleware ASGI; la ruta se toma del scope una vez resuelta por el router"""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _plantilla(scope, raiz: str) -> str:
+        """Plantilla de la ruta (/api/invitado/{uuid_invitado}) o prefijo del montaje (/front/{ruta})"""
+        ruta = scope.get("route")
+        if ruta is not None:
+            return ruta.path
+        montaje = scope.get("root_path", "")
+        if montaje != raiz:
+            return montaje[len(raiz):] + "/{ruta}"
+        return RUTA_SIN_COINCIDENCIA
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        raiz = scope.get("root_path", "")
+        estado = [500, 0]  # status, bytes del cuerpo
+        bd = [0, 0.0]
+        token = _bd_peticion.set(bd)
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado[0] = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                estado[1] += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        en_curso.inc(metodo)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            segundos = time.perf_counter() - inicio
+            en_curso.dec(metodo)
+            _bd_peticion.reset(token)
+            plantilla = self._plantilla(scope, raiz)
+            peticiones.inc(metodo, plantilla, str(estado[0]))
+            latencia.observar(metodo, plantilla, valor=segundos)
+            tamano.observar(metodo, plantilla, valor=estado[1])
+            consultas_por_peticion.observar(metodo, plantilla, valor=bd[0])
+            if bd[1]:
+                tiempo_bd_por_ruta.inc(metodo, plantilla, cantidad=bd[1])
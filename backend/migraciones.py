@@ -0,0 +1,193 @@
+"""
+Migraciones incrementales del esquema
+
+Compara models.Base con la base de datos real y aplica solo lo que falta:
+tablas nuevas, columnas nuevas en tablas existentes e índices (incluidos
+los únicos). Nunca borra ni modifica tablas, columnas o datos existentes,
+así que puede correr en cada deploy (fase release del Procfile, vía
+init_db.py) mientras la versión anterior sigue atendiendo.
+
+La app no toca el esquema al importarse: la reflexión solo se paga aquí.
+
+Ejecutar:
+    python migraciones.py           # aplica lo que falta
+    python migraciones.py --plan    # solo muestra lo que haría
+"""
+import argparse
+from typing import List, Tuple
+
+from sqlalchemy import inspect, literal
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex, Index, UniqueConstraint
+
+from database import Base, engine
+import models  # noqa: F401 (registra las tablas en Base.metadata)
+
+# (descripción, función que aplica el cambio sobre una conexión)
+Operacion = Tuple[str, object]
+
+
+def _default_no_constante(columna, dialecto) -> bool:
+    """SQLite no acepta ADD COLUMN con un DEFAULT que no sea constante (p.ej. CURRENT_TIMESTAMP)"""
+    default = columna.server_default
+    return (
+        dialecto.name == "sqlite"
+        and default is not None
+        and not isinstance(getattr(default, "arg", None), str)
+    )
+
+
+def _nombre_disparador(columna) -> str:
+    return f"{columna.table.name}_{columna.name}_default"
+
+
+def _completar_default(columna, dialecto):
+    """
+    Completa las filas existentes con la expresión del DEFAULT y crea un
+    trigger de SQLite que hace de DEFAULT para las filas nuevas. Solo toca
+    esta columna y solo donde está en NULL.
+    """
+    preparer = dialecto.identifier_preparer
+    tabla = preparer.format_table(columna.table)
+    nombre = preparer.quote(columna.name)
+    expresion = columna.server_default.arg.compile(dialect=dialecto)
+    relleno = f"UPDATE {tabla} SET {nombre} = {expresion} WHERE {nombre} IS NULL"
+    disparador = (
+        f"CREATE TRIGGER IF NOT EXISTS {preparer.quote(_nombre_disparador(columna))} "
+        f"AFTER INSERT ON {tabla} FOR EACH ROW WHEN NEW.{nombre} IS NULL BEGIN "
+        f"UPDATE {tabla} SET {nombre} = {expresion} WHERE rowid = NEW.rowid; END"
+    )
+
+    def aplicar(conn):
+        conn.exec_driver_sql(relleno)
+        conn.exec_driver_sql(disparador)
+    return f"{relleno}; CREATE TRIGGER {_nombre_disparador(columna)}", aplicar
+
+
+def _columna_sql(columna, dialecto) -> str:
+    """Definición de la columna para ALTER TABLE ... ADD COLUMN"""
+    if _default_no_constante(columna, dialecto):
+        # Se agrega sin DEFAULT: las filas existentes se completan después con
+        # la misma expresión y las nuevas, con un trigger (ver _completar_default)
+        print(f"  ⚠ {columna.table.name}.{columna.name} se agrega sin DEFAULT del servidor (SQLite)")
+        definicion = str(CreateColumn(columna).compile(dialect=dialecto))
+        return definicion.split(" DEFAULT ")[0]
+    definicion = str(CreateColumn(columna).compile(dialect=dialecto))
+    if columna.nullable or columna.server_default is not None:
+        return definicion
+    # NOT NULL sin DEFAULT no se puede agregar a una tabla con filas: se usa el
+    # default de Python del modelo como DEFAULT del servidor
+    default = columna.default.arg if columna.default is not None and columna.default.is_scalar else None
+    if default is None:
+        print(f"  ⚠ {columna.table.name}.{columna.name} se agrega como NULL (NOT NULL sin valor por defecto)")
+        return definicion.replace(" NOT NULL", "")
+    valor = literal(default, type_=columna.type).compile(dialect=dialecto, compile_kwargs={"literal_binds": True})
+    return definicion.replace(" NOT NULL", f" DEFAULT {valor} NOT NULL")
+
+
+def _indices_existentes(inspector, tabla: str) -> Tuple[set, set]:
+    """Nombres de índices y conjuntos de columnas con unicidad ya garantizada"""
+    nombres, unicos = set(), set()
+    for indice in inspector.get_indexes(tabla):
+        nombres.add(indice["name"])
+        if indice.get("unique"):
+            unicos.add(tuple(indice["column_names"]))
+    for restriccion in inspector.get_unique_constraints(tabla):
+        if restriccion.get("name"):
+            nombres.add(restriccion["name"])
+        unicos.add(tuple(restriccion["column_names"]))
+    pk = inspector.get_pk_constraint(tabla).get("constrained_columns") or []
+    if pk:
+        unicos.add(tuple(pk))
+    return nombres, unicos
+
+
+def plan(engine: Engine) -> Tuple[List[Operacion], List[str]]:
+    """Operaciones pendientes y nombres de las tablas que se crearían"""
+    inspector = inspect(engine)
+    dialecto = engine.dialect
+    existentes = set(inspector.get_table_names())
+    disparadores = set()
+    if dialecto.name == "sqlite":
+        with engine.connect() as conn:
+            disparadores = set(conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            ).scalars())
+    operaciones: List[Operacion] = []
+    nuevas: List[str] = []
+
+    for tabla in Base.metadata.sorted_tables:
+        if tabla.name not in existentes:
+            nuevas.append(tabla.name)
+            operaciones.append((f"CREATE TABLE {tabla.name}", lambda conn, t=tabla: t.create(conn)))
+            continue
+
+        columnas = {c["name"]: c for c in inspector.get_columns(tabla.name)}
+        for columna in tabla.columns:
+            existente = columnas.get(columna.name)
+            if existente is None:
+                sql = f"ALTER TABLE {dialecto.identifier_preparer.format_table(tabla)} ADD COLUMN {_columna_sql(columna, dialecto)}"
+
+                def agregar(conn, sql=sql, tipo=columna.type):
+                    # Tipos con DDL propio (ENUM de PostgreSQL) se crean antes de usarse
+                    if hasattr(tipo, "create"):
+                        tipo.create(conn, checkfirst=True)
+                    conn.exec_driver_sql(sql)
+                operaciones.append((sql, agregar))
+            # Aparte del ALTER (que SQLite confirma de inmediato): si falló en una
+            # corrida anterior, la siguiente lo vuelve a intentar
+            if (
+                _default_no_constante(columna, dialecto)
+                and (existente is None or existente.get("default") is None)
+                and _nombre_disparador(columna) not in disparadores
+            ):
+                operaciones.append(_completar_default(columna, dialecto))
+
+        nombres, unicos = _indices_existentes(inspector, tabla.name)
+        for indice in sorted(tabla.indexes, key=lambda i: i.name):
+            columnas_indice = tuple(c.name for c in indice.columns)
+            if indice.name in nombres or (indice.unique and columnas_indice in unicos):
+                continue
+            operaciones.append((
+                str(CreateIndex(indice).compile(dialect=dialecto)),
+                lambda conn, i=indice: i.create(conn),
+            ))
+        # unique=True sin index=True es una restricción; en una tabla existente
+        # se agrega como índice único (SQLite no admite ADD CONSTRAINT)
+        for restriccion in tabla.constraints:
+            if not isinstance(restriccion, UniqueConstraint):
+                continue
+            columnas_unicas = tuple(c.name for c in restriccion.columns)
+            if columnas_unicas in unicos:
+                continue
+            indice = Index(f"uq_{tabla.name}_{'_'.join(columnas_unicas)}", *restriccion.columns, unique=True)
+            tabla.indexes.discard(indice)  # Index() se asocia a la tabla; el modelo no debe cambiar
+            operaciones.append((
+                str(CreateIndex(indice).compile(dialect=dialecto)),
+                lambda conn, i=indice: i.create(conn),
+            ))
+    return operaciones, nuevas
+
+
+def migrar(engine: Engine = engine, solo_plan: bool = False) -> List[str]:
+    """
+    Aplica las operaciones pendientes, cada una en su propia transacción
+    (MySQL confirma el DDL de todos modos). Devuelve las tablas creadas.
+    """
+    operaciones, nuevas = plan(engine)
+    if not operaciones:
+        print("✓ El esquema está al día")
+        return []
+    for descripcion, aplicar in operaciones:
+        print(f"{'·' if solo_plan else '→'} {descripcion}")
+        if not solo_plan:
+            with engine.begin() as conn:
+                aplicar(conn)
+    return [] if solo_plan else nuevas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplica las tablas, columnas e índices que faltan")
+    parser.add_argument("--plan", action="store_true", help="mostrar los cambios sin aplicarlos")
+    args = parser.parse_args()
+    migrar(solo_plan=args.plan)
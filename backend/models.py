@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from database import Base
 import enum
@@ -38,6 +38,31 @@ class Invitado(Base):
     fecha_confirmacion = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Índices compuestos para la paginación por cursor y los filtros del listado
+    __table_args__ = (
+        Index("ix_invitados_estado_id", "estado", "id"),
+        Index("ix_invitados_updated_at_id", "updated_at", "id"),
+        Index("ix_invitados_created_at_id", "created_at", "id"),
+    )
+
+
+class SecuenciaCodigo(Base):
+    """Contador de códigos legibles por prefijo (p.ej. FM2026 -> FM2026-001)"""
+    __tablename__ = "secuencias_codigo"
+    
+    prefijo = Column(String(40), primary_key=True)
+    ultimo = Column(Integer, nullable=False, default=0)
+
+
+class ContadorEstado(Base):
+    """Totales por estado mantenidos de forma incremental (STATS_COUNTERS)"""
+    __tablename__ = "contadores_invitados"
+    
+    estado = Column(SQLEnum(EstadoInvitado), primary_key=True)
+    invitados = Column(Integer, nullable=False, default=0)
+    adultos = Column(Integer, nullable=False, default=0)
+    ninos = Column(Integer, nullable=False, default=0)
 
 
 class AdminUser(Base):
@@ -0,0 +1,141 @@
+"""
+Notificaciones en vivo para el panel administrativo (Server-Sent Events)
+
+Los handlers que modifican invitados publican pequeños diffs (invitado
+afectado + estadísticas nuevas) y cada panel abierto los recibe por
+/api/admin/eventos, sin volver a pedir la lista completa.
+
+Cada worker atiende a sus propios suscriptores. Con varios workers
+(WEB_CONCURRENCY > 1) los eventos también se publican en el diario de
+coherencia.py y cada worker con paneles conectados lo revisa cada
+INTERVALO_SINCRONIZAR segundos y los reenvía a los suyos. Esos workers
+renuevan además un archivo de marca, así los demás saben que hay paneles
+en algún lado y que vale la pena armar el evento.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Awaitable, Callable, Optional, Set
+
+from fastapi import Request
+
+import coherencia
+
+MAX_PENDIENTES = 200
+INTERVALO_PING = 15.0
+INTERVALO_SINCRONIZAR = 0.5
+RUTA_MARCA = coherencia.RUTA_DIARIO + ".paneles"
+
+_suscriptores: Set[asyncio.Queue] = set()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _marcar():
+    os.makedirs(os.path.dirname(RUTA_MARCA), exist_ok=True)
+    with open(RUTA_MARCA, "a"):
+        pass
+    os.utime(RUTA_MARCA)
+
+
+def hay_suscriptores() -> bool:
+    """Si hay algún panel conectado, en este worker o (con varios workers) en otro"""
+    if _suscriptores:
+        return True
+    if coherencia.diario is None:
+        return False
+    try:
+        return time.time() - os.stat(RUTA_MARCA).st_mtime < 2 * INTERVALO_PING
+    except FileNotFoundError:
+        return False
+
+
+def publicar(tipo: str, datos: dict):
+    """Encola el evento para todos los paneles conectados (no bloquea)"""
+    if not hay_suscriptores():
+        return
+    mensaje = f"event: {tipo}\ndata: {json.dumps(datos, ensure_ascii=False, default=str)}\n\n"
+    _difundir(mensaje)
+    coherencia.publicar("panel", mensaje)
+
+
+def _desde_otro_worker(mensaje: str):
+    # sincronizar() también corre en hilos (dependencias síncronas): las colas
+    # de asyncio solo se tocan desde su event loop
+    if _loop is None or not _suscriptores:
+        return
+    try:
+        en_el_loop = asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        en_el_loop = False
+    if en_el_loop:
+        _difundir(mensaje)
+    else:
+        _loop.call_soon_threadsafe(_difundir, mensaje)
+
+
+coherencia.suscribir("panel", _desde_otro_worker)
+
+
+def _difundir(mensaje: str):
+    for cola in list(_suscriptores):
+        try:
+            cola.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            # Cliente demasiado lento: se le pide recargar todo y se descartan sus pendientes
+            while not cola.empty():
+                cola.get_nowait()
+            cola.put_nowait("event: resync\ndata: {}\n\n")
+
+
+async def stream_eventos(
+    request: Request,
+    expira: Optional[float] = None,
+    vigente: Optional[Callable[[], Awaitable[bool]]] = None,
+):
+    """
+    Generador para StreamingResponse(media_type="text/event-stream"). Termina
+    al llegar a `expira` (epoch) o cuando vigente() devuelve False, que se
+    consulta antes de cada envío
+    """
+    global _loop
+    _loop = asyncio.get_running_loop()
+    varios_workers = coherencia.diario is not None
+    if varios_workers:
+        # Lo publicado antes de conectarse ya está en la lista que pidió el panel
+        coherencia.sincronizar()
+        _marcar()
+    cola: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDIENTES)
+    _suscriptores.add(cola)
+    try:
+        ultimo_ping = time.monotonic()
+        # Reintento sugerido al navegador si se corta la conexión
+        yield "retry: 3000\n\n"
+        while True:
+            mensaje: Optional[str]
+            espera = INTERVALO_SINCRONIZAR if varios_workers else INTERVALO_PING
+            if expira is not None:
+                espera = max(0.0, min(espera, expira - time.time()))
+            try:
+                mensaje = await asyncio.wait_for(cola.get(), timeout=espera)
+            except asyncio.TimeoutError:
+                mensaje = None
+            if await request.is_disconnected():
+                break
+            if expira is not None and time.time() >= expira:
+                break
+            if vigente is not None and not await vigente():
+                break
+            if mensaje is not None:
+                yield mensaje
+            if varios_workers:
+                # Los eventos de otros workers llegan a la cola en la próxima vuelta
+                coherencia.sincronizar()
+            if time.monotonic() - ultimo_ping >= INTERVALO_PING:
+                ultimo_ping = time.monotonic()
+                if varios_workers:
+                    _marcar()
+                if mensaje is None:
+                    yield ": ping\n\n"
+    finally:
+        _suscriptores.discard(cola)
@@ -0,0 +1,117 @@
+"""
+Caché de páginas HTML renderizadas
+
+index.html solo cambia según la URL base (meta tags Open Graph), el uuid
+del invitado y sus datos incrustados, así que cada variante se renderiza
+una vez y se guarda junto con sus versiones gzip/brotli y su ETag. El
+render y la compresión de una variante nueva corren en un hilo, fuera del
+event loop. La caché se vacía cuando cambia
+el archivo de la plantilla (o cualquier otro archivo vigilado, como el
+manifest de estáticos).
+"""
+import asyncio
+import gzip
+import hashlib
+import os
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from markupsafe import Markup
+
+from cache import TTLCache
+from evento_cache import etag_coincide
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él se sirve gzip
+    brotli = None
+
+# Bajo este tamaño la compresión no compensa
+MIN_COMPRIMIR = 512
+
+
+def json_en_html(cuerpo: Optional[bytes]) -> Optional[Markup]:
+    """JSON listo para un <script type="application/json"> (sin '<' que cierre la etiqueta)"""
+    if cuerpo is None:
+        return None
+    return Markup(cuerpo.decode("utf-8").replace("<", "\\u003c"))
+
+
+class PaginaRenderizada:
+    __slots__ = ("html", "gzip", "br", "etag")
+
+    def __init__(self, html: bytes):
+        self.html = html
+        self.etag = '"' + hashlib.sha256(html).hexdigest()[:32] + '"'
+        self.gzip = gzip.compress(html, compresslevel=9, mtime=0) if len(html) >= MIN_COMPRIMIR else None
+        self.br = brotli.compress(html, quality=9) if brotli and len(html) >= MIN_COMPRIMIR else None
+
+
+def _acepta(accept_encoding: str, codificacion: str) -> bool:
+    for parte in accept_encoding.split(","):
+        nombre, _, params = parte.strip().partition(";")
+        if nombre.strip().lower() != codificacion:
+            continue
+        for param in params.split(";"):
+            clave, _, valor = param.strip().partition("=")
+            if clave.lower() == "q":
+                try:
+                    return float(valor) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+class CachePaginas:
+    """LRU de páginas renderizadas ligada a la fecha de modificación de sus archivos fuente"""
+
+    def __init__(self, nombre: str, *rutas_vigiladas: str, maxsize: int = 256):
+        self.rutas_vigiladas = rutas_vigiladas
+        self._cache = TTLCache(nombre, maxsize=maxsize)
+        self._firma: Optional[tuple] = None
+
+    def _vigente(self):
+        firma = []
+        for ruta in self.rutas_vigiladas:
+            try:
+                firma.append(os.stat(ruta).st_mtime_ns)
+            except FileNotFoundError:
+                firma.append(None)
+        firma = tuple(firma)
+        if firma != self._firma:
+            self._cache.clear()
+            self._firma = firma
+
+    async def obtener(self, clave, renderizar: Callable[[], str]) -> PaginaRenderizada:
+        self._vigente()
+        pagina = self._cache.get(clave)
+        if pagina is None:
+            loop = asyncio.get_running_loop()
+            pagina = await loop.run_in_executor(None, lambda: PaginaRenderizada(renderizar().encode("utf-8")))
+            self._cache.set(clave, pagina)
+        return pagina
+
+    def clear(self):
+        self._cache.clear()
+
+
+def respuesta_pagina(request: Request, pagina: PaginaRenderizada) -> Response:
+    """HTML con la mejor codificación aceptada por el cliente y soporte de If-None-Match"""
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if pagina.br is not None and _acepta(accept_encoding, "br"):
+        cuerpo, codificacion = pagina.br, "br"
+    elif pagina.gzip is not None and _acepta(accept_encoding, "gzip"):
+        cuerpo, codificacion = pagina.gzip, "gzip"
+    else:
+        cuerpo, codificacion = pagina.html, None
+
+    # Un ETag fuerte distinto por codificación (los bytes son distintos)
+    etag = pagina.etag if codificacion is None else f'{pagina.etag[:-1]}-{codificacion}"'
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if codificacion:
+        headers["Content-Encoding"] = codificacion
+
+    if etag_coincide(request, etag) or etag_coincide(request, pagina.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cuerpo, media_type="text/html; charset=utf-8", headers=headers)
@@ -0,0 +1,164 @@
+"""
+Perfilado de SQL: consultas lentas y patrones N+1
+
+Con SQL_PROFILE los engines registran en el logger "invitaciones.sql":
+
+- toda sentencia que tarde más de SQL_SLOW_MS, con sus parámetros y la
+  ruta que la emitió (y, con SQL_EXPLAIN, el plan de ejecución la primera
+  vez que se ve esa forma de sentencia)
+- las peticiones que ejecutan la misma forma de sentencia (SQL con los
+  literales y las listas IN normalizados) más de SQL_REPEAT_THRESHOLD
+  veces: consultas en un bucle, o consultar y luego refrescar lo mismo
+
+Pensado para correr la prueba de carga (benchmarks/carga.py) o un entorno
+de staging antes de una fecha crítica; desactivado no instala nada.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from config import settings
+
+logger = logging.getLogger("invitaciones.sql")
+
+MAX_PARAMETROS = 500
+
+_RE_ESPACIOS = re.compile(r"\s+")
+_RE_LISTA_IN = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s|\$\d+|:\w+)\s*,?)+\)", re.IGNORECASE)
+_RE_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMEROS = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+
+
+def forma_sentencia(sql: str) -> str:
+    """SQL sin literales ni largo de las listas IN, para agrupar sentencias equivalentes"""
+    sql = _RE_ESPACIOS.sub(" ", sql).strip()
+    sql = _RE_CADENAS.sub("?", sql)
+    sql = _RE_NUMEROS.sub("?", sql)
+    return _RE_LISTA_IN.sub("IN (...)", sql)
+
+
+class _Peticion:
+    """Sentencias de la petición en curso"""
+    __slots__ = ("scope", "formas")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.formas: Counter = Counter()
+
+    @property
+    def ruta(self) -> str:
+        # El router deja la ruta en el scope antes de llamar al endpoint
+        ruta = self.scope.get("route")
+        return f"{self.scope['method']} {getattr(ruta, 'path', None) or self.scope['path']}"
+
+
+_peticion: ContextVar[Optional[_Peticion]] = ContextVar("perfilado_peticion", default=None)
+
+# Formas de sentencia cuyo plan ya se registró (una vez por proceso)
+_explicadas = set()
+_explicadas_lock = threading.Lock()
+
+
+def _ruta_actual() -> str:
+    peticion = _peticion.get()
+    return peticion.ruta if peticion is not None else "(fuera de una petición)"
+
+
+def _parametros(parameters) -> str:
+    texto = repr(parameters)
+    return texto if len(texto) <= MAX_PARAMETROS else texto[:MAX_PARAMETROS] + "..."
+
+
+def _prefijo_explain(dialecto: str) -> Optional[str]:
+    if dialecto == "sqlite":
+        return "EXPLAIN QUERY PLAN "
+    if dialecto in ("mysql", "mariadb", "postgresql"):
+        return "EXPLAIN "
+    return None
+
+
+def _explicar(conn, statement: str, parameters, forma: str):
+    """Plan de la sentencia, ejecutado directo en el cursor del driver (sin disparar eventos)"""
+    prefijo = _prefijo_explain(conn.dialect.name)
+    if prefijo is None or not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+        return
+    with _explicadas_lock:
+        if forma in _explicadas:
+            return
+        _explicadas.add(forma)
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefijo + statement, parameters)
+        plan = "\n".join("  " + " | ".join(str(c) for c in fila) for fila in cursor.fetchall())
+    except Exception as exc:  # el plan es informativo; nunca debe romper la petición
+        plan = f"  (no se pudo obtener el plan: {exc})"
+    finally:
+        cursor.close()
+    logger.warning("Plan de %s\n%s", forma, plan)
+
+
+def instrumentar_engine(engine):
+    """Instala los eventos de perfilado en un engine síncrono (o el sync_engine de uno asíncrono)"""
+    umbral = settings.SQL_SLOW_MS / 1000.0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("perfilado_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        pila = conn.info.get("perfilado_inicio")
+        if not pila:
+            return
+        segundos = time.perf_counter() - pila.pop()
+        forma = None
+        peticion = _peticion.get()
+        if peticion is not None:
+            forma = forma_sentencia(statement)
+            peticion.formas[forma] += 1
+        if segundos >= umbral:
+            logger.warning(
+                "Consulta lenta (%.1f ms) en %s: %s params=%s",
+                segundos * 1000, _ruta_actual(), _RE_ESPACIOS.sub(" ", statement).strip(),
+                _parametros(parameters),
+            )
+            if settings.SQL_EXPLAIN and not executemany:
+                _explicar(conn, statement, parameters, forma or forma_sentencia(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        pila = contexto.connection.info.get("perfilado_inicio") if contexto.connection is not None else None
+        if pila:
+            pila.pop()
+
+
+class PerfiladoMiddleware:
+    """Middleware ASGI que agrupa las sentencias por petición y avisa de las repetidas"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        peticion = _Peticion(scope)
+        token = _peticion.set(peticion)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _peticion.reset(token)
+            limite = settings.SQL_REPEAT_THRESHOLD
+            for forma, veces in peticion.formas.most_common():
+                if veces <= limite:
+                    break
+                logger.warning(
+                    "Posible N+1: %s ejecutó %d veces la misma sentencia: %s", peticion.ruta, veces, forma
+                )
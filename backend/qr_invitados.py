@@ -0,0 +1,223 @@
+"""
+Links personales y códigos QR de los invitados
+
+El link de cada invitado es BASE_URL + "/?uuid=<uuid>", el mismo que copia
+el panel. Los QR (PNG o SVG) se guardan en disco como
+<id>-<huella>.<formato>, donde la huella resume el link y el diseño: si
+cambia BASE_URL o el uuid la huella es otra y el QR se vuelve a dibujar; si
+no, se reutiliza. Corregir un nombre no toca los QR, solo la hoja PDF, que
+se arma al vuelo con los PNG ya generados (varias invitaciones por página,
+con nombre y código).
+
+generar_qr.py y el endpoint del panel dibujan solo los que faltan,
+repartidos en un pool de procesos. qrcode es opcional: sin él los links
+siguen disponibles y los QR responden con un error claro.
+"""
+import asyncio
+import csv
+import functools
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from PIL import Image, ImageDraw
+from sqlalchemy import select
+
+from config import settings
+from imagenes_og import PROJECT_ROOT, fuente, fuente_ajustada, guardar_en_cache, texto_dibujable
+from listado import condiciones
+from models import Invitado
+from schemas import FiltroInvitados
+
+try:
+    import qrcode
+    import qrcode.image.svg
+except ImportError:  # opcional: sin qrcode solo se entregan los links
+    qrcode = None
+
+FORMATOS = ("png", "svg")
+# Entra en la huella de cada QR, como imagenes_og.VERSION_DISENO
+VERSION_DISENO = "1"
+
+# Hoja PDF: A4 a 150 ppp, 3 columnas x 4 filas
+DPI = 150
+PAGINA = (1240, 1754)
+COLUMNAS, FILAS = 3, 4
+MARGEN = 60
+LADO_QR = 300
+
+_pool_qr = None
+
+
+class EnlaceInvitado(NamedTuple):
+    id: int
+    codigo: Optional[str]
+    nombres: str
+    url: str
+
+
+def disponible() -> bool:
+    return qrcode is not None
+
+
+def iniciar_pool():
+    """Crea el pool de procesos de los QR (lifespan de la app)"""
+    global _pool_qr
+    if _pool_qr is None:
+        # Sin fork: el servidor ya tiene hilos (bcrypt, OG, aiosqlite) y un hijo
+        # creado con fork puede heredar uno de sus locks tomado para siempre
+        metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool_qr = ProcessPoolExecutor(
+            max_workers=settings.QR_WORKERS, mp_context=multiprocessing.get_context(metodo)
+        )
+
+
+def cerrar_pool():
+    global _pool_qr
+    if _pool_qr is not None:
+        _pool_qr.shutdown(cancel_futures=True)
+        _pool_qr = None
+
+
+def _get_pool_qr() -> ProcessPoolExecutor:
+    iniciar_pool()
+    return _pool_qr
+
+
+def directorio_cache() -> str:
+    return settings.QR_CACHE_DIR or os.path.join(PROJECT_ROOT, "cache", "qr")
+
+
+def url_invitado(uuid_invitado: str, base_url: str) -> str:
+    return f"{base_url.rstrip('/')}/?uuid={uuid_invitado}"
+
+
+def consulta_enlaces(filtros: FiltroInvitados):
+    return (
+        select(Invitado.id, Invitado.codigo, Invitado.nombres, Invitado.uuid)
+        .where(*condiciones(filtros))
+        .order_by(Invitado.codigo, Invitado.id)
+    )
+
+
+def enlaces(filas: Iterable, base_url: str) -> List[EnlaceInvitado]:
+    """Filas de consulta_enlaces() con el link personal de cada invitado"""
+    return [
+        EnlaceInvitado(id_, codigo, nombres, url_invitado(uuid_invitado, base_url))
+        for id_, codigo, nombres, uuid_invitado in filas
+    ]
+
+
+def huella_qr(url: str, formato: str) -> str:
+    contenido = json.dumps([VERSION_DISENO, formato, url])
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()[:16]
+
+
+def ruta_qr(clave, url: str, formato: str) -> str:
+    return os.path.join(directorio_cache(), f"{clave}-{huella_qr(url, formato)}.{formato}")
+
+
+def renderizar_qr(url: str, formato: str) -> bytes:
+    """QR del link; corrección de errores media para que sobreviva a la impresión"""
+    if qrcode is None:
+        raise RuntimeError("Instala qrcode para generar códigos QR")
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=10, border=2)
+    qr.add_data(url)
+    qr.make(fit=True)
+    salida = io.BytesIO()
+    if formato == "svg":
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(salida)
+    else:
+        qr.make_image().save(salida, format="PNG")
+    return salida.getvalue()
+
+
+def generar_qr(clave, url: str, formato: str, forzar: bool = False) -> Tuple[str, bool]:
+    """Ruta del QR en disco y si hubo que dibujarlo (ver imagenes_og.guardar_en_cache)"""
+    ruta = ruta_qr(clave, url, formato)
+    return guardar_en_cache(ruta, functools.partial(renderizar_qr, url, formato), forzar)
+
+
+def pendientes(items: Iterable[EnlaceInvitado], formato: str) -> List[EnlaceInvitado]:
+    return [e for e in items if not os.path.exists(ruta_qr(e.id, e.url, formato))]
+
+
+def generar_todos(
+    items: List[EnlaceInvitado], formato: str, pool: Executor, forzar: bool = False
+) -> Tuple[Dict[int, str], int]:
+    """Rutas por id de invitado y cuántos QR hubo que dibujar (los que faltan van al pool)"""
+    por_dibujar = items if forzar else pendientes(items, formato)
+    futuros = [pool.submit(generar_qr, e.id, e.url, formato, forzar) for e in por_dibujar]
+    for futuro in futuros:
+        futuro.result()
+    return {e.id: ruta_qr(e.id, e.url, formato) for e in items}, len(por_dibujar)
+
+
+async def en_pool(funcion, *args):
+    """Ejecuta funcion(*args) en el pool de procesos de los QR"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool_qr(), funcion, *args)
+
+
+async def generar_todos_async(items: List[EnlaceInvitado], formato: str) -> Dict[int, str]:
+    await asyncio.gather(*(en_pool(generar_qr, e.id, e.url, formato) for e in pendientes(items, formato)))
+    return {e.id: ruta_qr(e.id, e.url, formato) for e in items}
+
+
+def nombre_archivo(enlace: EnlaceInvitado, usados: set) -> str:
+    """Código reducido a [A-Za-z0-9_-] (o el id si no queda nada), sin repetir dentro del ZIP"""
+    nombre = re.sub(r"[^A-Za-z0-9_-]+", "_", enlace.codigo or "").strip("_") or str(enlace.id)
+    while nombre in usados:
+        nombre = f"{nombre}-{enlace.id}"
+    usados.add(nombre)
+    return nombre
+
+
+def archivo_zip(items: List[EnlaceInvitado], rutas: Dict[int, str], formato: str) -> bytes:
+    """ZIP con un QR por invitado (<código>.<formato>) y links.csv"""
+    salida = io.BytesIO()
+    # Los PNG ya vienen comprimidos; los SVG son texto
+    compresion = zipfile.ZIP_DEFLATED if formato == "svg" else zipfile.ZIP_STORED
+    with zipfile.ZipFile(salida, "w", compression=compresion) as zf:
+        links = io.StringIO()
+        escritor = csv.writer(links)
+        escritor.writerow(["codigo", "nombres", "url", "qr"])
+        usados = set()
+        for e in items:
+            nombre = f"{nombre_archivo(e, usados)}.{formato}"
+            zf.write(rutas[e.id], nombre)
+            escritor.writerow([e.codigo, e.nombres, e.url, nombre])
+        zf.writestr("links.csv", "\ufeff" + links.getvalue(), compress_type=zipfile.ZIP_DEFLATED)
+    return salida.getvalue()
+
+
+def hoja_pdf(items: List[EnlaceInvitado], rutas_png: Dict[int, str]) -> bytes:
+    """PDF imprimible: QR, nombre y código de cada invitado, COLUMNAS x FILAS por página"""
+    ancho_celda = (PAGINA[0] - 2 * MARGEN) // COLUMNAS
+    alto_celda = (PAGINA[1] - 2 * MARGEN) // FILAS
+    fuente_codigo = fuente(22)
+    paginas = []
+    por_pagina = COLUMNAS * FILAS
+    for inicio in range(0, max(len(items), 1), por_pagina):
+        # Páginas en blanco y negro (1 bit): en RGB el PDF pesa ~20 veces más
+        pagina = Image.new("1", PAGINA, 1)
+        draw = ImageDraw.Draw(pagina)
+        for i, enlace in enumerate(items[inicio:inicio + por_pagina]):
+            x = MARGEN + (i % COLUMNAS) * ancho_celda
+            y = MARGEN + (i // COLUMNAS) * alto_celda
+            centro = x + ancho_celda // 2
+            with Image.open(rutas_png[enlace.id]) as qr:
+                pagina.paste(qr.convert("1").resize((LADO_QR, LADO_QR), Image.NEAREST), (centro - LADO_QR // 2, y + 20))
+            fuente_nombre = fuente_ajustada(draw, enlace.nombres, ancho_celda - 20, 28, 14)
+            draw.text((centro, y + LADO_QR + 45), texto_dibujable(enlace.nombres), font=fuente_nombre, fill=0, anchor="mm")
+            draw.text((centro, y + LADO_QR + 80), enlace.codigo or "", font=fuente_codigo, fill=0, anchor="mm")
+        paginas.append(pagina)
+    salida = io.BytesIO()
+    paginas[0].save(salida, "PDF", save_all=True, append_images=paginas[1:], resolution=DPI)
+    return salida.getvalue()
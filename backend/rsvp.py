@@ -0,0 +1,93 @@
+"""
+Confirmación de asistencia en una sola sentencia
+
+La respuesta del invitado se aplica con un único UPDATE ... RETURNING que
+limita adultos/niños a su máximo dentro del propio SQL y que solo toca la
+fila si la respuesta cambia algo; un segundo "Enviar" idéntico no escribe.
+En MySQL, sin RETURNING, la fila se relee tras el UPDATE en la misma
+transacción. Con la cabecera Idempotency-Key el resultado se recuerda
+unos minutos y los reintentos reciben la misma respuesta sin tocar la BD.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import TTLCache
+from config import settings
+from models import EstadoInvitado, Invitado
+from schemas import InvitadoRSVP
+
+CONFIRMACION_SI = "Si, asistiremos."
+CONFIRMACION_NO = "No podremos asistir"
+
+# (uuid, Idempotency-Key) -> (respuesta enviada, cuerpo JSON de la respuesta)
+respuestas_idempotentes = TTLCache(
+    "rsvp_idempotencia", maxsize=4096, ttl=settings.RSVP_IDEMPOTENCY_TTL
+)
+
+
+def _limitado(solicitado: Optional[int], maximo):
+    """min(solicitado, maximo) evaluado en SQL; sin valor se confirma el máximo"""
+    if solicitado is None:
+        return maximo
+    solicitado = max(0, solicitado)
+    return case((maximo < solicitado, maximo), else_=solicitado)
+
+
+def valores_rsvp(rsvp: InvitadoRSVP) -> dict:
+    """Columnas que deja la respuesta (expresiones SQL para las cantidades)"""
+    if rsvp.confirmacion == "si":
+        return {
+            "estado": EstadoInvitado.CONFIRMADO,
+            "confirmacion": CONFIRMACION_SI,
+            "cantidad_adultos": _limitado(rsvp.cantidad_adultos, Invitado.max_adultos),
+            "cantidad_ninos": _limitado(rsvp.cantidad_ninos, Invitado.max_ninos),
+        }
+    return {
+        "estado": EstadoInvitado.RECHAZADO,
+        "confirmacion": CONFIRMACION_NO,
+        "cantidad_adultos": 0,
+        "cantidad_ninos": 0,
+    }
+
+
+def sentencia_rsvp(uuid_invitado: str, rsvp: InvitadoRSVP, returning: bool):
+    valores = valores_rsvp(rsvp)
+    # Solo se escribe si algo cambia; confirmacion depende únicamente del estado
+    cambia = or_(*(
+        getattr(Invitado, columna).is_distinct_from(valores[columna])
+        for columna in ("estado", "cantidad_adultos", "cantidad_ninos")
+    ))
+    sentencia = (
+        update(Invitado)
+        .where(Invitado.uuid == uuid_invitado, cambia)
+        .values(**valores, fecha_confirmacion=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return sentencia.returning(Invitado) if returning else sentencia
+
+
+async def aplicar_rsvp(db: AsyncSession, uuid_invitado: str, rsvp: InvitadoRSVP):
+    """
+    Aplica la respuesta sin confirmar la transacción. Devuelve (invitado, cambió);
+    invitado es None si el uuid no existe.
+    """
+    con_returning = db.get_bind().dialect.update_returning
+    if con_returning:
+        invitado = (await db.scalars(sentencia_rsvp(uuid_invitado, rsvp, True))).first()
+        if invitado is not None:
+            return invitado, True
+    else:
+        resultado = await db.execute(sentencia_rsvp(uuid_invitado, rsvp, False))
+        if resultado.rowcount:
+            invitado = await db.scalar(
+                select(Invitado).where(Invitado.uuid == uuid_invitado)
+                .execution_options(populate_existing=True)
+            )
+            return invitado, True
+
+    # Nada que escribir: el uuid no existe o la respuesta ya estaba registrada
+    invitado = await db.scalar(select(Invitado).where(Invitado.uuid == uuid_invitado))
+    return invitado, False
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, computed_field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from models import EstadoInvitado
 
@@ -48,6 +48,31 @@ class InvitadoResponse(InvitadoBase):
         from_attributes = True
 
 
+class FiltroInvitados(BaseModel):
+    """Filtros del listado de invitados (ver listado.filtros_invitados)"""
+    estado: Optional[List[EstadoInvitado]] = None
+    codigo: Optional[str] = None  # Prefijo del código
+    desde: Optional[datetime] = None
+    hasta: Optional[datetime] = None
+    fecha: str = "created_at"  # Columna a la que aplica el rango desde/hasta
+
+
+class InvitadosLote(BaseModel):
+    """Selección de una operación en lote (se combina con los filtros del listado)"""
+    ids: Optional[List[int]] = None
+    todos: bool = False  # Confirma que sin ids ni filtros se aplica a todos
+
+
+class InvitadosLoteUpdate(InvitadosLote):
+    max_adultos: Optional[int] = None
+    max_ninos: Optional[int] = None
+    estado: Optional[EstadoInvitado] = None
+
+
+class ResultadoLote(BaseModel):
+    afectados: int
+
+
 class InvitadoRSVP(BaseModel):
     confirmacion: str  # "si" o "no"
     cantidad_adultos: Optional[int] = None
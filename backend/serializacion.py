@@ -0,0 +1,111 @@
+"""
+Serialización rápida de invitados (FAST_JSON)
+
+El camino normal pasa cada objeto ORM por InvitadoResponse (validación con
+from_attributes, campos calculados) y luego por el encoder json estándar;
+en el listado completo es la mayor parte del tiempo de CPU. Las filas que
+vienen de la base ya cumplen el esquema, así que con FAST_JSON se usan
+funciones generadas una sola vez a partir de las columnas de
+models.Invitado que arman directamente el dict con los mismos campos y el
+mismo orden que InvitadoResponse, y se codifica con orjson (o json si no
+está instalado). El listado ni siquiera crea objetos ORM: selecciona las
+columnas (COLUMNAS_FILA) y convierte cada fila por posición.
+
+La salida es idéntica a model_dump_json(): mismos nombres, orden, fechas
+ISO 8601 y estado como texto.
+"""
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Iterable
+
+from fastapi import Response
+
+from config import settings
+from models import Invitado
+from schemas import InvitadoResponse
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json con el mismo formato
+    orjson = None
+
+MEDIA_TYPE = "application/json"
+
+
+# Campos calculados de InvitadoResponse: suma de dos columnas (igual que las propiedades del modelo)
+CALCULADOS = {
+    "max_personas": ("max_adultos", "max_ninos"),
+    "cantidad_personas": ("cantidad_adultos", "cantidad_ninos"),
+}
+
+
+def _campos() -> list:
+    columnas = {c.key for c in Invitado.__table__.columns}
+    faltan = [n for n in InvitadoResponse.model_fields if n not in columnas]
+    faltan += [n for n in InvitadoResponse.model_computed_fields if n not in CALCULADOS]
+    if faltan:
+        raise RuntimeError(f"InvitadoResponse y models.Invitado no coinciden: {faltan}")
+    return list(InvitadoResponse.model_fields)
+
+
+def _compilar(nombre: str, expresiones: dict) -> Callable:
+    """Compila `def nombre(o): return {...}` con las expresiones dadas, en el orden de InvitadoResponse"""
+    cuerpo = ", ".join(f"{campo!r}: {expresion}" for campo, expresion in expresiones.items())
+    espacio: dict = {}
+    exec(compile(f"def {nombre}(o):\n    return {{{cuerpo}}}\n", f"<serializacion.{nombre}>", "exec"), espacio)
+    return espacio[nombre]
+
+
+CAMPOS = _campos()
+# Columnas a seleccionar para fila_a_dict (en ese orden)
+COLUMNAS_FILA = [Invitado.__table__.c[n] for n in CAMPOS]
+
+_posicion = {n: i for i, n in enumerate(CAMPOS)}
+# Para objetos ORM (lecturas puntuales, respuestas de escritura)
+invitado_a_dict = _compilar("invitado_a_dict", {
+    **{n: f"o.{n}" for n in CAMPOS},
+    **{n: f"(o.{a} or 0) + (o.{b} or 0)" for n, (a, b) in CALCULADOS.items()},
+})
+# Para filas de select(*COLUMNAS_FILA): acceso por posición, sin objetos ORM
+fila_a_dict = _compilar("fila_a_dict", {
+    **{n: f"o[{_posicion[n]}]" for n in CAMPOS},
+    **{n: f"(o[{_posicion[a]}] or 0) + (o[{_posicion[b]}] or 0)" for n, (a, b) in CALCULADOS.items()},
+})
+
+
+def _por_defecto(valor: Any):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Enum):
+        return valor.value
+    raise TypeError(f"No serializable: {type(valor).__name__}")
+
+
+def dumps(valor: Any) -> bytes:
+    """JSON compacto en UTF-8 (orjson si está disponible)"""
+    if orjson is not None:
+        return orjson.dumps(valor)
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":"), default=_por_defecto).encode("utf-8")
+
+
+def invitado_json(invitado: Invitado) -> bytes:
+    """Equivalente a InvitadoResponse.model_validate(invitado).model_dump_json().encode()"""
+    if settings.FAST_JSON:
+        return dumps(invitado_a_dict(invitado))
+    return InvitadoResponse.model_validate(invitado).model_dump_json().encode("utf-8")
+
+
+def lista_json(filas: Iterable) -> bytes:
+    """Lista JSON a partir de filas de select(*COLUMNAS_FILA)"""
+    return dumps([fila_a_dict(f) for f in filas])
+
+
+def respuesta_invitado(invitado: Invitado, **kwargs):
+    """
+    Con FAST_JSON, Response ya serializada; sin él, el objeto tal cual para que
+    FastAPI lo valide con el response_model de la ruta
+    """
+    if settings.FAST_JSON:
+        return Response(content=dumps(invitado_a_dict(invitado)), media_type=MEDIA_TYPE, **kwargs)
+    return invitado
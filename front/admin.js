@@ -2,6 +2,8 @@
 let token = null;
 let invitados = [];
 let dataTable = null; // Instancia de DataTables
+let eventosAdmin = null; // Conexión SSE con los cambios en vivo
+let conectandoEventos = false;
 
 // Verificar si hay token guardado
 function verificarAutenticacion() {
@@ -45,6 +47,32 @@ function inicializarEventListeners() {
     if (formEditar) {
         formEditar.addEventListener('submit', editarInvitado);
     }
+
+    // Importar lista de invitados
+    const btnImportar = document.getElementById('btnImportarInvitados');
+    const archivoImportar = document.getElementById('archivoImportar');
+    if (btnImportar && archivoImportar) {
+        btnImportar.addEventListener('click', () => archivoImportar.click());
+        archivoImportar.addEventListener('change', importarInvitados);
+    }
+
+    // Operaciones en lote
+    const btnRestablecer = document.getElementById('btnRestablecerTodos');
+    if (btnRestablecer) {
+        btnRestablecer.addEventListener('click', () => operacionLote(
+            'actualizar', '', { todos: true, estado: 'pendiente' },
+            '¿Restablecer todos los invitados a Pendiente? Se borrarán sus confirmaciones.',
+            'invitados restablecidos'
+        ));
+    }
+    const btnEliminarRechazados = document.getElementById('btnEliminarRechazados');
+    if (btnEliminarRechazados) {
+        btnEliminarRechazados.addEventListener('click', () => operacionLote(
+            'eliminar', '?estado=rechazado', {},
+            '¿Eliminar todos los invitados que rechazaron? Esta acción no se puede deshacer.',
+            'invitados eliminados'
+        ));
+    }
 }
 
 // Mostrar modal de login
@@ -145,6 +173,7 @@ function cerrarSesion() {
         cancelButtonColor: '#6c757d'
     }).then((result) => {
         if (result.isConfirmed) {
+            desconectarEventos();
             token = null;
             localStorage.removeItem('admin_token');
             mostrarLogin();
@@ -185,20 +214,13 @@ async function cargarDatos() {
         invitados = await responseInvitados.json();
 
         // Cargar estadísticas
-        const responseStats = await fetch(
-            `${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.ADMIN_ESTADISTICAS}`,
-            {
-                headers: getAuthHeaders()
-            }
-        );
-
-        if (responseStats.ok) {
-            const stats = await responseStats.json();
-            actualizarEstadisticas(stats);
-        }
+        await cargarEstadisticas();
 
         renderizarTabla();
         mostrarAdminContent(); // Asegurar que sea visible
+
+        // Recibir en vivo los cambios posteriores en lugar de recargar todo
+        conectarEventos();
     } catch (error) {
         console.error('Error al cargar datos:', error);
         // ... rest of error handling ...
@@ -218,6 +240,92 @@ async function cargarDatos() {
     }
 }
 
+// Cargar solo las estadísticas
+async function cargarEstadisticas() {
+    const responseStats = await fetch(
+        `${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.ADMIN_ESTADISTICAS}`,
+        {
+            headers: getAuthHeaders()
+        }
+    );
+
+    if (responseStats.ok) {
+        const stats = await responseStats.json();
+        actualizarEstadisticas(stats);
+    }
+}
+
+// Conectar al stream de cambios (RSVP, altas, ediciones y bajas de cualquier organizador).
+// EventSource no envía cabeceras: en la URL va un token corto que solo sirve para abrir el stream
+async function conectarEventos() {
+    if (eventosAdmin || conectandoEventos || !token || typeof EventSource === 'undefined') {
+        return;
+    }
+
+    conectandoEventos = true;
+    let tokenEventos;
+    try {
+        const response = await fetch(`${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.ADMIN_EVENTOS_TOKEN}`, {
+            method: 'POST',
+            headers: getAuthHeaders()
+        });
+        if (!response.ok) {
+            return; // Sin stream el panel sigue funcionando con recargas
+        }
+        tokenEventos = (await response.json()).token;
+    } catch (error) {
+        console.error('No se pudo conectar al stream de cambios:', error);
+        return;
+    } finally {
+        conectandoEventos = false;
+    }
+    if (eventosAdmin || !token) {
+        return;
+    }
+
+    eventosAdmin = new EventSource(
+        `${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.ADMIN_EVENTOS}?token=${encodeURIComponent(tokenEventos)}`
+    );
+
+    // Los reintentos del navegador reusan la URL; con el token ya vencido el
+    // servidor responde 401 y la conexión se cierra: se pide un token nuevo
+    eventosAdmin.onerror = () => {
+        if (eventosAdmin && eventosAdmin.readyState === EventSource.CLOSED) {
+            eventosAdmin = null;
+            setTimeout(conectarEventos, 3000);
+        }
+    };
+
+    eventosAdmin.addEventListener('invitado', (e) => {
+        const cambio = JSON.parse(e.data);
+        if (cambio.accion === 'eliminado') {
+            quitarInvitadoDeTabla(cambio.id);
+        } else if (cambio.invitado) {
+            aplicarInvitadoEnTabla(cambio.invitado);
+        }
+        actualizarEstadisticas(cambio.estadisticas);
+    });
+
+    // Importaciones masivas o cliente atrasado: recargar una sola vez
+    eventosAdmin.addEventListener('importacion', () => cargarDatos());
+    eventosAdmin.addEventListener('lote', () => cargarDatos());
+    eventosAdmin.addEventListener('resync', () => cargarDatos());
+}
+
+function desconectarEventos() {
+    if (eventosAdmin) {
+        eventosAdmin.close();
+        eventosAdmin = null;
+    }
+}
+
+// Tras una acción propia: si el stream no está activo, pedir las estadísticas
+async function refrescarEstadisticasSinStream() {
+    if (!eventosAdmin || eventosAdmin.readyState !== EventSource.OPEN) {
+        await cargarEstadisticas();
+    }
+}
+
 // Agregar nuevo invitado
 async function agregarInvitado(e) {
     e.preventDefault();
@@ -269,11 +377,9 @@ async function agregarInvitado(e) {
         // Limpiar formulario
         document.getElementById('formAgregarInvitado').reset();
 
-        // Recargar datos para actualizar la tabla
-        await cargarDatos();
-        
-        // Esperar un momento para que DataTables se renderice
-        await new Promise(resolve => setTimeout(resolve, 100));
+        // Agregar la fila sin recargar la tabla
+        aplicarInvitadoEnTabla(nuevoInvitado);
+        await refrescarEstadisticasSinStream();
 
         // Mostrar éxito después de actualizar
         Swal.fire({
@@ -297,6 +403,125 @@ async function agregarInvitado(e) {
     }
 }
 
+// Importar invitados desde CSV o NDJSON (una sola petición para toda la lista)
+async function importarInvitados(e) {
+    const archivo = e.target.files[0];
+    e.target.value = '';
+    if (!archivo) {
+        return;
+    }
+
+    const esNdjson = /\.(ndjson|jsonl)$/i.test(archivo.name);
+
+    try {
+        const response = await fetch(
+            `${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.ADMIN_IMPORTAR}`,
+            {
+                method: 'POST',
+                headers: {
+                    'Content-Type': esNdjson ? 'application/x-ndjson' : 'text/csv',
+                    'Authorization': `Bearer ${token}`
+                },
+                body: archivo
+            }
+        );
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Error al importar invitados');
+        }
+
+        const reporte = await response.json();
+
+        // Con el stream activo la recarga llega por el evento 'importacion'
+        if (!eventosAdmin || eventosAdmin.readyState !== EventSource.OPEN) {
+            await cargarDatos();
+        }
+
+        const detalleErrores = reporte.errores
+            .slice(0, 10)
+            .map(err => `Fila ${err.fila}: ${err.errores.join(', ')}`)
+            .join('<br>');
+
+        Swal.fire({
+            icon: reporte.con_error ? 'warning' : 'success',
+            title: `${reporte.importados} invitados importados`,
+            html: reporte.con_error
+                ? `${reporte.con_error} fila(s) con error:<br><small>${detalleErrores}</small>`
+                : 'La lista se importó correctamente',
+            confirmButtonText: 'Perfecto',
+            confirmButtonColor: '#d4a574'
+        });
+    } catch (error) {
+        console.error('Error al importar invitados:', error);
+        Swal.fire({
+            icon: 'error',
+            title: 'Error',
+            text: error.message || 'No se pudo importar la lista',
+            confirmButtonText: 'Entendido',
+            confirmButtonColor: '#d4a574'
+        });
+    }
+}
+
+// Actualizar o eliminar varios invitados en una sola petición
+async function operacionLote(accion, filtros, cuerpo, pregunta, mensajeExito) {
+    const resultado = await Swal.fire({
+        icon: 'warning',
+        title: 'Operación en lote',
+        text: pregunta,
+        showCancelButton: true,
+        confirmButtonText: 'Sí, continuar',
+        cancelButtonText: 'Cancelar',
+        confirmButtonColor: '#000000',
+        cancelButtonColor: '#6c757d'
+    });
+    if (!resultado.isConfirmed) {
+        return;
+    }
+
+    try {
+        const response = await fetch(
+            `${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.ADMIN_LOTE}/${accion}${filtros}`,
+            {
+                method: 'POST',
+                headers: getAuthHeaders(),
+                body: JSON.stringify(cuerpo)
+            }
+        );
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Error en la operación');
+        }
+
+        const { afectados } = await response.json();
+
+        // Con el stream activo la recarga llega por el evento 'lote'
+        if (!eventosAdmin || eventosAdmin.readyState !== EventSource.OPEN) {
+            await cargarDatos();
+        }
+
+        Swal.fire({
+            icon: 'success',
+            title: `${afectados} ${mensajeExito}`,
+            confirmButtonText: 'Perfecto',
+            confirmButtonColor: '#d4a574',
+            timer: 2000,
+            timerProgressBar: true
+        });
+    } catch (error) {
+        console.error('Error en la operación en lote:', error);
+        Swal.fire({
+            icon: 'error',
+            title: 'Error',
+            text: error.message || 'No se pudo completar la operación',
+            confirmButtonText: 'Entendido',
+            confirmButtonColor: '#d4a574'
+        });
+    }
+}
+
 // Editar invitado
 async function editarInvitado(e) {
     e.preventDefault();
@@ -338,16 +563,16 @@ async function editarInvitado(e) {
             throw new Error(error.detail || 'Error al actualizar invitado');
         }
 
+        const invitadoActualizado = await response.json();
+
         const modal = bootstrap.Modal.getInstance(document.getElementById('modalEditarInvitado'));
         if (modal) {
             modal.hide();
         }
 
-        // Recargar datos para actualizar la tabla
-        await cargarDatos();
-        
-        // Esperar un momento para que DataTables se renderice
-        await new Promise(resolve => setTimeout(resolve, 100));
+        // Actualizar solo la fila modificada
+        aplicarInvitadoEnTabla(invitadoActualizado);
+        await refrescarEstadisticasSinStream();
 
         // Mostrar mensaje de éxito después de actualizar
         Swal.fire({
@@ -399,11 +624,9 @@ async function eliminarInvitado(invitadoId) {
                 throw new Error(error.detail || 'Error al eliminar invitado');
             }
 
-            // Recargar datos para actualizar la tabla
-            await cargarDatos();
-            
-            // Esperar un momento para que DataTables se renderice
-            await new Promise(resolve => setTimeout(resolve, 100));
+            // Quitar solo la fila eliminada
+            quitarInvitadoDeTabla(invitadoId);
+            await refrescarEstadisticasSinStream();
 
             // Mostrar éxito después de actualizar
             Swal.fire({
@@ -536,37 +759,7 @@ function renderizarTabla() {
 
     // Renderizar cada invitado
     invitados.forEach(invitado => {
-        const tr = document.createElement('tr');
-        tr.className = 'invitado-row';
-
-        const estadoBadge = getEstadoBadge(invitado.estado);
-
-        const adultosTexto = invitado.max_adultos ? `${invitado.max_adultos} adulto${invitado.max_adultos > 1 ? 's' : ''}` : '';
-        const ninosTexto = invitado.max_ninos ? `${invitado.max_ninos} niño${invitado.max_ninos > 1 ? 's' : ''}` : '';
-        const personasTexto = [adultosTexto, ninosTexto].filter(t => t).join(', ') || `${invitado.max_personas} persona${invitado.max_personas > 1 ? 's' : ''}`;
-        
-        tr.innerHTML = `
-            <td><strong>${invitado.codigo}</strong></td>
-            <td>${invitado.nombres}</td>
-            <td>${personasTexto}</td>
-            <td>${estadoBadge}</td>
-            <td>${invitado.confirmacion || '-'}</td>
-            <td>
-                <span class="link-copy" data-uuid="${invitado.uuid}" onclick="copiarLink('${invitado.uuid}')" title="Haz click para copiar">
-                    <i class="bi bi-link-45deg"></i> Copiar Link
-                </span>
-            </td>
-            <td>
-                <button class="btn btn-sm btn-outline-primary me-2" onclick="abrirModalEditar(${invitado.id})">
-                    <i class="bi bi-pencil"></i>
-                </button>
-                <button class="btn btn-sm btn-outline-danger" onclick="eliminarInvitado(${invitado.id})">
-                    <i class="bi bi-trash"></i>
-                </button>
-            </td>
-        `;
-
-        tbody.appendChild(tr);
+        tbody.appendChild(crearFilaInvitado(invitado));
     });
     
     console.log('Filas agregadas al tbody:', tbody.children.length);
@@ -615,6 +808,78 @@ function renderizarTabla() {
     }
 }
 
+// Crear la fila <tr> de un invitado
+function crearFilaInvitado(invitado) {
+    const tr = document.createElement('tr');
+    tr.className = 'invitado-row';
+    tr.dataset.id = invitado.id;
+
+    const estadoBadge = getEstadoBadge(invitado.estado);
+
+    const adultosTexto = invitado.max_adultos ? `${invitado.max_adultos} adulto${invitado.max_adultos > 1 ? 's' : ''}` : '';
+    const ninosTexto = invitado.max_ninos ? `${invitado.max_ninos} niño${invitado.max_ninos > 1 ? 's' : ''}` : '';
+    const personasTexto = [adultosTexto, ninosTexto].filter(t => t).join(', ') || `${invitado.max_personas} persona${invitado.max_personas > 1 ? 's' : ''}`;
+    
+    tr.innerHTML = `
+        <td><strong>${invitado.codigo}</strong></td>
+        <td>${invitado.nombres}</td>
+        <td>${personasTexto}</td>
+        <td>${estadoBadge}</td>
+        <td>${invitado.confirmacion || '-'}</td>
+        <td>
+            <span class="link-copy" data-uuid="${invitado.uuid}" onclick="copiarLink('${invitado.uuid}')" title="Haz click para copiar">
+                <i class="bi bi-link-45deg"></i> Copiar Link
+            </span>
+        </td>
+        <td>
+            <button class="btn btn-sm btn-outline-primary me-2" onclick="abrirModalEditar(${invitado.id})">
+                <i class="bi bi-pencil"></i>
+            </button>
+            <button class="btn btn-sm btn-outline-danger" onclick="eliminarInvitado(${invitado.id})">
+                <i class="bi bi-trash"></i>
+            </button>
+        </td>
+    `;
+
+    return tr;
+}
+
+// Insertar o reemplazar un invitado en la tabla sin redibujarla completa
+function aplicarInvitadoEnTabla(invitado) {
+    const indice = invitados.findIndex(inv => inv.id === invitado.id);
+    if (indice >= 0) {
+        invitados[indice] = invitado;
+    } else {
+        invitados.push(invitado);
+    }
+
+    if (!dataTable) {
+        renderizarTabla();
+        return;
+    }
+
+    const filaActual = dataTable.row(`[data-id="${invitado.id}"]`);
+    if (filaActual.any()) {
+        filaActual.remove();
+    }
+    dataTable.row.add(crearFilaInvitado(invitado)).draw(false);
+}
+
+// Quitar un invitado de la tabla
+function quitarInvitadoDeTabla(invitadoId) {
+    invitados = invitados.filter(inv => inv.id !== invitadoId);
+
+    if (!dataTable) {
+        renderizarTabla();
+        return;
+    }
+
+    const fila = dataTable.row(`[data-id="${invitadoId}"]`);
+    if (fila.any()) {
+        fila.remove().draw(false);
+    }
+}
+
 // Obtener badge de estado
 function getEstadoBadge(estado) {
     switch(estado) {
@@ -675,6 +940,9 @@ async function cambiarEstado(invitadoId, estadoActual) {
                 const error = await response.json();
                 throw new Error(error.detail || 'Error al cambiar el estado');
             }
+
+            aplicarInvitadoEnTabla(await response.json());
+            await refrescarEstadisticasSinStream();
             
             Swal.fire({
                 icon: 'success',
@@ -685,8 +953,6 @@ async function cambiarEstado(invitadoId, estadoActual) {
                 timer: 2000,
                 timerProgressBar: true
             });
-            
-            await cargarDatos();
         } catch (error) {
             console.error('Error al cambiar estado:', error);
             Swal.fire({
@@ -16,14 +16,29 @@ document.addEventListener('DOMContentLoaded', function() {
     iniciarCountdown();
 });
 
-// Cargar datos del evento desde la API
+// Datos incrustados por el servidor cuando la página se abre con ?uuid=
+function leerDatosIncrustados(uuid) {
+    const script = document.getElementById('datosInvitacion');
+    if (!script) return null;
+    try {
+        const datos = JSON.parse(script.textContent);
+        return datos.invitados.some(inv => inv.uuid === uuid) ? datos : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+// Cargar datos del evento (incrustados en la página o desde la API)
 async function cargarDatosEvento(uuid) {
     try {
-        const response = await fetch(`${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.DATOS_COMPLETOS}/${uuid}`);
-        if (!response.ok) {
-            throw new Error('Error al cargar datos');
+        datosEvento = leerDatosIncrustados(uuid);
+        if (!datosEvento) {
+            const response = await fetch(`${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.DATOS_COMPLETOS}/${uuid}`);
+            if (!response.ok) {
+                throw new Error('Error al cargar datos');
+            }
+            datosEvento = await response.json();
         }
-        datosEvento = await response.json();
         
         // Buscar el invitado actual por UUID
         invitadoActual = datosEvento.invitados.find(inv => inv.uuid === uuid);
@@ -235,18 +250,16 @@ async function validarCodigo() {
     }
 
     try {
-        // Buscar invitado por código usando el endpoint público
-        const response = await fetch(`${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.INVITADO_CODIGO}/${codigo}`);
+        // Invitado y datos del evento en una sola petición a partir del código
+        const response = await fetch(`${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.DATOS_CODIGO}/${encodeURIComponent(codigo)}`);
         
         if (!response.ok) {
             throw new Error('Código no encontrado');
         }
         
-        const invitadoEncontrado = await response.json();
-        uuidInvitado = invitadoEncontrado.uuid;
-        
-        // Cargar datos completos con el UUID
-        await cargarDatosEvento(uuidInvitado);
+        datosEvento = await response.json();
+        invitadoActual = datosEvento.invitados[0];
+        uuidInvitado = invitadoActual.uuid;
         
         // Actualizar URL con UUID
         const nuevaURL = `${window.location.pathname}?uuid=${uuidInvitado}`;
@@ -452,9 +465,26 @@ function actualizarModalRSVP() {
     }
 }
 
+// Clave de idempotencia de la respuesta en curso: se reutiliza si el envío
+// falla y se reintenta la misma respuesta, así el servidor no la aplica dos veces
+let rsvpPendiente = null;
+let enviandoRSVP = false;
+
+function nuevaClaveIdempotencia() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+}
+
 // Enviar RSVP
 async function enviarRSVP(confirmacion) {
     if (!invitadoActual || !uuidInvitado) return;
+    // Doble toque en "Enviar": ignorar mientras hay un envío en curso
+    if (enviandoRSVP) return;
+    enviandoRSVP = true;
+
+    if (!rsvpPendiente || rsvpPendiente.confirmacion !== confirmacion) {
+        rsvpPendiente = { confirmacion, clave: nuevaClaveIdempotencia() };
+    }
 
     try {
         const maxAdultos = invitadoActual.max_adultos || invitadoActual.max_personas || 0;
@@ -477,7 +507,8 @@ async function enviarRSVP(confirmacion) {
             {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'Idempotency-Key': rsvpPendiente.clave
                 },
                 body: JSON.stringify(rsvpData)
             }
@@ -489,6 +520,7 @@ async function enviarRSVP(confirmacion) {
 
         const invitadoActualizado = await response.json();
         invitadoActual = invitadoActualizado;
+        rsvpPendiente = null;
 
         // Cerrar modal
         const modal = bootstrap.Modal.getInstance(document.getElementById('rsvpModal'));
@@ -524,6 +556,8 @@ async function enviarRSVP(confirmacion) {
             confirmButtonText: 'Entendido',
             confirmButtonColor: '#d4a574'
         });
+    } finally {
+        enviandoRSVP = false;
     }
 }
 
@@ -7,12 +7,17 @@ const API_CONFIG = {
         INVITADO_CODIGO: '/api/invitado-codigo',
         EVENTO: '/api/evento',
         DATOS_COMPLETOS: '/api/datos-completos',
+        DATOS_CODIGO: '/api/datos-completos-codigo',
         RSVP: '/api/invitado',
         
         // Admin
         AUTH_LOGIN: '/api/auth/login',
         ADMIN_INVITADOS: '/api/admin/invitados',
+        ADMIN_IMPORTAR: '/api/admin/invitados/import',
+        ADMIN_LOTE: '/api/admin/invitados/lote',
         ADMIN_ESTADISTICAS: '/api/admin/estadisticas',
+        ADMIN_EVENTOS: '/api/admin/eventos',
+        ADMIN_EVENTOS_TOKEN: '/api/admin/eventos/token',
         ADMIN_EVENTO: '/api/admin/evento'
     }
 };